@@ -2,10 +2,7 @@
 Interview service for managing AI-powered interview sessions
 """
 
-import os
-import tempfile
 import streamlit as st
-from langchain.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import BedrockEmbeddings
@@ -35,12 +32,7 @@ class InterviewService:
         
         try:
             # Process the resume for the interview
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                tmp_file.write(resume_file.getvalue())
-                tmp_pdf_path = tmp_file.name
-            
-            loader = PyPDFLoader(tmp_pdf_path)
-            docs = loader.load()
+            docs = utils.load_pdf_bytes(resume_file.getvalue(), source=resume_file.name)
             text_splitter = RecursiveCharacterTextSplitter(
                 chunk_size=5000, chunk_overlap=100
             )
@@ -66,9 +58,6 @@ class InterviewService:
             # Generate initial interview question based on resume
             self._generate_initial_question(split_docs)
             
-            # Clean up temp file
-            os.unlink(tmp_pdf_path)
-            
             return True
             
         except Exception as e:
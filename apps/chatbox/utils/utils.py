@@ -1,4 +1,10 @@
+import atexit
+import json
+import threading
+import boto3
 from langchain.document_loaders import DirectoryLoader, PyPDFLoader
+from langchain_community.document_loaders.parsers.pdf import PyPDFParser
+from langchain_core.documents.base import Blob
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import BedrockEmbeddings
@@ -6,12 +12,50 @@ from langchain_aws import ChatBedrock
 from langchain_core.prompts import ChatPromptTemplate
 
 
+# Chat models and bedrock-runtime clients reused across chat turns and sessions of this process
+_models = {}
+_bedrock_clients = {}
+_pool_lock = threading.Lock()
+pool_stats = {"model_hits": 0, "model_misses": 0, "bedrock_clients": 0}
+
+
+def _get_bedrock_client(region: str):
+    if region not in _bedrock_clients:
+        _bedrock_clients[region] = boto3.client("bedrock-runtime", region_name=region)
+        pool_stats["bedrock_clients"] += 1
+    return _bedrock_clients[region]
+
+
 def get_model(model_id: str, region: str, model_kwargs: dict):
-    return ChatBedrock(
-        model_id=model_id,
-        region=region,
-        model_kwargs=model_kwargs,
-    )
+    key = (model_id, region, json.dumps(model_kwargs, sort_keys=True))
+    with _pool_lock:
+        if key in _models:
+            pool_stats["model_hits"] += 1
+            return _models[key]
+        pool_stats["model_misses"] += 1
+        _models[key] = ChatBedrock(
+            model_id=model_id,
+            region=region,
+            model_kwargs=model_kwargs,
+            client=_get_bedrock_client(region),
+        )
+        return _models[key]
+
+
+def close_models():
+    with _pool_lock:
+        for client in _bedrock_clients.values():
+            client.close()
+        _bedrock_clients.clear()
+        _models.clear()
+
+
+atexit.register(close_models)
+
+
+def load_pdf_bytes(data: bytes, source: str = None):
+    blob = Blob.from_data(data, path=source, mime_type="application/pdf")
+    return list(PyPDFParser().lazy_parse(blob))
 
 
 def process_pdfs_and_create_vectorstore(data_dir, bedrock_config):
@@ -0,0 +1,90 @@
+import os
+import sqlite3
+import threading
+import time
+from logging import Logger
+from typing import Optional, Union
+
+
+class RedisBlobStore:
+    """Bytes values in Redis, keys namespaced by `prefix`, expiring after `ttl_seconds`."""
+
+    def __init__(self, redis_url: str, prefix: str, ttl_seconds: Optional[int] = None):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url)
+        self.client.ping()
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self.client.set(self.prefix + key, value, ex=self.ttl_seconds)
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(key)
+
+
+class SQLiteBlobStore:
+    """Bytes values in a table of a local SQLite file, expiring after `ttl_seconds`."""
+
+    def __init__(self, path: str, table: str, ttl_seconds: Optional[int] = None):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        self.connection.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self.connection.execute(
+                f"SELECT value FROM {self.table} WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time()),
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def set(self, key: str, value: bytes) -> None:
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self.connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at)
+            )
+            self.connection.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+            self.connection.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.connection.execute(f"DELETE FROM {self.table}")
+            self.connection.commit()
+
+
+BlobStore = Union[RedisBlobStore, SQLiteBlobStore]
+
+
+def create_blob_store(
+    redis_url: Optional[str],
+    disk_path: Optional[str],
+    prefix: str,
+    table: str,
+    ttl_seconds: Optional[int] = None,
+    logger: Optional[Logger] = None
+) -> Optional[BlobStore]:
+    """
+    Persistent tier of a cache: Redis at `redis_url` (keys under `prefix`), else the SQLite file `disk_path`
+    (table `table`), which also takes over when Redis cannot be reached. None when neither is given.
+    """
+    if redis_url:
+        try:
+            return RedisBlobStore(redis_url, prefix, ttl_seconds=ttl_seconds)
+        except Exception as ex:
+            (logger or Logger("blob_store")).error(f"Error while connecting to Redis at {redis_url}, falling back to disk: {ex}")
+    if disk_path:
+        return SQLiteBlobStore(disk_path, table, ttl_seconds=ttl_seconds)
+    return None
@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from logging import Logger
+from typing import Any, Dict, Iterator, Optional, Tuple
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from common_modules.caches.blob_store import create_blob_store
+
+_bypass: ContextVar[bool] = ContextVar("llm_response_cache_bypass", default=False)
+
+
+@contextmanager
+def bypass_llm_cache() -> Iterator[None]:
+    """Send the LLM calls made inside the block to the model, without reading or writing the response cache."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Chat model response cache, for the `cache` field of the models created by `LLMFactory`.
+
+    LangChain looks responses up by the serialized messages and the model's llm string, which covers the provider,
+    model, sampling parameters and the tools / schema bound by `with_structured_output`. The `max_entries` most
+    recent responses are kept in process, over the serialized responses shared through `create_blob_store`.
+    Entries expire after `ttl_seconds`. `bypass` or `bypass_llm_cache()` skips the cache; store errors are treated as misses.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: Optional[int] = None,
+        redis_url: Optional[str] = None,
+        disk_path: Optional[str] = None,
+        bypass: bool = False
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.bypass = bypass
+        self.logger = Logger(self.__class__.__name__)
+        self._memory: "OrderedDict[str, Tuple[Optional[float], RETURN_VAL_TYPE]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.store = create_blob_store(
+            redis_url, disk_path, prefix="llm_response:", table="llm_response_blobs", ttl_seconds=ttl_seconds, logger=self.logger
+        )
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def _is_bypassed(self) -> bool:
+        if self.bypass or _bypass.get():
+            with self._lock:
+                self.bypassed += 1
+            return True
+        return False
+
+    def _lookup_memory(self, key: str) -> Optional[RETURN_VAL_TYPE]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, generations = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return generations
+
+    def _lookup_store(self, key: str) -> Optional[RETURN_VAL_TYPE]:
+        if self.store is not None:
+            try:
+                value = self.store.get(key)
+            except Exception as ex:
+                self.logger.error(f"Error while reading LLM response cache: {ex}")
+                value = None
+            if value is not None:
+                generations = loads(value.decode("utf-8"))
+                with self._lock:
+                    self.persistent_hits += 1
+                self._remember(key, generations)
+                return generations
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _remember(self, key: str, generations: RETURN_VAL_TYPE) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._memory[key] = (expires_at, generations)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if self._is_bypassed():
+            return None
+        key = self.make_key(prompt, llm_string)
+        generations = self._lookup_memory(key)
+        return generations if generations is not None else self._lookup_store(key)
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        # Memory hits are answered on the event loop, only the persistent tier goes to a thread
+        if self._is_bypassed():
+            return None
+        key = self.make_key(prompt, llm_string)
+        generations = self._lookup_memory(key)
+        return generations if generations is not None else await asyncio.to_thread(self._lookup_store, key)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self.bypass or _bypass.get():
+            return
+        key = self.make_key(prompt, llm_string)
+        self._remember(key, return_val)
+
+        if self.store is not None:
+            try:
+                self.store.set(key, dumps(return_val).encode("utf-8"))
+            except Exception as ex:
+                self.logger.error(f"Error while writing LLM response cache: {ex}")
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self.bypass or _bypass.get():
+            return
+        if self.store is None:
+            self.update(prompt, llm_string, return_val)
+        else:
+            await asyncio.to_thread(self.update, prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "persistent_store": type(self.store).__name__ if self.store is not None else None,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_llm_response_cache() -> Optional[LLMResponseCache]:
+    """Process-wide LLM response cache configured via environment variables, None when LLM_CACHE_MAX_ENTRIES is 0."""
+    max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1000))
+    if max_entries <= 0:
+        return None
+
+    ttl_seconds = int(os.getenv("LLM_CACHE_TTL_SECONDS", 0))
+    return LLMResponseCache(
+        max_entries=max_entries,
+        ttl_seconds=ttl_seconds or None,
+        redis_url=os.getenv("LLM_CACHE_REDIS_URL"),
+        disk_path=os.getenv("LLM_CACHE_PATH"),
+        bypass=os.getenv("LLM_CACHE_BYPASS", "false").lower() in ("true", "1", "yes", "on"),
+    )
@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import threading
+from logging import Logger
+from typing import Any, Callable, Dict, Mapping, TypeVar
+
+T = TypeVar("T")
+
+
+def _describe(value: Any) -> str:
+    # Objects in a config (rate limiters, ...) are part of the key by identity
+    return f"{type(value).__name__}@{id(value)}"
+
+
+class ClientPool:
+    """
+    Process-wide pool of model clients keyed by provider and config hash, together with the
+    HTTP transports (boto3 clients, httpx clients) those model clients share.
+
+    Hits and misses count model client reuse; every transport counts the model clients built on it
+    and the requests it sent, which shows how many requests went over pooled connections.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, Any] = {}
+        self._transports: Dict[str, Any] = {}
+        self._transport_stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.RLock()
+        self.logger = Logger("client_pool")
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(provider: str, config: Mapping[str, Any]) -> str:
+        content = json.dumps({"provider": provider, **config}, sort_keys=True, default=_describe)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get_client(self, key: str, create: Callable[[], T]) -> T:
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.hits += 1
+                return client
+            self.misses += 1
+            client = self._clients[key] = create()
+            return client
+
+    def get_transport(self, key: str, create: Callable[[], T]) -> T:
+        with self._lock:
+            if key not in self._transports:
+                self._transports[key] = create()
+                self._transport_stats[key] = {"clients": 0, "requests": 0}
+            self._transport_stats[key]["clients"] += 1
+            return self._transports[key]
+
+    def count_request(self, key: str) -> None:
+        with self._lock:
+            self._transport_stats[key]["requests"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "hits": self.hits,
+                "misses": self.misses,
+                "transports": {key: dict(stats) for key, stats in self._transport_stats.items()},
+            }
+
+    def _take_all(self) -> list:
+        with self._lock:
+            transports = list(self._transports.items())
+            self._clients.clear()
+            self._transports.clear()
+            self._transport_stats.clear()
+            return transports
+
+    def close(self) -> None:
+        """
+        Close the shared transports and drop every pooled client. Async transports are closed in their own event
+        loop, so this raises RuntimeError when called from a running one: await aclose() there instead.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("ClientPool.close() cannot run inside an event loop, await aclose() instead")
+
+        for key, transport in self._take_all():
+            try:
+                if hasattr(transport, "aclose"):
+                    asyncio.run(transport.aclose())
+                else:
+                    transport.close()
+            except Exception as ex:
+                self.logger.error(f"Error while closing {key}: {ex}")
+
+    async def aclose(self) -> None:
+        for key, transport in self._take_all():
+            try:
+                result = transport.aclose() if hasattr(transport, "aclose") else transport.close()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as ex:
+                self.logger.error(f"Error while closing {key}: {ex}")
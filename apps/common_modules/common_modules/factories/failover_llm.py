@@ -0,0 +1,230 @@
+import asyncio
+import bisect
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from logging import Logger
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from langchain_core.runnables import Runnable, RunnableConfig
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64]
+
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="failover_llm")
+
+
+class ProviderStats:
+    """Latency histogram and outcome counters of one provider."""
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.successes = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.invalid_outputs = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            self.latency_sum += seconds
+            self.successes += 1
+
+    def increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile of the successful latencies."""
+        if not self.successes:
+            return None
+        rank, total = q * self.successes, 0
+        for upper_bound, count in zip(LATENCY_BUCKETS + [float("inf")], self.bucket_counts):
+            total += count
+            if total >= rank:
+                return upper_bound
+        return float("inf")
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "successes": self.successes,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "invalid_outputs": self.invalid_outputs,
+                "hedges": self.hedges,
+                "latency_mean_seconds": self.latency_sum / self.successes if self.successes else None,
+                "latency_p50_seconds": self.quantile(0.5),
+                "latency_p99_seconds": self.quantile(0.99),
+                "histogram": {
+                    f"le_{upper_bound}": count
+                    for upper_bound, count in zip(LATENCY_BUCKETS + ["inf"], self.bucket_counts)
+                },
+            }
+
+
+class FailoverLLM(Runnable):
+    """
+    Composite of chat models (or their structured-output runnables) tried in order.
+
+    A provider failing, returning no structured output or exceeding `timeout_seconds` hands the request over to
+    the next one. With `hedge_after_seconds`, a provider still running after that long gets the next provider
+    started alongside it, and the first valid output wins. `with_structured_output` and `bind_tools` apply to
+    every provider and share the statistics of this composite.
+
+    `ainvoke` cancels the timed-out and losing calls. `invoke` runs the calls in a shared pool of 32 threads, and a
+    thread cannot be cancelled once started: such calls are abandoned but keep their thread (and the provider quota)
+    until they return. Prefer `ainvoke` when timeouts or hedging are configured.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[Tuple[str, Runnable]],
+        timeout_seconds: Optional[float] = None,
+        hedge_after_seconds: Optional[float] = None,
+        stats: Optional[Dict[str, ProviderStats]] = None
+    ):
+        if not providers:
+            raise ValueError("FailoverLLM needs at least one provider")
+        self.providers = list(providers)
+        self.timeout_seconds = timeout_seconds
+        self.hedge_after_seconds = hedge_after_seconds
+        self.stats = stats if stats is not None else {name: ProviderStats() for name, _ in self.providers}
+        self.model_name = "+".join(name for name, _ in self.providers)
+        self.logger = Logger("failover_llm")
+
+    def _derive(self, method: str, *args: Any, **kwargs: Any) -> "FailoverLLM":
+        return FailoverLLM(
+            [(name, getattr(runnable, method)(*args, **kwargs)) for name, runnable in self.providers],
+            timeout_seconds=self.timeout_seconds,
+            hedge_after_seconds=self.hedge_after_seconds,
+            stats=self.stats,
+        )
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> "FailoverLLM":
+        return self._derive("with_structured_output", schema, **kwargs)
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FailoverLLM":
+        return self._derive("bind_tools", tools, **kwargs)
+
+    def _wait_seconds(self, started_at: Dict[Any, float], has_next: bool) -> Optional[float]:
+        """How long to wait for the running providers before hedging or timing one out."""
+        now = time.monotonic()
+        deadlines = []
+        if self.timeout_seconds is not None:
+            deadlines.extend(start + self.timeout_seconds for start in started_at.values())
+        if self.hedge_after_seconds is not None and has_next:
+            deadlines.append(max(started_at.values()) + self.hedge_after_seconds)
+        return max(0.0, min(deadlines) - now) if deadlines else None
+
+    def _finish(self, name: str, started: float, output: Any = None, error: Optional[BaseException] = None) -> bool:
+        """Record the outcome of a provider. Returns whether its output is valid."""
+        if error is not None:
+            self.stats[name].increment("errors")
+            self.logger.error(f"Error from {name}: {error}")
+            return False
+        if output is None:
+            self.stats[name].increment("invalid_outputs")
+            return False
+        self.stats[name].observe(time.monotonic() - started)
+        return True
+
+    def _should_hedge(self, running: Dict[Any, Tuple[str, float]]) -> bool:
+        if self.hedge_after_seconds is None or not running:
+            return False
+        return time.monotonic() - max(started for _, started in running.values()) >= self.hedge_after_seconds
+
+    def _expire(self, running: Dict[Any, Tuple[str, float]]) -> List[Any]:
+        """Running calls past the timeout, which are given up on."""
+        if self.timeout_seconds is None:
+            return []
+        now = time.monotonic()
+        expired = [call for call, (_, started) in running.items() if now - started >= self.timeout_seconds]
+        for call in expired:
+            name, _ = running.pop(call)
+            self.stats[name].increment("timeouts")
+            self.logger.error(f"Timeout from {name} after {self.timeout_seconds}s")
+        return expired
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        pending = list(self.providers)
+        running: Dict[Future, Tuple[str, float]] = {}
+        last_error: Optional[BaseException] = None
+
+        def start() -> None:
+            name, runnable = pending.pop(0)
+            if running:
+                self.stats[name].increment("hedges")
+            future = _executor.submit(copy_context().run, runnable.invoke, input, config, **kwargs)
+            running[future] = (name, time.monotonic())
+
+        start()
+        try:
+            while running:
+                done, _ = wait(
+                    list(running), timeout=self._wait_seconds({f: s for f, (_, s) in running.items()}, bool(pending)),
+                    return_when=FIRST_COMPLETED
+                )
+                failed = False
+                for future in done:
+                    name, started = running.pop(future)
+                    error = future.exception()
+                    if self._finish(name, started, None if error else future.result(), error):
+                        return future.result()
+                    last_error, failed = error or last_error, True
+                for future in self._expire(running):
+                    future.cancel()
+                    last_error, failed = TimeoutError(f"LLM call timed out after {self.timeout_seconds}s"), True
+                # Hand over on failures and timeouts, or hedge when the running calls are slow
+                if pending and (failed or self._should_hedge(running)):
+                    start()
+        finally:
+            # Only stops the losing hedged calls still queued in the pool, running ones finish in the background
+            for future in running:
+                future.cancel()
+
+        raise RuntimeError(f"All LLM providers failed ({self.model_name})") from last_error
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        pending = list(self.providers)
+        running: Dict[asyncio.Task, Tuple[str, float]] = {}
+        last_error: Optional[BaseException] = None
+
+        def start() -> None:
+            name, runnable = pending.pop(0)
+            if running:
+                self.stats[name].increment("hedges")
+            task = asyncio.ensure_future(runnable.ainvoke(input, config, **kwargs))
+            running[task] = (name, time.monotonic())
+
+        start()
+        try:
+            while running:
+                done, _ = await asyncio.wait(
+                    list(running), timeout=self._wait_seconds({t: s for t, (_, s) in running.items()}, bool(pending)),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                failed = False
+                for task in done:
+                    name, started = running.pop(task)
+                    error = task.exception()
+                    if self._finish(name, started, None if error else task.result(), error):
+                        return task.result()
+                    last_error, failed = error or last_error, True
+                for task in self._expire(running):
+                    task.cancel()
+                    last_error, failed = TimeoutError(f"LLM call timed out after {self.timeout_seconds}s"), True
+                if pending and (failed or self._should_hedge(running)):
+                    start()
+        finally:
+            # Losing hedged calls are not needed anymore
+            for task in running:
+                task.cancel()
+
+        raise RuntimeError(f"All LLM providers failed ({self.model_name})") from last_error
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
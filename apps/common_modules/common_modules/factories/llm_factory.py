@@ -1,7 +1,15 @@
-from typing import TypedDict, Required, NotRequired
+import hashlib
+import os
+from typing import Any, Dict, List, Optional, Tuple, TypedDict, Union, Required, NotRequired
 from enum import Enum
+from langchain_core.caches import BaseCache
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_core.rate_limiters import BaseRateLimiter
+from common_modules.factories.client_pool import ClientPool
+from common_modules.factories.failover_llm import FailoverLLM
+from common_modules.rate_limiters.llm_rate_limiter import InFlightLimitedLLM, LLMRateLimiter
+
+_client_pool = ClientPool()
 
 
 class LLMFactory:
@@ -15,7 +23,9 @@ class LLMFactory:
         temperature: NotRequired[float]
         max_retries: NotRequired[int]
         timeout: NotRequired[float]
-        rate_limiter: NotRequired[InMemoryRateLimiter]
+        rate_limiter: NotRequired[BaseRateLimiter]
+        # Response cache, worth it for deterministic (temperature 0) calls only
+        cache: NotRequired[BaseCache]
         top_p: NotRequired[float]
 
     class Provider(Enum):
@@ -25,6 +35,105 @@ class LLMFactory:
         DEEPSEEK = "deepseek"
         BEDROCK_EMBEDDINGS = "bedrock_embeddings"
 
+    @staticmethod
+    def _add_rate_limiter(kwargs: dict, config: Config) -> None:
+        """Rate limiter and response cache, common to the chat models."""
+        if "rate_limiter" in config:
+            kwargs["rate_limiter"] = config["rate_limiter"]
+        if "cache" in config:
+            kwargs["cache"] = config["cache"]
+
+    @staticmethod
+    def _get_bedrock_client(config: Config) -> Any:
+        """bedrock-runtime client shared by the chat models and embeddings of a region and credentials."""
+        credentials_hash = hashlib.sha256(f"{config['provider_key']}:{config['api_key']}".encode("utf-8")).hexdigest()[:12]
+        key = f"bedrock-runtime/{config['model_region']}/{credentials_hash}"
+
+        def create():
+            import boto3
+            from botocore.config import Config as BotoConfig
+
+            client = boto3.client(
+                "bedrock-runtime",
+                region_name=config["model_region"],
+                aws_access_key_id=config["provider_key"],
+                aws_secret_access_key=config["api_key"],
+                config=BotoConfig(max_pool_connections=int(os.getenv("LLM_MAX_POOL_CONNECTIONS", 50))),
+            )
+            client.meta.events.register("request-created", lambda **_: _client_pool.count_request(key))
+            return client
+
+        return _client_pool.get_transport(key, create)
+
+    @staticmethod
+    def _add_http_clients(kwargs: dict, provider: Provider) -> None:
+        """Share httpx connection pools between the OpenAI-compatible chat models of a provider."""
+        import httpx
+
+        key = f"httpx/{provider.value}"
+        limits = httpx.Limits(max_connections=int(os.getenv("LLM_MAX_POOL_CONNECTIONS", 50)))
+
+        def count_request(_):
+            _client_pool.count_request(key)
+
+        async def acount_request(_):
+            _client_pool.count_request(f"{key}/async")
+
+        kwargs["http_client"] = _client_pool.get_transport(
+            key, lambda: httpx.Client(limits=limits, event_hooks={"request": [count_request]})
+        )
+        kwargs["http_async_client"] = _client_pool.get_transport(
+            f"{key}/async", lambda: httpx.AsyncClient(limits=limits, event_hooks={"request": [acount_request]})
+        )
+
+    @staticmethod
+    def _limit_in_flight(llm: BaseChatModel, config: Config) -> Union[BaseChatModel, InFlightLimitedLLM]:
+        """Hold a slot of the rate limiter around every call when it caps the in-flight requests."""
+        rate_limiter = config.get("rate_limiter")
+        if isinstance(rate_limiter, LLMRateLimiter) and rate_limiter.max_in_flight is not None:
+            return InFlightLimitedLLM(llm, rate_limiter)
+        return llm
+
+    @staticmethod
+    def get_llm(llm_provider: Provider, config: Config) -> Union[BaseChatModel, InFlightLimitedLLM]:
+        """
+        Return the pooled client of the provider and config, creating it on first use.
+        Clients are safe to share between threads and event loop tasks, so prefer this to `create_llm`.
+        """
+        return _client_pool.get_client(
+            ClientPool.make_key(llm_provider.value, config),
+            lambda: LLMFactory._limit_in_flight(LLMFactory.create_llm(llm_provider, config), config)
+        )
+
+    @staticmethod
+    def create_failover_llm(
+        providers: List[Tuple[Provider, Config]],
+        timeout_seconds: Optional[float] = None,
+        hedge_after_seconds: Optional[float] = None
+    ) -> FailoverLLM:
+        """
+        Composite of the pooled clients of the providers, tried in order: see `FailoverLLM`.
+        Statistics are keyed by "<provider>/<model_name>".
+        """
+        return FailoverLLM(
+            [(f"{provider.value}/{config['model_name']}", LLMFactory.get_llm(provider, config)) for provider, config in providers],
+            timeout_seconds=timeout_seconds,
+            hedge_after_seconds=hedge_after_seconds,
+        )
+
+    @staticmethod
+    def get_pool_stats() -> Dict[str, Any]:
+        return _client_pool.get_stats()
+
+    @staticmethod
+    def close() -> None:
+        """Close the shared connection pools and drop the pooled clients, on shutdown. Use aclose() in an event loop."""
+        _client_pool.close()
+
+    @staticmethod
+    async def aclose() -> None:
+        await _client_pool.aclose()
+
     @staticmethod
     def create_llm(llm_provider: Provider, config: Config) -> BaseChatModel:
         if llm_provider == LLMFactory.Provider.OPENAI:
@@ -45,6 +154,8 @@ class LLMFactory:
                 kwargs["max_retries"] = config["max_retries"]
             if "timeout" in config:
                 kwargs["timeout"] = config["timeout"]
+            LLMFactory._add_rate_limiter(kwargs, config)
+            LLMFactory._add_http_clients(kwargs, llm_provider)
 
             return ChatOpenAI(**kwargs)
 
@@ -64,8 +175,7 @@ class LLMFactory:
                 kwargs["max_retries"] = config["max_retries"]
             if "timeout" in config:
                 kwargs["timeout"] = config["timeout"]
-            if "rate_limiter" in config:
-                kwargs["rate_limiter"] = config["rate_limiter"]
+            LLMFactory._add_rate_limiter(kwargs, config)
             if "top_p" in config:
                 kwargs["top_p"] = config["top_p"]
 
@@ -85,6 +195,8 @@ class LLMFactory:
                 kwargs["max_tokens"] = config["max_completion_tokens"]
             if "temperature" in config:
                 kwargs["temperature"] = config["temperature"]
+            LLMFactory._add_rate_limiter(kwargs, config)
+            kwargs["client"] = LLMFactory._get_bedrock_client(config)
 
             return ChatBedrockConverse(**kwargs)
 
@@ -100,6 +212,8 @@ class LLMFactory:
                 kwargs["max_tokens"] = config["max_completion_tokens"]
             if "temperature" in config:
                 kwargs["temperature"] = config["temperature"]
+            LLMFactory._add_rate_limiter(kwargs, config)
+            LLMFactory._add_http_clients(kwargs, llm_provider)
 
             return ChatDeepSeek(**kwargs)
 
@@ -111,6 +225,7 @@ class LLMFactory:
                 "aws_access_key_id": config["provider_key"],
                 "aws_secret_access_key": config["api_key"],
                 "region_name": config["model_region"],
+                "client": LLMFactory._get_bedrock_client(config),
             }
 
             return BedrockEmbeddings(**kwargs)
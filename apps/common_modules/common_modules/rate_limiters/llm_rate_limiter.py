@@ -0,0 +1,301 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from logging import Logger
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+from langchain_core.rate_limiters import BaseRateLimiter
+from langchain_core.runnables import Runnable, RunnableConfig
+
+# Refill the bucket from the Redis server clock, so that replicas with skewed clocks share one bucket
+_TOKEN_BUCKET_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - updated_at) * rate)
+local acquired = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    acquired = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return acquired
+"""
+
+class MemoryTokenBucket:
+    """Token bucket of this process only."""
+
+    def __init__(self, requests_per_second: float, max_bucket_size: float):
+        self.requests_per_second = requests_per_second
+        self.max_bucket_size = max_bucket_size
+        self.tokens = max_bucket_size
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.max_bucket_size, self.tokens + (now - self.updated_at) * self.requests_per_second)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    async def atry_acquire(self) -> bool:
+        return self.try_acquire()
+
+
+class RedisTokenBucket:
+    """Token bucket shared by every process and pod using the same Redis key."""
+
+    def __init__(self, redis_url: str, key: str, requests_per_second: float, max_bucket_size: float):
+        import redis
+        import redis.asyncio
+
+        self.key = key
+        self.requests_per_second = requests_per_second
+        self.max_bucket_size = max_bucket_size
+        self.client = redis.Redis.from_url(redis_url, socket_timeout=1.0)
+        self.async_client = redis.asyncio.Redis.from_url(redis_url, socket_timeout=1.0)
+        self._script = self.client.register_script(_TOKEN_BUCKET_SCRIPT)
+        self._async_script = self.async_client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    def try_acquire(self) -> bool:
+        return bool(self._script(keys=[self.key], args=[self.requests_per_second, self.max_bucket_size]))
+
+    async def atry_acquire(self) -> bool:
+        return bool(await self._async_script(keys=[self.key], args=[self.requests_per_second, self.max_bucket_size]))
+
+
+class LLMRateLimiter(BaseRateLimiter):
+    """
+    Token bucket rate limiter with a cap on in-flight requests, for `LLMFactory.Config.rate_limiter`.
+
+    The bucket lives in Redis when `redis_url` is given, so the quota holds across processes and replicas;
+    on Redis errors, and without `redis_url`, a bucket of this process is used instead. `max_in_flight` caps the
+    concurrent requests of this process: the chat model only acquires tokens from the limiter, and the slots are held
+    around whole calls by `InFlightLimitedLLM`, which `LLMFactory.get_llm` wraps such models in.
+    Time spent waiting for tokens and slots is reported by `get_stats`.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float,
+        max_bucket_size: float = 1,
+        max_in_flight: Optional[int] = None,
+        redis_url: Optional[str] = None,
+        key: str = "llm",
+        check_every_n_seconds: float = 0.1
+    ):
+        self.key = key
+        self.max_in_flight = max_in_flight
+        self.check_every_n_seconds = check_every_n_seconds
+        self.logger = Logger(f"{key}_rate_limiter")
+        self.memory_bucket = MemoryTokenBucket(requests_per_second, max_bucket_size)
+        self.redis_bucket = (
+            RedisTokenBucket(redis_url, f"llm_rate_limiter:{key}", requests_per_second, max_bucket_size)
+            if redis_url else None
+        )
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(max_in_flight) if max_in_flight is not None else None
+        self.in_flight = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.fallbacks = 0
+
+    def _try_take_token(self) -> bool:
+        if self.redis_bucket is not None:
+            try:
+                return self.redis_bucket.try_acquire()
+            except Exception as ex:
+                with self._lock:
+                    self.fallbacks += 1
+                self.logger.error(f"Error while acquiring from Redis, using the local bucket: {ex}")
+        return self.memory_bucket.try_acquire()
+
+    async def _atry_take_token(self) -> bool:
+        if self.redis_bucket is not None:
+            try:
+                return await self.redis_bucket.atry_acquire()
+            except Exception as ex:
+                with self._lock:
+                    self.fallbacks += 1
+                self.logger.error(f"Error while acquiring from Redis, using the local bucket: {ex}")
+        return self.memory_bucket.try_acquire()
+
+    def _record_wait(self, started_at: float) -> None:
+        wait_seconds = time.monotonic() - started_at
+        with self._lock:
+            self.acquired += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        started_at = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+        try:
+            while not self._try_take_token():
+                if not blocking:
+                    return False
+                time.sleep(self.check_every_n_seconds)
+            self._record_wait(started_at)
+            return True
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        started_at = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+        try:
+            while not await self._atry_take_token():
+                if not blocking:
+                    return False
+                await asyncio.sleep(self.check_every_n_seconds)
+            self._record_wait(started_at)
+            return True
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def _take_slot(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def _release_slot(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    @contextmanager
+    def hold_slot(self) -> Iterator[None]:
+        """Hold an in-flight slot for the duration of the block, waiting for one when `max_in_flight` are taken."""
+        if self._slots is None:
+            yield
+            return
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.waiting += 1
+            try:
+                self._slots.acquire()
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+        self._take_slot()
+        try:
+            yield
+        finally:
+            self._release_slot()
+
+    @asynccontextmanager
+    async def ahold_slot(self) -> AsyncIterator[None]:
+        if self._slots is None:
+            yield
+            return
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.waiting += 1
+            try:
+                # Polled, as the semaphore is shared with the threads of the sync callers
+                while not self._slots.acquire(blocking=False):
+                    await asyncio.sleep(self.check_every_n_seconds)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+        self._take_slot()
+        try:
+            yield
+        finally:
+            self._release_slot()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "key": self.key,
+                "backend": "redis" if self.redis_bucket is not None else "memory",
+                "requests_per_second": self.memory_bucket.requests_per_second,
+                "max_bucket_size": self.memory_bucket.max_bucket_size,
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "acquired": self.acquired,
+                "queue_wait_mean_seconds": self.total_wait_seconds / self.acquired if self.acquired else 0.0,
+                "queue_wait_max_seconds": self.max_wait_seconds,
+                "redis_fallbacks": self.fallbacks,
+            }
+
+
+class InFlightLimitedLLM(Runnable):
+    """
+    Chat model (or one of its structured-output runnables) whose calls each hold an in-flight slot of
+    `rate_limiter`, given back however the call ends, cancellation included. `with_structured_output` and
+    `bind_tools` keep the cap; other attributes are those of the wrapped model.
+    """
+
+    def __init__(self, runnable: Runnable, rate_limiter: LLMRateLimiter):
+        self.runnable = runnable
+        self.rate_limiter = rate_limiter
+
+    def __getattr__(self, name: str) -> Any:
+        if name in ("runnable", "rate_limiter"):
+            raise AttributeError(name)
+        return getattr(self.runnable, name)
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> "InFlightLimitedLLM":
+        return InFlightLimitedLLM(self.runnable.with_structured_output(schema, **kwargs), self.rate_limiter)
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "InFlightLimitedLLM":
+        return InFlightLimitedLLM(self.runnable.bind_tools(tools, **kwargs), self.rate_limiter)
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        with self.rate_limiter.hold_slot():
+            return self.runnable.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        async with self.rate_limiter.ahold_slot():
+            return await self.runnable.ainvoke(input, config, **kwargs)
+
+
+_rate_limiters: Dict[str, LLMRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str, model_name: str, **defaults: Any) -> LLMRateLimiter:
+    """
+    Process-wide rate limiter of a provider and model, shared by every chat model created for them.
+
+    Quotas are read from LLM_RATE_LIMITS, a JSON object mapping "<provider>/<model>", "<provider>" or "default"
+    to the keyword arguments of `LLMRateLimiter` (requests_per_second, max_bucket_size, max_in_flight), the most
+    specific entry winning over `defaults`. The bucket is kept in LLM_RATE_LIMITER_REDIS_URL when set.
+    """
+    key = f"{provider}/{model_name}"
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            limits = json.loads(os.getenv("LLM_RATE_LIMITS") or "{}")
+            kwargs = {
+                **defaults,
+                **limits.get("default", {}),
+                **limits.get(provider, {}),
+                **limits.get(key, {}),
+            }
+            _rate_limiters[key] = LLMRateLimiter(
+                redis_url=os.getenv("LLM_RATE_LIMITER_REDIS_URL") or None, key=key, **kwargs
+            )
+        return _rate_limiters[key]
+
+
+def get_rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    with _rate_limiters_lock:
+        return {key: rate_limiter.get_stats() for key, rate_limiter in _rate_limiters.items()}
@@ -7,6 +7,15 @@ class SectionComparer(BaseModel):
     section_items: str = Field(default="{}", description="A json with soft items as keys, and flags as values to indicate JD matching.")
 
 
+class BatchedSectionComparer(BaseModel):
+    """Always use this model to structure your response to the user."""
+    hard_skills: str = Field(default="{}", description="A json with hard skill items as keys, and flags as values to indicate JD matching.")
+    soft_skills: str = Field(default="{}", description="A json with soft skill items as keys, and flags as values to indicate JD matching.")
+    work_experiences: str = Field(default="{}", description="A json with work experience items as keys, and flags as values to indicate JD matching.")
+    educations: str = Field(default="{}", description="A json with education items as keys, and flags as values to indicate JD matching.")
+    certifications: str = Field(default="{}", description="A json with certification items as keys, and flags as values to indicate JD matching.")
+
+
 class ResumeComparer(BaseModel):
     """Always use this model to structure your response to the user."""
     profile_summary: Optional[str] = Field(default="", description="A brief profile summary mentioned by the applicant.")
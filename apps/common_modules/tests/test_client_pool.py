@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from common_modules.factories.client_pool import ClientPool
+
+
+class Transport:
+    def __init__(self):
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class AsyncTransport:
+    def __init__(self):
+        self.closed = False
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+def create_pool() -> tuple:
+    pool = ClientPool()
+    transports = (Transport(), AsyncTransport())
+    pool.get_transport("sync", lambda: transports[0])
+    pool.get_transport("async", lambda: transports[1])
+    pool.get_client("client", object)
+    return pool, transports
+
+
+def test_close():
+    pool, transports = create_pool()
+
+    pool.close()
+
+    assert all(transport.closed for transport in transports)
+    assert pool.get_stats()["clients"] == 0
+
+
+def test_close_refused_in_event_loop_keeps_transports():
+    pool, transports = create_pool()
+
+    async def run() -> None:
+        with pytest.raises(RuntimeError, match="aclose"):
+            pool.close()
+        assert not any(transport.closed for transport in transports)
+        await pool.aclose()
+
+    asyncio.run(run())
+    assert all(transport.closed for transport in transports)
+    assert pool.get_stats() == {"clients": 0, "hits": 0, "misses": 1, "transports": {}}
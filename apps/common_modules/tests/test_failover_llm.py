@@ -0,0 +1,177 @@
+import asyncio
+import time
+from typing import Any, List, Optional
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+from common_modules.factories.failover_llm import FailoverLLM
+
+
+class Answer(BaseModel):
+    text: str
+
+
+class FakeChatModel(BaseChatModel):
+    """Local chat model answering its name after `delay` seconds, or failing with `error`."""
+
+    name: str = "fake"
+    delay: float = 0.0
+    error: Optional[str] = None
+    # Structured output of with_structured_output, None for a model that could not produce it
+    structured: Optional[Answer] = None
+    schemas: List[Any] = []
+    cancelled: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _answer(self) -> ChatResult:
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.name))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.delay)
+        return self._answer()
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self._answer()
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> RunnableLambda:
+        self.schemas.append(schema)
+
+        def parse(input: Any) -> Optional[Answer]:
+            self.invoke(input)
+            return self.structured
+
+        async def aparse(input: Any) -> Optional[Answer]:
+            await self.ainvoke(input)
+            return self.structured
+
+        return RunnableLambda(parse, afunc=aparse)
+
+
+def invoke(llm: FailoverLLM, mode: str) -> Any:
+    return llm.invoke("Hello") if mode == "sync" else asyncio.run(llm.ainvoke("Hello"))
+
+
+@pytest.fixture(params=["sync", "async"])
+def mode(request) -> str:
+    return request.param
+
+
+def test_failover_on_error(mode):
+    llm = FailoverLLM([("primary", FakeChatModel(name="primary", error="throttled")), ("backup", FakeChatModel(name="backup"))])
+
+    assert invoke(llm, mode).content == "backup"
+    stats = llm.get_stats()
+    assert stats["primary"]["errors"] == 1
+    assert stats["backup"]["successes"] == 1
+
+
+def test_all_providers_failing(mode):
+    llm = FailoverLLM([("primary", FakeChatModel(error="throttled")), ("backup", FakeChatModel(error="down"))])
+
+    with pytest.raises(RuntimeError, match="All LLM providers failed"):
+        invoke(llm, mode)
+    assert [stats["errors"] for stats in llm.get_stats().values()] == [1, 1]
+
+
+def test_missing_structured_output_moves_to_next_provider(mode):
+    llm = FailoverLLM([
+        ("primary", FakeChatModel(name="primary")),
+        ("backup", FakeChatModel(name="backup", structured=Answer(text="backup"))),
+    ]).with_structured_output(Answer)
+
+    assert invoke(llm, mode) == Answer(text="backup")
+    stats = llm.get_stats()
+    assert stats["primary"]["invalid_outputs"] == 1
+    assert stats["backup"]["successes"] == 1
+
+
+def test_timeout_moves_to_next_provider(mode):
+    llm = FailoverLLM(
+        [("primary", FakeChatModel(name="primary", delay=1.0)), ("backup", FakeChatModel(name="backup"))],
+        timeout_seconds=0.1,
+    )
+
+    start = time.monotonic()
+    assert invoke(llm, mode).content == "backup"
+    assert time.monotonic() - start < 0.5
+    stats = llm.get_stats()
+    assert stats["primary"]["timeouts"] == 1
+    assert stats["backup"]["successes"] == 1
+
+
+def test_hedged_request_won_by_faster_provider(mode):
+    llm = FailoverLLM(
+        [("primary", FakeChatModel(name="primary", delay=0.5)), ("backup", FakeChatModel(name="backup", delay=0.05))],
+        hedge_after_seconds=0.05,
+    )
+
+    start = time.monotonic()
+    assert invoke(llm, mode).content == "backup"
+    assert time.monotonic() - start < 0.4
+    stats = llm.get_stats()
+    assert stats["backup"]["hedges"] == 1
+    assert stats["backup"]["successes"] == 1
+    assert stats["primary"]["successes"] == 0
+
+
+def test_hedged_request_cancels_losing_call():
+    primary = FakeChatModel(name="primary", delay=0.5)
+    llm = FailoverLLM([("primary", primary), ("backup", FakeChatModel(name="backup"))], hedge_after_seconds=0.05)
+
+    async def run() -> Any:
+        output = await llm.ainvoke("Hello")
+        await asyncio.sleep(0)
+        return output
+
+    assert asyncio.run(run()).content == "backup"
+    assert primary.cancelled
+
+
+def test_no_hedge_when_primary_is_fast(mode):
+    llm = FailoverLLM(
+        [("primary", FakeChatModel(name="primary")), ("backup", FakeChatModel(name="backup"))],
+        hedge_after_seconds=0.2,
+    )
+
+    assert invoke(llm, mode).content == "primary"
+    assert llm.get_stats()["backup"]["hedges"] == 0
+
+
+def test_with_structured_output_applies_to_every_provider_and_shares_stats():
+    primary = FakeChatModel(name="primary", structured=Answer(text="primary"))
+    backup = FakeChatModel(name="backup", structured=Answer(text="backup"))
+    llm = FailoverLLM([("primary", primary), ("backup", backup)], timeout_seconds=5, hedge_after_seconds=1)
+
+    structured_llm = llm.with_structured_output(Answer)
+
+    assert primary.schemas == [Answer] and backup.schemas == [Answer]
+    assert structured_llm.stats is llm.stats
+    assert (structured_llm.timeout_seconds, structured_llm.hedge_after_seconds) == (5, 1)
+    assert structured_llm.invoke("Hello") == Answer(text="primary")
+    assert llm.get_stats()["primary"]["successes"] == 1
+
+
+def test_latency_histogram():
+    llm = FailoverLLM([("primary", FakeChatModel(name="primary", delay=0.15))])
+
+    for _ in range(3):
+        llm.invoke("Hello")
+
+    stats = llm.get_stats()["primary"]
+    assert stats["successes"] == 3
+    assert stats["histogram"]["le_0.25"] == 3
+    assert stats["latency_p50_seconds"] == 0.25
+    assert 0.15 <= stats["latency_mean_seconds"] < 0.25
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.runnables import RunnableLambda
+from common_modules.rate_limiters.llm_rate_limiter import InFlightLimitedLLM, LLMRateLimiter
+
+
+def create_llm(rate_limiter: LLMRateLimiter, delay: float, peak: list) -> InFlightLimitedLLM:
+    """Runnable sleeping `delay` seconds, recording the peak of in-flight slots."""
+    def call(input: str) -> str:
+        peak.append(rate_limiter.in_flight)
+        time.sleep(delay)
+        return input
+
+    async def acall(input: str) -> str:
+        peak.append(rate_limiter.in_flight)
+        await asyncio.sleep(delay)
+        return input
+
+    return InFlightLimitedLLM(RunnableLambda(call, afunc=acall), rate_limiter)
+
+
+def test_in_flight_cap():
+    rate_limiter = LLMRateLimiter(requests_per_second=100, max_bucket_size=100, max_in_flight=2, check_every_n_seconds=0.01)
+    peak = []
+    llm = create_llm(rate_limiter, 0.05, peak)
+
+    with ThreadPoolExecutor(6) as executor:
+        assert list(executor.map(llm.invoke, ["a"] * 6)) == ["a"] * 6
+
+    async def run() -> list:
+        return await asyncio.gather(*[llm.ainvoke("b") for _ in range(6)])
+
+    assert asyncio.run(run()) == ["b"] * 6
+    assert max(peak) == 2
+    assert rate_limiter.get_stats()["in_flight"] == 0
+
+
+def test_cancelled_call_releases_its_slot():
+    rate_limiter = LLMRateLimiter(requests_per_second=100, max_bucket_size=100, max_in_flight=1, check_every_n_seconds=0.01)
+    llm = create_llm(rate_limiter, 1.0, [])
+
+    async def run() -> str:
+        with_timeout = asyncio.wait_for(llm.ainvoke("slow"), timeout=0.05)
+        try:
+            await with_timeout
+        except asyncio.TimeoutError:
+            pass
+        assert rate_limiter.get_stats()["in_flight"] == 0
+        return await asyncio.wait_for(create_llm(rate_limiter, 0.0, []).ainvoke("next"), timeout=1.0)
+
+    assert asyncio.run(run()) == "next"
+    assert rate_limiter.get_stats()["in_flight"] == 0
+
+
+def test_redis_errors_fall_back_to_the_local_bucket():
+    rate_limiter = LLMRateLimiter(requests_per_second=1, max_bucket_size=1, redis_url="redis://localhost:1/0")
+
+    threads = [threading.Thread(target=rate_limiter.acquire, kwargs={"blocking": False}) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = rate_limiter.get_stats()
+    assert stats["redis_fallbacks"] == 4
+    assert stats["acquired"] == 1
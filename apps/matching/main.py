@@ -3,16 +3,34 @@ JD and Resume Matching Service
 FastAPI application for matching Job Descriptions with Resumes
 """
 import os
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import asyncio
+from typing import List, Optional
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from service import (
     get_embedding_config,
     get_model_config,
-    extract_text_from_pdf,
+    get_match_stage_timeouts,
+    get_embedding_batch_config,
+    get_embedding_cache_config,
+    get_pdf_parsing_config,
+    get_text_cache_config,
     create_embeddings_client,
     create_model_client,
-    perform_complete_match
+    aperform_complete_match,
+    arank_resumes,
+    create_s3_client,
+    parse_s3_uri,
+    download_s3_object,
+    get_s3_object_etag,
+    BatchEmbedder,
+    EmbeddingCache,
+    PDFParsingExecutor,
+    ParserBusyError,
+    DocumentTextCache,
+    content_key,
+    s3_object_key
 )
 
 app = FastAPI(
@@ -31,8 +49,58 @@ app.add_middleware(
 )
 
 # Initialize clients
-embeddings = create_embeddings_client(get_embedding_config())
+embedding_config = get_embedding_config()
+embeddings = create_embeddings_client(embedding_config)
 model = create_model_client(get_model_config())
+stage_timeouts = get_match_stage_timeouts()
+embedding_cache = EmbeddingCache(model_id=embedding_config["model_id"], **get_embedding_cache_config())
+embedder = BatchEmbedder(embeddings, cache=embedding_cache, **get_embedding_batch_config())
+s3_client = create_s3_client()
+pdf_parser = PDFParsingExecutor(**get_pdf_parsing_config())
+text_cache = DocumentTextCache(**get_text_cache_config())
+
+
+async def extract_text(file_content: bytes, parsing_slots: asyncio.Semaphore) -> str:
+    """Extract the text of a PDF, parsing it only if the same bytes were not parsed before."""
+    key = content_key(file_content)
+    text = await asyncio.to_thread(text_cache.get, key)
+    if text is None:
+        async with parsing_slots:
+            text = await pdf_parser.aextract_text(file_content)
+        await asyncio.to_thread(text_cache.set, key, text)
+    return text
+
+
+async def load_s3_text(s3_uri: str, parsing_slots: Optional[asyncio.Semaphore] = None) -> str:
+    """Extract the text of an S3 PDF, downloading it only if this object version is not cached."""
+    bucket, object_key = parse_s3_uri(s3_uri)
+    etag = await asyncio.to_thread(get_s3_object_etag, s3_client, s3_uri)
+    key = s3_object_key(bucket, object_key, etag)
+    text = await asyncio.to_thread(text_cache.get, key)
+    if text is None:
+        content = await asyncio.to_thread(download_s3_object, s3_client, s3_uri)
+        text, = await extract_texts(content, parsing_slots=parsing_slots)
+        await asyncio.to_thread(text_cache.set, key, text)
+    return text
+
+
+def new_parsing_slots() -> asyncio.Semaphore:
+    # PDFs of one request parsed at a time: a batch waits for the pool instead of overflowing its queue,
+    # which only rejects (503) when concurrent requests fill it
+    return asyncio.Semaphore(pdf_parser.max_workers)
+
+
+async def extract_texts(*contents: bytes, parsing_slots: Optional[asyncio.Semaphore] = None) -> List[str]:
+    """Extract the text of PDFs in the parsing process pool, at most `max_workers` of them at a time."""
+    parsing_slots = parsing_slots or new_parsing_slots()
+    try:
+        return await asyncio.gather(*[extract_text(content, parsing_slots) for content in contents])
+    except ParserBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 
@@ -45,7 +113,9 @@ async def root():
         "description": "AI-powered service to match Job Descriptions with Resumes",
         "endpoints": {
             "health": "/health",
-            "match": "/match"
+            "match": "/match",
+            "rank": "/rank",
+            "stats": "/stats"
         }
     }
 
@@ -56,6 +126,16 @@ async def health_check():
     return {"status": "healthy", "service": "JD-Resume Matching Service"}
 
 
+@app.get("/stats")
+async def stats():
+    """Embedding batching, cache and PDF parsing statistics."""
+    return {
+        "embeddings": embedder.get_stats(),
+        "pdf_parsing": pdf_parser.get_stats(),
+        "text_cache": text_cache.get_stats()
+    }
+
+
 @app.post("/match")
 async def match_jd_resume(
     jd_file: UploadFile = File(..., description="Job Description PDF"),
@@ -75,8 +155,8 @@ async def match_jd_resume(
         jd_content = await jd_file.read()
         resume_content = await resume_file.read()
         
-        jd_text = extract_text_from_pdf(jd_content)
-        resume_text = extract_text_from_pdf(resume_content)
+        # Parse in worker processes so other requests keep being served
+        jd_text, resume_text = await extract_texts(jd_content, resume_content)
         
         if not jd_text.strip():
             raise HTTPException(status_code=400, detail="Could not extract text from JD PDF")
@@ -85,21 +165,88 @@ async def match_jd_resume(
             raise HTTPException(status_code=400, detail="Could not extract text from Resume PDF")
         
         # Perform complete matching analysis using functional approach
-        result = perform_complete_match(
+        result = await aperform_complete_match(
             jd_text=jd_text,
             resume_text=resume_text,
             jd_filename=jd_file.filename,
             resume_filename=resume_file.filename,
             embeddings=embeddings,
-            model=model
+            model=model,
+            stage_timeouts=stage_timeouts,
+            embedder=embedder
         )
         
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
 
+
+@app.post("/rank")
+async def rank_resumes(
+    jd_file: UploadFile = File(..., description="Job Description PDF"),
+    resume_files: List[UploadFile] = File(default=[], description="Resume PDFs"),
+    resume_uris: List[str] = Form(default=[], description="Resume PDF S3 URIs (s3://bucket/path/file.pdf)"),
+    top_k: int = Form(10, description="Number of best matching resumes to return"),
+    analyze_top_k: bool = Form(False, description="Run the LLM analysis on the top-k resumes")
+):
+    """
+    Rank many Resumes against one Job Description and return the top-k matches.
+    """
+    if not jd_file.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="JD file must be a PDF")
+
+    if not resume_files and not resume_uris:
+        raise HTTPException(status_code=400, detail="At least one resume file or resume URI is required")
+
+    for resume_file in resume_files:
+        if not resume_file.filename.endswith('.pdf'):
+            raise HTTPException(status_code=400, detail=f"Resume file {resume_file.filename} must be a PDF")
+
+    if top_k < 1:
+        raise HTTPException(status_code=400, detail="top_k must be at least 1")
+
+    try:
+        jd_content = await jd_file.read()
+        resume_contents = [await resume_file.read() for resume_file in resume_files]
+
+        parsing_slots = new_parsing_slots()
+        jd_text, *resume_texts = await extract_texts(jd_content, *resume_contents, parsing_slots=parsing_slots)
+        resume_texts += await asyncio.gather(*[load_s3_text(resume_uri, parsing_slots) for resume_uri in resume_uris])
+        resume_names = [resume_file.filename for resume_file in resume_files] + resume_uris
+
+        if not jd_text.strip():
+            raise HTTPException(status_code=400, detail="Could not extract text from JD PDF")
+
+        resumes = [
+            (name, text)
+            for name, text in zip(resume_names, resume_texts)
+            if text.strip()
+        ]
+        skipped_resumes = [name for name, text in zip(resume_names, resume_texts) if not text.strip()]
+
+        result = await arank_resumes(
+            jd_text=jd_text,
+            resumes=resumes,
+            embedder=embedder,
+            model=model,
+            top_k=top_k,
+            analyze_top_k=analyze_top_k,
+            stage_timeouts=stage_timeouts
+        )
+        result["jd_filename"] = jd_file.filename
+        result["skipped_resumes"] = skipped_resumes
+
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8001))
     uvicorn.run(app, host="0.0.0.0", port=port)
@@ -1,24 +1,54 @@
 """
 Service package for JD-Resume Matching Service
 """
-from .config_service import load_config, get_embedding_config, get_model_config
+from .config_service import load_config, get_embedding_config, get_model_config, get_match_stage_timeouts, get_embedding_batch_config, get_embedding_cache_config, get_pdf_parsing_config, get_text_cache_config
 from .pdf_service import extract_text_from_pdf
+from .parsing_service import PDFParsingExecutor, ParserBusyError
+from .embedding_service import BatchEmbedder, cosine_similarities
+from .embedding_cache import EmbeddingCache
+from .text_cache import DocumentTextCache, content_key, s3_object_key
 from .matching_service import (
     create_embeddings_client,
     create_model_client,
     calculate_similarity_score,
+    acalculate_similarity_score,
     analyze_match_with_llm,
-    perform_complete_match
+    aanalyze_match_with_llm,
+    perform_complete_match,
+    aperform_complete_match,
+    arank_resumes
 )
+from .storage_service import create_s3_client, parse_s3_uri, download_s3_object, get_s3_object_etag
 
 __all__ = [
     "load_config",
     "get_embedding_config", 
     "get_model_config",
+    "get_match_stage_timeouts",
+    "get_embedding_batch_config",
+    "get_embedding_cache_config",
+    "get_pdf_parsing_config",
+    "get_text_cache_config",
     "extract_text_from_pdf",
+    "PDFParsingExecutor",
+    "ParserBusyError",
+    "BatchEmbedder",
+    "cosine_similarities",
+    "EmbeddingCache",
+    "DocumentTextCache",
+    "content_key",
+    "s3_object_key",
     "create_embeddings_client",
     "create_model_client",
     "calculate_similarity_score",
+    "acalculate_similarity_score",
     "analyze_match_with_llm",
-    "perform_complete_match"
+    "aanalyze_match_with_llm",
+    "perform_complete_match",
+    "aperform_complete_match",
+    "arank_resumes",
+    "create_s3_client",
+    "parse_s3_uri",
+    "download_s3_object",
+    "get_s3_object_etag"
 ]
@@ -0,0 +1,57 @@
+"""
+Blob Store
+Persistent key-value tiers of the caches: bytes values keyed by string, in Redis or in a local SQLite file
+"""
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+
+class RedisBlobStore:
+    """Persistent tier backed by Redis, keys namespaced by `prefix`."""
+
+    def __init__(self, redis_url: str, prefix: str, ttl_seconds: Optional[int] = None):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url)
+        self.client.ping()
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return self.client.mget([self.prefix + key for key in keys])
+
+    def set_many(self, items: Dict[str, bytes]) -> None:
+        pipeline = self.client.pipeline()
+        for key, value in items.items():
+            pipeline.set(self.prefix + key, value, ex=self.ttl_seconds)
+        pipeline.execute()
+
+
+class SQLiteBlobStore:
+    """Persistent tier backed by a table of a local SQLite file."""
+
+    def __init__(self, path: str, table: str, value_column: str = "value"):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.table = table
+        self.value_column = value_column
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, {value_column} BLOB NOT NULL)")
+        self.connection.commit()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            rows = self.connection.execute(
+                f"SELECT key, {self.value_column} FROM {self.table} WHERE key IN ({','.join('?' * len(keys))})", keys
+            ).fetchall()
+        found = dict(rows)
+        return [found.get(key) for key in keys]
+
+    def set_many(self, items: Dict[str, bytes]) -> None:
+        with self._lock:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, {self.value_column}) VALUES (?, ?)", items.items()
+            )
+            self.connection.commit()
@@ -34,3 +34,33 @@ def get_model_config() -> Dict[str, Any]:
         "region": configs["aws"]["bedrock"]["model_region"],
         "model_kwargs": configs["aws"]["bedrock"]["model_kwargs"],
     }
+
+
+def get_match_stage_timeouts() -> Dict[str, float]:
+    """Get per-stage timeouts (seconds) of the match pipeline."""
+    configs = load_config()
+    return configs.get("matching", {}).get("stage_timeouts", {})
+
+
+def get_embedding_batch_config() -> Dict[str, Any]:
+    """Get embedding batching configuration."""
+    configs = load_config()
+    return configs.get("matching", {}).get("embedding_batch", {})
+
+
+def get_embedding_cache_config() -> Dict[str, Any]:
+    """Get embedding cache configuration."""
+    configs = load_config()
+    return configs.get("matching", {}).get("embedding_cache", {})
+
+
+def get_pdf_parsing_config() -> Dict[str, Any]:
+    """Get PDF parsing process pool configuration."""
+    configs = load_config()
+    return configs.get("matching", {}).get("pdf_parsing", {})
+
+
+def get_text_cache_config() -> Dict[str, Any]:
+    """Get extracted document text cache configuration."""
+    configs = load_config()
+    return configs.get("matching", {}).get("text_cache", {})
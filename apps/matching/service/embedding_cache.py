@@ -0,0 +1,123 @@
+"""
+Embedding Cache
+Content-addressed cache of embedding vectors with an in-process LRU tier and a persistent tier
+"""
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import numpy as np
+from .blob_store import RedisBlobStore, SQLiteBlobStore
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so that formatting-only differences map to the same cache entry."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class EmbeddingCache:
+    """
+    Embedding cache keyed by a hash of the normalized text and the embedding model id.
+
+    Lookups go to the in-process LRU first, then to the persistent `blob_store` tier, where
+    vectors are stored as float32 bytes.
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        max_entries: int = 10000,
+        redis_url: Optional[str] = None,
+        disk_path: Optional[str] = None,
+        ttl_seconds: Optional[int] = None
+    ):
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.store = self._create_store(redis_url, disk_path, ttl_seconds)
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def _create_store(self, redis_url: Optional[str], disk_path: Optional[str], ttl_seconds: Optional[int]):
+        if redis_url:
+            try:
+                return RedisBlobStore(redis_url, prefix="embedding:", ttl_seconds=ttl_seconds)
+            except Exception as e:
+                print(f"Embedding cache cannot use Redis at {redis_url}, falling back to disk: {e}")
+        if disk_path:
+            # "vector" column kept for the cache files written before the blob stores were shared
+            return SQLiteBlobStore(disk_path, table="embeddings", value_column="vector")
+        return None
+
+    def make_key(self, text: str) -> str:
+        content = f"{self.model_id}\0{normalize_text(text)}"
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Return the cached vector of each text, or None when it is not cached."""
+        keys = [self.make_key(text) for text in texts]
+        vectors: List[Optional[np.ndarray]] = [None] * len(keys)
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    vectors[i] = vector
+                    self.memory_hits += 1
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing and self.store is not None:
+            try:
+                values = self.store.get_many([keys[i] for i in missing])
+            except Exception as e:
+                print(f"Error reading embedding cache: {e}")
+                values = [None] * len(missing)
+
+            restored = {}
+            for i, value in zip(missing, values):
+                if value is not None:
+                    vectors[i] = np.frombuffer(value, dtype=np.float32)
+                    restored[keys[i]] = vectors[i]
+            self.persistent_hits += len(restored)
+            self._remember(restored)
+
+        self.misses += sum(vector is None for vector in vectors)
+        return vectors
+
+    def set_many(self, texts: List[str], vectors: np.ndarray) -> None:
+        """Store vectors of texts in both tiers."""
+        items = {
+            self.make_key(text): np.asarray(vector, dtype=np.float32)
+            for text, vector in zip(texts, vectors)
+        }
+        self._remember(items)
+
+        if self.store is not None:
+            try:
+                self.store.set_many({key: vector.tobytes() for key, vector in items.items()})
+            except Exception as e:
+                print(f"Error writing embedding cache: {e}")
+
+    def _remember(self, items: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            for key, vector in items.items():
+                self._memory[key] = vector
+                self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "persistent_store": type(self.store).__name__ if self.store is not None else None,
+        }
@@ -0,0 +1,138 @@
+"""
+Embedding Service
+Batches texts into embed_documents calls and computes similarities with NumPy
+"""
+import asyncio
+from typing import List, Optional, Tuple
+import numpy as np
+from langchain_community.embeddings import BedrockEmbeddings
+from .embedding_cache import EmbeddingCache
+
+
+class BatchEmbedder:
+    """
+    Embedding layer that coalesces texts into embed_documents calls.
+
+    Texts of one call are always embedded together. With the async API, texts from
+    concurrent requests arriving within `batch_window_ms` are micro-batched into
+    the same embed_documents call, up to `max_batch_size` texts per call.
+    With a cache, only texts missing from the cache are embedded.
+    """
+
+    def __init__(
+        self,
+        embeddings: BedrockEmbeddings,
+        max_batch_size: int = 16,
+        batch_window_ms: float = 10.0,
+        cache: Optional[EmbeddingCache] = None
+    ):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window_ms / 1000
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self.batch_count = 0
+        self.text_count = 0
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed texts, returning a (len(texts), dim) float32 array."""
+        if self.cache is None:
+            return self._embed_texts(texts)
+
+        vectors = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            embedded = self._embed_texts(missing_texts)
+            self.cache.set_many(missing_texts, embedded)
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+        return to_matrix(vectors)
+
+    def _embed_texts(self, texts: List[str]) -> np.ndarray:
+        vectors = []
+        for i in range(0, len(texts), self.max_batch_size):
+            batch = texts[i:i + self.max_batch_size]
+            vectors.extend(self.embeddings.embed_documents(batch))
+            self.batch_count += 1
+            self.text_count += len(batch)
+        return to_matrix(vectors)
+
+    async def aembed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed texts asynchronously, sharing embed_documents calls with concurrent callers."""
+        if self.cache is None:
+            return await self._aembed_texts(texts)
+
+        vectors = await asyncio.to_thread(self.cache.get_many, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            embedded = await self._aembed_texts(missing_texts)
+            await asyncio.to_thread(self.cache.set_many, missing_texts, embedded)
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+        return to_matrix(vectors)
+
+    async def _aembed_texts(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return to_matrix([])
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._pending.append((text, future))
+            futures.append(future)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_task is None:
+            self._flush_task = loop.create_task(self._flush_after_window())
+
+        vectors = await asyncio.gather(*futures)
+        return to_matrix(vectors)
+
+    async def _flush_after_window(self) -> None:
+        await asyncio.sleep(self.batch_window)
+        self._flush_task = None
+        self._flush()
+
+    def _flush(self) -> None:
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            asyncio.get_running_loop().create_task(self._embed_batch(batch))
+
+    async def _embed_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            vectors = await self.embeddings.aembed_documents([text for text, _ in batch])
+            self.batch_count += 1
+            self.text_count += len(batch)
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def get_stats(self) -> dict:
+        return {
+            "batch_count": self.batch_count,
+            "text_count": self.text_count,
+            "average_batch_size": self.text_count / self.batch_count if self.batch_count else 0.0,
+            "cache": self.cache.get_stats() if self.cache is not None else None,
+        }
+
+
+def to_matrix(vectors) -> np.ndarray:
+    """Stack embedding vectors into a float32 matrix."""
+    return np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+
+
+def cosine_similarities(query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Cosine similarity between a query vector and every row of a matrix."""
+    matrix = np.atleast_2d(matrix)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    return np.divide(matrix @ query, norms, out=np.zeros(len(matrix), dtype=np.float32), where=norms > 0)
@@ -2,12 +2,26 @@
 Matching Service
 Handles JD-Resume matching logic using embeddings and LLM analysis
 """
+import asyncio
 import json
 import re
-from typing import Dict, Any
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+import numpy as np
 from langchain_community.embeddings import BedrockEmbeddings
 from langchain_aws import ChatBedrock
-from sklearn.metrics.pairwise import cosine_similarity
+from .embedding_service import BatchEmbedder, cosine_similarities, to_matrix
+
+
+# Default per-stage timeouts (seconds) of the match pipeline
+DEFAULT_STAGE_TIMEOUTS = {
+    "embedding": 30.0,
+    "llm_analysis": 120.0,
+}
+
+# Threads running the stages of perform_complete_match concurrently
+_stage_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="match_stage")
 
 
 def create_embeddings_client(embedding_config: Dict[str, str]) -> BedrockEmbeddings:
@@ -23,15 +37,12 @@ def create_model_client(model_config: Dict[str, Any]) -> ChatBedrock:
 def calculate_similarity_score(jd_text: str, resume_text: str, embeddings: BedrockEmbeddings) -> float:
     """Calculate similarity score between JD and Resume using embeddings."""
     try:
-        # Get embeddings for both texts
-        jd_embedding = embeddings.embed_query(jd_text)
-        resume_embedding = embeddings.embed_query(resume_text)
-        
+        # Get embeddings for both texts in one batch
+        jd_embedding, resume_embedding = to_matrix(embeddings.embed_documents([jd_text, resume_text]))
+
         # Calculate cosine similarity
-        similarity = cosine_similarity(
-            [jd_embedding], [resume_embedding]
-        )[0][0]
-        
+        similarity = cosine_similarities(jd_embedding, resume_embedding)[0]
+
         # Convert to percentage
         return float(similarity * 100)
     except Exception as e:
@@ -39,9 +50,22 @@ def calculate_similarity_score(jd_text: str, resume_text: str, embeddings: Bedro
         return 0.0
 
 
-def analyze_match_with_llm(jd_text: str, resume_text: str, model: ChatBedrock) -> Dict[str, Any]:
-    """Use LLM to analyze the match between JD and Resume."""
-    prompt = f"""
+async def acalculate_similarity_score(jd_text: str, resume_text: str, embeddings: BedrockEmbeddings) -> float:
+    """Async version of calculate_similarity_score."""
+    try:
+        jd_embedding, resume_embedding = to_matrix(await embeddings.aembed_documents([jd_text, resume_text]))
+
+        similarity = cosine_similarities(jd_embedding, resume_embedding)[0]
+
+        return float(similarity * 100)
+    except Exception as e:
+        print(f"Error calculating similarity: {e}")
+        return 0.0
+
+
+def build_match_prompt(jd_text: str, resume_text: str) -> str:
+    """Build the prompt used for the LLM match analysis."""
+    return f"""
     Analyze the following Job Description and Resume to determine their compatibility.
     
     Job Description:
@@ -64,54 +88,276 @@ def analyze_match_with_llm(jd_text: str, resume_text: str, model: ChatBedrock) -
         "assessment": "detailed assessment text"
     }}
     """
-    
-    try:
-        response = model.invoke(prompt)
-        # Try to parse JSON from response
-        json_match = re.search(r'\{.*\}', response.content, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
-        else:
-            # Fallback if JSON parsing fails
-            return {
-                "match_percentage": 0,
-                "matching_skills": [],
-                "missing_requirements": [],
-                "assessment": "Unable to parse analysis"
-            }
-    except Exception as e:
-        print(f"Error in LLM analysis: {e}")
+
+
+def parse_llm_analysis(content: str) -> Dict[str, Any]:
+    """Parse the JSON analysis from the LLM response content."""
+    # Try to parse JSON from response
+    json_match = re.search(r'\{.*\}', content, re.DOTALL)
+    if json_match:
+        return json.loads(json_match.group())
+    else:
+        # Fallback if JSON parsing fails
         return {
             "match_percentage": 0,
             "matching_skills": [],
             "missing_requirements": [],
-            "assessment": f"Analysis failed: {str(e)}"
+            "assessment": "Unable to parse analysis"
         }
 
 
+def failed_llm_analysis(error: Any) -> Dict[str, Any]:
+    """Analysis returned when the LLM call fails."""
+    return {
+        "match_percentage": 0,
+        "matching_skills": [],
+        "missing_requirements": [],
+        "assessment": f"Analysis failed: {str(error)}"
+    }
+
+
+def analyze_match_with_llm(jd_text: str, resume_text: str, model: ChatBedrock) -> Dict[str, Any]:
+    """Use LLM to analyze the match between JD and Resume."""
+    try:
+        response = model.invoke(build_match_prompt(jd_text, resume_text))
+        return parse_llm_analysis(response.content)
+    except Exception as e:
+        print(f"Error in LLM analysis: {e}")
+        return failed_llm_analysis(e)
+
+
+async def aanalyze_match_with_llm(jd_text: str, resume_text: str, model: ChatBedrock) -> Dict[str, Any]:
+    """Async version of analyze_match_with_llm."""
+    try:
+        response = await model.ainvoke(build_match_prompt(jd_text, resume_text))
+        return parse_llm_analysis(response.content)
+    except Exception as e:
+        print(f"Error in LLM analysis: {e}")
+        return failed_llm_analysis(e)
+
+
 def perform_complete_match(
     jd_text: str, 
     resume_text: str, 
     jd_filename: str, 
     resume_filename: str,
     embeddings: BedrockEmbeddings,
-    model: ChatBedrock
+    model: ChatBedrock,
+    stage_timeouts: Optional[Dict[str, float]] = None,
+    embedder: Optional[BatchEmbedder] = None
 ) -> Dict[str, Any]:
-    """Perform complete matching analysis combining embeddings and LLM."""
-    # Calculate similarity using embeddings
-    similarity_score = calculate_similarity_score(jd_text, resume_text, embeddings)
-    
-    # Get detailed analysis from LLM
-    llm_analysis = analyze_match_with_llm(jd_text, resume_text, model)
-    
-    # Combine results
+    """
+    Perform complete matching analysis combining embeddings and LLM, the two stages running concurrently in
+    worker threads. Same stage timeouts and partial results as aperform_complete_match, except that a timed-out
+    stage cannot be stopped: it keeps its thread until it returns.
+    """
+    stage_timeouts = {**DEFAULT_STAGE_TIMEOUTS, **(stage_timeouts or {})}
+    embedder = embedder or BatchEmbedder(embeddings)
+
+    start = time.perf_counter()
+    embedding_future = _stage_executor.submit(embedder.embed_texts, [jd_text, resume_text])
+    llm_analysis_future = _stage_executor.submit(model.invoke, build_match_prompt(jd_text, resume_text))
+    embedding_stage = wait_match_stage("embedding", embedding_future, start, stage_timeouts["embedding"])
+    llm_analysis_stage = wait_match_stage("llm_analysis", llm_analysis_future, start, stage_timeouts["llm_analysis"])
+
+    return build_match_result(embedding_stage, llm_analysis_stage, jd_filename, resume_filename)
+
+
+def wait_match_stage(name: str, future: Future, start: float, timeout: Optional[float]) -> Dict[str, Any]:
+    """Sync version of run_match_stage, waiting for a stage started at `start` in a worker thread."""
+    try:
+        remaining = None if timeout is None else max(0.0, start + timeout - time.perf_counter())
+        result = future.result(timeout=remaining)
+        error = None
+    except TimeoutError:
+        future.cancel()
+        result = None
+        error = f"Timed out after {timeout}s"
+    except Exception as e:
+        result = None
+        error = str(e)
+
+    if error:
+        print(f"Error in match stage {name}: {error}")
+
+    return {
+        "name": name,
+        "result": result,
+        "error": error,
+        "duration_ms": round((time.perf_counter() - start) * 1000, 2)
+    }
+
+
+async def run_match_stage(name: str, coroutine: Awaitable[Any], timeout: Optional[float]) -> Dict[str, Any]:
+    """Run one stage of the match pipeline, recording its result, duration and error (if any)."""
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(coroutine, timeout=timeout)
+        error = None
+    except asyncio.TimeoutError:
+        result = None
+        error = f"Timed out after {timeout}s"
+    except Exception as e:
+        result = None
+        error = str(e)
+
+    if error:
+        print(f"Error in match stage {name}: {error}")
+
+    return {
+        "name": name,
+        "result": result,
+        "error": error,
+        "duration_ms": round((time.perf_counter() - start) * 1000, 2)
+    }
+
+
+async def aperform_complete_match(
+    jd_text: str,
+    resume_text: str,
+    jd_filename: str,
+    resume_filename: str,
+    embeddings: BedrockEmbeddings,
+    model: ChatBedrock,
+    stage_timeouts: Optional[Dict[str, float]] = None,
+    embedder: Optional[BatchEmbedder] = None
+) -> Dict[str, Any]:
+    """
+    Perform complete matching analysis, running the embeddings and the LLM analysis concurrently.
+    Each stage has its own timeout. A stage that fails or times out leaves a partial result
+    instead of failing the whole match.
+    JD and resume are embedded in one batch. Pass a shared embedder to also batch across concurrent requests.
+    """
+    stage_timeouts = {**DEFAULT_STAGE_TIMEOUTS, **(stage_timeouts or {})}
+    embedder = embedder or BatchEmbedder(embeddings)
+
+    embedding_stage, llm_analysis_stage = await asyncio.gather(
+        run_match_stage("embedding", embedder.aembed_texts([jd_text, resume_text]), stage_timeouts["embedding"]),
+        run_match_stage(
+            "llm_analysis",
+            model.ainvoke(build_match_prompt(jd_text, resume_text)),
+            stage_timeouts["llm_analysis"]
+        ),
+    )
+
+    return build_match_result(embedding_stage, llm_analysis_stage, jd_filename, resume_filename)
+
+
+def build_match_result(
+    embedding_stage: Dict[str, Any],
+    llm_analysis_stage: Dict[str, Any],
+    jd_filename: str,
+    resume_filename: str
+) -> Dict[str, Any]:
+    """Match result of the embedding and LLM analysis stages, partial when a stage failed."""
+    stages = [embedding_stage, llm_analysis_stage]
+
+    similarity_score = None
+    if embedding_stage["result"] is not None:
+        jd_embedding, resume_embedding = embedding_stage["result"]
+        similarity = cosine_similarities(jd_embedding, resume_embedding)[0]
+        similarity_score = float(similarity * 100)
+
+    if llm_analysis_stage["error"]:
+        llm_analysis = failed_llm_analysis(llm_analysis_stage["error"])
+    else:
+        try:
+            llm_analysis = parse_llm_analysis(llm_analysis_stage["result"].content)
+        except Exception as e:
+            print(f"Error in LLM analysis: {e}")
+            llm_analysis = failed_llm_analysis(e)
+            llm_analysis_stage["error"] = str(e)
+
+    result = combine_match_results(similarity_score, llm_analysis, jd_filename, resume_filename)
+    result["timings_ms"] = {stage["name"]: stage["duration_ms"] for stage in stages}
+    result["failed_stages"] = {stage["name"]: stage["error"] for stage in stages if stage["error"]}
+    result["is_partial"] = bool(result["failed_stages"])
+
+    return result
+
+
+def combine_match_results(
+    similarity_score: Optional[float],
+    llm_analysis: Dict[str, Any],
+    jd_filename: str,
+    resume_filename: str
+) -> Dict[str, Any]:
+    """Combine embedding similarity and LLM analysis into the match result."""
+    final_match_percentage = max(similarity_score or 0.0, llm_analysis.get("match_percentage", 0))
     result = {
         "embedding_similarity": similarity_score,
         "llm_analysis": llm_analysis,
-        "final_match_percentage": max(similarity_score, llm_analysis.get("match_percentage", 0)),
-        "is_qualified": max(similarity_score, llm_analysis.get("match_percentage", 0)) >= 50.0,
+        "final_match_percentage": final_match_percentage,
+        "is_qualified": final_match_percentage >= 50.0,
         "jd_filename": jd_filename,
         "resume_filename": resume_filename
     }
     
     return result
+
+
+async def arank_resumes(
+    jd_text: str,
+    resumes: List[Tuple[str, str]],
+    embedder: BatchEmbedder,
+    model: ChatBedrock,
+    top_k: int = 10,
+    analyze_top_k: bool = False,
+    stage_timeouts: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """
+    Rank resumes against one JD.
+    Resumes are embedded in batches and scored with one vectorized cosine similarity over all of them.
+    With analyze_top_k, only the top-k resumes are sent to the LLM analysis.
+
+    Args:
+        resumes: List of (resume name, resume text)
+    """
+    stage_timeouts = {**DEFAULT_STAGE_TIMEOUTS, **(stage_timeouts or {})}
+    timings = {}
+
+    start = time.perf_counter()
+    vectors = await embedder.aembed_texts([jd_text] + [text for _, text in resumes])
+    similarities = cosine_similarities(vectors[0], vectors[1:]) * 100
+    top_indices = np.argsort(-similarities, kind="stable")[:top_k]
+    timings["embedding"] = round((time.perf_counter() - start) * 1000, 2)
+
+    ranking = [
+        {
+            "rank": rank + 1,
+            "resume": resumes[i][0],
+            "embedding_similarity": float(similarities[i]),
+        }
+        for rank, i in enumerate(top_indices)
+    ]
+
+    failed_stages = {}
+    if analyze_top_k and ranking:
+        llm_stages = await asyncio.gather(*[
+            run_match_stage(
+                f"llm_analysis:{resumes[i][0]}",
+                model.ainvoke(build_match_prompt(jd_text, resumes[i][1])),
+                stage_timeouts["llm_analysis"]
+            )
+            for i in top_indices
+        ])
+        for item, stage in zip(ranking, llm_stages):
+            if stage["error"]:
+                item["llm_analysis"] = failed_llm_analysis(stage["error"])
+                failed_stages[stage["name"]] = stage["error"]
+            else:
+                try:
+                    item["llm_analysis"] = parse_llm_analysis(stage["result"].content)
+                except Exception as e:
+                    item["llm_analysis"] = failed_llm_analysis(e)
+                    failed_stages[stage["name"]] = str(e)
+        timings["llm_analysis"] = max(stage["duration_ms"] for stage in llm_stages)
+
+    return {
+        "total_resumes": len(resumes),
+        "top_k": len(ranking),
+        "ranking": ranking,
+        "timings_ms": timings,
+        "failed_stages": failed_stages,
+        "is_partial": bool(failed_stages)
+    }
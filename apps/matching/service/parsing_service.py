@@ -0,0 +1,133 @@
+"""
+Parsing Service
+Runs CPU-bound PDF parsing in a process pool so it does not block the event loop
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+from .pdf_service import extract_text_from_pdf
+
+
+class ParserBusyError(RuntimeError):
+    """Raised when the parsing queue is full."""
+
+
+class PDFParsingExecutor:
+    """
+    Pool of worker processes extracting text from PDFs, so parsing scales across cores.
+
+    At most `max_workers + max_pending` PDFs are accepted at once, further submissions
+    fail with ParserBusyError. Each PDF must be parsed within `timeout_seconds` (TimeoutError, the pool
+    being recycled to stop its worker), and PDFs with more than `max_pages` pages are rejected (ValueError).
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: int = 32,
+        timeout_seconds: float = 30.0,
+        max_pages: Optional[int] = 50
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self.max_pages = max_pages
+        self._slots = threading.BoundedSemaphore(self.max_workers + max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def _reset_executor(self, executor: ProcessPoolExecutor, terminate: bool = False) -> None:
+        # A worker died (e.g. killed for memory), the pool cannot be used anymore
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        if terminate:
+            # A running task cannot be cancelled, its worker is stopped instead. The other tasks running
+            # in the pool fail with BrokenProcessPool
+            for process in list((executor._processes or {}).values()):
+                process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, file_content: bytes) -> Future:
+        """Submit a PDF to the pool. Its queue slot is freed when parsing completes."""
+        return self._submit(file_content)[0]
+
+    def _submit(self, file_content: bytes) -> Tuple[Future, ProcessPoolExecutor]:
+        if not self._slots.acquire(blocking=False):
+            raise ParserBusyError("PDF parsing queue is full, try again later")
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(extract_text_from_pdf, file_content, self.max_pages)
+        except Exception as e:
+            self._slots.release()
+            if isinstance(e, BrokenProcessPool):
+                self._reset_executor(executor)
+            raise
+
+        with self._lock:
+            self.pending += 1
+        future.add_done_callback(lambda done: self._on_done(done, executor))
+        return future, executor
+
+    def _cancel(self, future: Future, executor: ProcessPoolExecutor) -> None:
+        """Cancel a timed-out PDF, recycling the pool when it is already being parsed so its worker and slot are freed."""
+        if not future.cancel():
+            self._reset_executor(executor, terminate=True)
+
+    def _on_done(self, future: Future, executor: ProcessPoolExecutor) -> None:
+        self._slots.release()
+        error = None if future.cancelled() else future.exception()
+        with self._lock:
+            self.pending -= 1
+            if error is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+        if isinstance(error, BrokenProcessPool):
+            self._reset_executor(executor)
+
+    def extract_text(self, file_content: bytes) -> str:
+        """Extract the text of a PDF in the pool."""
+        future, executor = self._submit(file_content)
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except TimeoutError:
+            self._cancel(future, executor)
+            raise TimeoutError(f"PDF parsing timed out after {self.timeout_seconds}s")
+
+    async def aextract_text(self, file_content: bytes) -> str:
+        """Async version of extract_text()."""
+        future, executor = self._submit(file_content)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self._cancel(future, executor)
+            raise TimeoutError(f"PDF parsing timed out after {self.timeout_seconds}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -2,21 +2,17 @@
 PDF Service
 Handles PDF text extraction functionality
 """
-import os
-import tempfile
-from langchain.document_loaders import PyPDFLoader
+from typing import Optional
+from langchain_community.document_loaders.parsers.pdf import PyPDFParser
+from langchain_core.documents.base import Blob
 
 
-def extract_text_from_pdf(file_content: bytes) -> str:
-    """Extract text content from PDF file."""
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-        tmp_file.write(file_content)
-        tmp_pdf_path = tmp_file.name
-    
-    try:
-        loader = PyPDFLoader(tmp_pdf_path)
-        docs = loader.load()
-        text_content = "\n".join([doc.page_content for doc in docs])
-        return text_content
-    finally:
-        os.unlink(tmp_pdf_path)
+def extract_text_from_pdf(file_content: bytes, max_pages: Optional[int] = None) -> str:
+    """Extract text content from PDF file. Raises ValueError if it has more than max_pages pages."""
+    blob = Blob.from_data(file_content, mime_type="application/pdf")
+    pages = []
+    for doc in PyPDFParser().lazy_parse(blob):
+        if max_pages is not None and len(pages) >= max_pages:
+            raise ValueError(f"PDF has more than {max_pages} pages")
+        pages.append(doc.page_content)
+    return "\n".join(pages)
@@ -0,0 +1,48 @@
+"""
+Storage Service
+Handles downloading documents from MinIO/S3
+"""
+import os
+from typing import Tuple
+import boto3
+from botocore.client import Config
+
+
+def create_s3_client():
+    """Create and return an S3 client for MinIO configured from environment variables."""
+    use_ssl = os.getenv("MINIO_USE_SSL", "true").lower() in ("true", "1", "yes", "on")
+    return boto3.client(
+        "s3",
+        endpoint_url=os.getenv("MINIO_ENDPOINT_URL"),
+        aws_access_key_id=os.getenv("MINIO_ACCESS_KEY"),
+        aws_secret_access_key=os.getenv("MINIO_SECRET_KEY"),
+        region_name=os.getenv("MINIO_REGION_NAME", "us-east-1"),
+        config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+        use_ssl=use_ssl,
+        verify=False  # NOTE: Set to True in production with proper SSL certificates
+    )
+
+
+def parse_s3_uri(s3_uri: str) -> Tuple[str, str]:
+    """Split an S3 URI (s3://bucket/path/file.pdf) into bucket and key."""
+    if not s3_uri.startswith("s3://"):
+        raise ValueError("URI must start with 's3://'")
+
+    bucket, _, key = s3_uri[5:].partition("/")
+    if not bucket or not key:
+        raise ValueError(f"Invalid S3 URI: {s3_uri}")
+    return bucket, key
+
+
+def download_s3_object(s3_client, s3_uri: str) -> bytes:
+    """Download the content of an S3 object."""
+    bucket, key = parse_s3_uri(s3_uri)
+    response = s3_client.get_object(Bucket=bucket, Key=key)
+    return response["Body"].read()
+
+
+def get_s3_object_etag(s3_client, s3_uri: str) -> str:
+    """Return the ETag of an S3 object without downloading it."""
+    bucket, key = parse_s3_uri(s3_uri)
+    response = s3_client.head_object(Bucket=bucket, Key=key)
+    return response["ETag"]
@@ -0,0 +1,116 @@
+"""
+Text Cache
+Cache of extracted document text keyed by content hash or S3 object version
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from .blob_store import RedisBlobStore, SQLiteBlobStore
+
+
+def content_key(file_content: bytes) -> str:
+    """Cache key of an uploaded document: the SHA-256 of its bytes."""
+    return "sha256:" + hashlib.sha256(file_content).hexdigest()
+
+
+def s3_object_key(bucket: str, key: str, etag: str) -> str:
+    """Cache key of an S3 object version: bucket, key and ETag."""
+    etag = etag.strip('"')
+    return f"s3:{bucket}/{key}@{etag}"
+
+
+class DocumentTextCache:
+    """
+    Extracted document text cache.
+
+    Lookups go to an in-process LRU holding at most `max_bytes` of text, then to the `blob_store`
+    tier, so texts parsed by one replica are reused by the others.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        redis_url: Optional[str] = None,
+        disk_path: Optional[str] = None,
+        ttl_seconds: Optional[int] = None
+    ):
+        self.max_bytes = max_bytes
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.store = self._create_store(redis_url, disk_path, ttl_seconds)
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def _create_store(self, redis_url: Optional[str], disk_path: Optional[str], ttl_seconds: Optional[int]):
+        if redis_url:
+            try:
+                return RedisBlobStore(redis_url, prefix="document_text:", ttl_seconds=ttl_seconds)
+            except Exception as e:
+                print(f"Text cache cannot use Redis at {redis_url}, falling back to disk: {e}")
+        if disk_path:
+            return SQLiteBlobStore(disk_path, table="document_texts")
+        return None
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached text, or None when it is not cached."""
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return text
+
+        if self.store is not None:
+            try:
+                value = self.store.get_many([key])[0]
+            except Exception as e:
+                print(f"Error reading text cache: {e}")
+                value = None
+            if value is not None:
+                text = value.decode("utf-8")
+                self.persistent_hits += 1
+                self._remember(key, text)
+                return text
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, text: str) -> None:
+        """Store text in both tiers."""
+        self._remember(key, text)
+
+        if self.store is not None:
+            try:
+                self.store.set_many({key: text.encode("utf-8")})
+            except Exception as e:
+                print(f"Error writing text cache: {e}")
+
+    def _remember(self, key: str, text: str) -> None:
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous.encode("utf-8"))
+            self._memory[key] = text
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted.encode("utf-8"))
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "persistent_store": type(self.store).__name__ if self.store is not None else None,
+        }
@@ -1,11 +1,26 @@
 import os
+import json
 import uuid
+import asyncio
 import logging
-import requests
-from fastapi import APIRouter, File, HTTPException, Request, UploadFile
+import httpx
+from functools import lru_cache
+from typing import Any, AsyncIterator, List, Optional
+from fastapi import APIRouter, BackgroundTasks, File, HTTPException, Request, UploadFile
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from utilities.checkpointer import ThreadConflictError, ainvoke_graph, aprepare_run, invoke_graph
+from utilities.job_queue import CANCELLED, QUEUED, JobQueue, JobQueueFullError, create_job_queue
 from utilities.minio_pdf_helper import MinIOPDFUploader
-from core.agents.orchestrator import Orchestrator
+from utilities.resume_index import ResumeIndex, create_resume_index
+from utilities.scoring_engine import get_scoring_engine
+from core.batch_evaluator import create_batch_evaluator, get_batch_checkpoint_store, list_resume_urls, make_batch_id
+from core.graph_registry import graph_registry
+from core.agents.resume_comparison_agent import SECTION_NAMES
+from common_modules.schemas.jd import JD
+from common_modules.schemas.resume_comparer import ResumeComparer
+from tools.document_loader import aload_document_content
 
 
 router = APIRouter()
@@ -15,30 +30,251 @@ router = APIRouter()
 class DocumentUrls(BaseModel):
     resume_url: str
     jd_url: str
+    # Evaluation thread, sending it again after a failure resumes the evaluation from its last completed node
+    thread_id: Optional[str] = None
 
 
-def get_graph_state(resume_uri: str, jd_uri: str) -> dict:
-    orchestrator = Orchestrator()
-    graph = orchestrator.orchestrate()
-    output = graph.invoke(input={"resume_path": resume_uri, "jd_path": jd_uri})
+class ResumeUrl(BaseModel):
+    resume_url: str
+
+
+class BatchEvaluationRequest(BaseModel):
+    jd_url: str
+    # Either a MinIO prefix (in resume_bucket, MINIO_BUCKET_NAME by default) or the resume urls
+    resume_prefix: Optional[str] = None
+    resume_bucket: Optional[str] = None
+    resume_urls: Optional[List[str]] = None
+    # Defaults to an id derived from the JD and the resumes, so that sending the same request again resumes the batch
+    batch_id: Optional[str] = None
+    max_concurrency: Optional[int] = None
+
+
+class ScoredPair(BaseModel):
+    jd: JD
+    resume_comparer: ResumeComparer
+
+
+class RescoreRequest(BaseModel):
+    pairs: List[ScoredPair]
+
+
+class CandidateQuery(BaseModel):
+    jd_url: str
+    top_k: int = 10
+
+
+@lru_cache(maxsize=1)
+def get_resume_index() -> ResumeIndex:
+    return create_resume_index()
+
+
+def get_graph_state(resume_uri: str, jd_uri: str, thread_id: Optional[str] = None) -> dict:
+    graph = graph_registry.get_graph()
+    output = invoke_graph(graph, {"resume_path": resume_uri, "jd_path": jd_uri}, thread_id=thread_id)
+
+    return output
+
+
+async def aget_graph_state(resume_uri: str, jd_uri: str, thread_id: Optional[str] = None) -> dict:
+    graph = graph_registry.get_graph()
+    output = await ainvoke_graph(graph, {"resume_path": resume_uri, "jd_path": jd_uri}, thread_id=thread_id)
 
     return output
 
 
+async def astream_graph_events(graph: Any, run: tuple) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Yield (event, data) as the graph nodes complete: the extractions, every section comparison
+    (as section_comparison_<section name>), the resume comparison and the evaluation.
+    `run` is the graph run prepared by aprepare_run; a thread that already completed yields a single "result" event.
+    """
+    run_input, config, output = run
+    if output is not None:
+        yield "result", output
+        return
+
+    async for update in graph.astream(run_input, config=config, stream_mode="updates"):
+        for node, output in update.items():
+            if node == "section_comparison":
+                # Batched comparisons complete every section at once
+                for section_idx, items in output["sections"].items():
+                    yield f"section_comparison_{SECTION_NAMES[section_idx]}", {"section": SECTION_NAMES[section_idx], "items": items}
+            elif node != "section_dispatch":
+                yield node, output
+
+
+async def aprepare_evaluation_run(resume_uri: str, jd_uri: str, thread_id: Optional[str] = None) -> tuple:
+    """Graph run of an evaluation as the thread `thread_id`, 409 when the thread evaluated other documents."""
+    try:
+        return await aprepare_run(graph_registry.get_graph(), {"resume_path": resume_uri, "jd_path": jd_uri}, thread_id)
+    except ThreadConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def send_to_chatbot(graph_state: dict) -> None:
+    chatbot_url = os.environ["CHATBOT_URL"]
+    async with httpx.AsyncClient() as client:
+        await client.post(chatbot_url, data=graph_state)
+
+
+async def run_evaluation_job(payload: dict) -> dict:
+    """Job handler evaluating a resume against a JD and sending the graph state to the chatbot."""
+    # Retries of the job resume its evaluation thread, or reuse its output when only sending it failed
+    graph_state = await aget_graph_state(payload["resume_url"], payload["jd_url"], thread_id=payload["thread_id"])
+    await send_to_chatbot(graph_state)
+
+    return jsonable_encoder({
+        "resume_url": payload["resume_url"],
+        "jd_url": payload["jd_url"],
+        "matching_points": graph_state.get("matching_points"),
+        "resume_comparer": graph_state.get("resume_comparer"),
+    })
+
+
+@lru_cache(maxsize=1)
+def get_job_queue() -> JobQueue:
+    job_queue = create_job_queue()
+    job_queue.register("evaluation", run_evaluation_job)
+    return job_queue
+
+
+async def submit_evaluation(resume_url: str, jd_url: str, thread_id: Optional[str] = None) -> dict:
+    if thread_id is not None:
+        # Reject a thread of other documents now rather than failing the job
+        await aprepare_evaluation_run(resume_url, jd_url, thread_id)
+    payload = {"resume_url": resume_url, "jd_url": jd_url, "thread_id": thread_id or str(uuid.uuid4())}
+    try:
+        job = await get_job_queue().submit("evaluation", payload)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return {"message": "Accepted", "job_id": job.job_id, "status": job.status, "thread_id": payload["thread_id"]}
+
+
+@router.get("/graph")
+async def get_graph_info() -> dict:
+    """
+    API to report the state of the shared graph, including how long it took to build and cache hit rates
+    """
+    return graph_registry.get_info()
+
+
+@router.post("/graph/reload")
+async def reload_graph() -> dict:
+    """
+    API to rebuild the shared graph, e.g. after configuration changes
+    """
+    try:
+        graph_registry.reload()
+        return graph_registry.get_info()
+    except Exception as e:
+        error_id = str(uuid.uuid4())
+        logging.error(f"[Error_id]: {error_id} {e}")
+        raise HTTPException(status_code=500, detail={"error_id": error_id})
+
+
 @router.post("/create_resume_evaluator")
 async def create_resume_evaluator(payload: DocumentUrls) -> dict:
     """
-    API to receive resume url and JD url
+    API to receive resume url and JD url. The evaluation runs as a job, poll GET /jobs/{job_id} for its result
     """
     try:
-        orchestrator = Orchestrator()
-        graph = orchestrator.orchestrate()
-        output = graph.invoke(input={"resume_path": payload.resume_url, "jd_path": payload.jd_url})
+        return await submit_evaluation(payload.resume_url, payload.jd_url, payload.thread_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_id = str(uuid.uuid4())
+        logging.error(f"[Error_id]: {error_id} {e}")
+        raise HTTPException(status_code=500, detail={"error_id": error_id})
 
-        chatbot_url = os.environ["CHATBOT_URL"]
-        requests.post(chatbot_url, data=output)
 
-        return {"message": "Successfully"}
+@router.post("/evaluate/stream")
+async def stream_resume_evaluation(payload: DocumentUrls) -> StreamingResponse:
+    """
+    API to evaluate a resume against a JD, streaming the result of every graph node as Server-Sent Events.
+    The stream ends with a "done" event, or an "error" event holding the error id. A thread that already completed
+    streams its state as a single "result" event
+    """
+    try:
+        graph = graph_registry.get_graph()
+        run = await aprepare_evaluation_run(payload.resume_url, payload.jd_url, payload.thread_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_id = str(uuid.uuid4())
+        logging.error(f"[Error_id]: {error_id} {e}")
+        raise HTTPException(status_code=500, detail={"error_id": error_id})
+
+    async def events():
+        try:
+            async for event, data in astream_graph_events(graph, run):
+                yield format_sse(event, data)
+            yield format_sse("done", {"message": "Successfully"})
+        except Exception as e:
+            error_id = str(uuid.uuid4())
+            logging.error(f"[Error_id]: {error_id} {e}")
+            yield format_sse("error", {"error_id": error_id})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the events
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/evaluate/batch")
+async def evaluate_batch(payload: BatchEvaluationRequest) -> StreamingResponse:
+    """
+    API to evaluate a folder or list of resumes against one JD, streaming a "result" Server-Sent Event per resume
+    as it completes and a final "ranking" event. Resumes evaluated by a previous run of the batch are skipped
+    """
+    if (payload.resume_prefix is None) == (payload.resume_urls is None):
+        raise HTTPException(status_code=400, detail="Either resume_prefix or resume_urls must be given")
+
+    async def events():
+        try:
+            if payload.resume_prefix is not None:
+                resume_urls = await asyncio.to_thread(list_resume_urls, payload.resume_prefix, payload.resume_bucket)
+                resume_source = f"{payload.resume_bucket or ''}/{payload.resume_prefix}"
+            else:
+                resume_urls = payload.resume_urls
+                resume_source = "\n".join(sorted(resume_urls))
+            batch_id = payload.batch_id or make_batch_id(payload.jd_url, resume_source)
+            yield format_sse("batch", {"batch_id": batch_id, "resumes": len(resume_urls)})
+
+            graph_registry.get_graph()
+            batch_evaluator = create_batch_evaluator(graph_registry.orchestrator, payload.max_concurrency)
+            async for result in batch_evaluator.arun(batch_id, payload.jd_url, resume_urls):
+                yield format_sse("result", result)
+
+            ranking = await asyncio.to_thread(get_batch_checkpoint_store().get_ranking, batch_id)
+            yield format_sse("ranking", {"batch_id": batch_id, "results": ranking})
+        except Exception as e:
+            error_id = str(uuid.uuid4())
+            logging.error(f"[Error_id]: {error_id} {e}")
+            yield format_sse("error", {"error_id": error_id})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/evaluate/batch/{batch_id}")
+async def get_batch_ranking(batch_id: str, top_k: Optional[int] = None) -> dict:
+    """
+    API to get the ranked results of a batch evaluated so far
+    """
+    try:
+        ranking = await asyncio.to_thread(get_batch_checkpoint_store().get_ranking, batch_id, top_k)
+
+        return {"batch_id": batch_id, "results": [result.model_dump() for result in ranking]}
     except Exception as e:
         error_id = str(uuid.uuid4())
         logging.error(f"[Error_id]: {error_id} {e}")
@@ -47,11 +283,12 @@ async def create_resume_evaluator(payload: DocumentUrls) -> dict:
 
 @router.post("/match")
 async def match_jd_resume(
+    background_tasks: BackgroundTasks,
     jd_file: UploadFile = File(..., description="Job Description PDF"),
     resume_file: UploadFile = File(..., description="Resume PDF")
 ):
     """
-    Match Job Description with Resume and return compatibility score.
+    Match Job Description with Resume. The evaluation runs as a job, poll GET /jobs/{job_id} for the compatibility score.
     """
     if not jd_file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="JD file must be a PDF")
@@ -76,9 +313,8 @@ async def match_jd_resume(
             secret_key=secret_key,
             bucket_name=os.environ["MINIO_RESUME_BUCKET_NAME"],
             use_ssl=use_ssl,
+            resume_index=get_resume_index(),
         )
-        resume_uri = resume_uploader.upload_fastapi_file(resume_file, object_name=f"{uuid.uuid4()}.pdf")
-
         jd_uploader = MinIOPDFUploader(
             endpoint_url=endpoint_url,
             region_name=region_name,
@@ -87,19 +323,209 @@ async def match_jd_resume(
             bucket_name=os.environ["MINIO_JD_BUCKET_NAME"],
             use_ssl=use_ssl,
         )
-        jd_uri = jd_uploader.upload_fastapi_file(jd_file, object_name=f"{uuid.uuid4()}.pdf")
+        resume_uri, jd_uri = await asyncio.gather(
+            # Indexing the resume (parsing and embedding) is best effort, it runs after the response is sent
+            resume_uploader.aupload_fastapi_file(
+                resume_file, object_name=f"{uuid.uuid4()}.pdf", background_tasks=background_tasks
+            ),
+            jd_uploader.aupload_fastapi_file(jd_file, object_name=f"{uuid.uuid4()}.pdf"),
+        )
 
         # TODO: Store document urls to DB
 
-        # Get graph state from resume_uri and jd_uri generated by minIO
-        graph_state = get_graph_state(resume_uri, jd_uri)
+        # Evaluate resume_uri and jd_uri generated by minIO in a job, which sends the graph state to the chatbot
+        return await submit_evaluation(resume_uri, jd_uri)
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_id = str(uuid.uuid4())
+        logging.error(f"[Error_id]: {error_id} {e}")
+        raise HTTPException(status_code=500, detail={"error_id": error_id})
+
+
+@router.get("/jobs")
+async def get_jobs_info() -> dict:
+    """
+    API to report the workers of the job queue
+    """
+    return get_job_queue().get_stats()
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> dict:
+    """
+    API to get the status of a job, with its result once it succeeded
+    """
+    try:
+        job = await get_job_queue().get(job_id)
+    except Exception as e:
+        error_id = str(uuid.uuid4())
+        logging.error(f"[Error_id]: {error_id} {e}")
+        raise HTTPException(status_code=500, detail={"error_id": error_id})
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.model_dump()
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str) -> dict:
+    """
+    API to cancel a queued or running job
+    """
+    try:
+        job = await get_job_queue().cancel(job_id)
+    except Exception as e:
+        error_id = str(uuid.uuid4())
+        logging.error(f"[Error_id]: {error_id} {e}")
+        raise HTTPException(status_code=500, detail={"error_id": error_id})
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != CANCELLED:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    return {"message": "Cancelled", "job_id": job.job_id, "status": job.status}
 
-        # Send state to chatbot endpoint
-        chatbot_url = os.environ["CHATBOT_URL"]
-        requests.post(chatbot_url, data=graph_state)
+
+@router.post("/jobs/{job_id}/retry")
+async def retry_job(job_id: str) -> dict:
+    """
+    API to run a failed or cancelled job again
+    """
+    try:
+        job = await get_job_queue().retry(job_id)
+    except Exception as e:
+        error_id = str(uuid.uuid4())
+        logging.error(f"[Error_id]: {error_id} {e}")
+        raise HTTPException(status_code=500, detail={"error_id": error_id})
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != QUEUED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return {"message": "Accepted", "job_id": job.job_id, "status": job.status}
+
+
+@router.post("/scoring/rescore")
+async def rescore(payload: RescoreRequest) -> dict:
+    """
+    API to compute the matching points of stored comparisons under the current scoring weights
+    """
+    try:
+        engine = get_scoring_engine()
+        pairs = [(pair.jd, pair.resume_comparer) for pair in payload.pairs]
+        matching_points = await asyncio.to_thread(engine.score, pairs)
+
+        return {"weights": engine.weights.model_dump(), "matching_points": matching_points}
+    except Exception as e:
+        error_id = str(uuid.uuid4())
+        logging.error(f"[Error_id]: {error_id} {e}")
+        raise HTTPException(status_code=500, detail={"error_id": error_id})
+
+
+@router.post("/scoring/weights/reload")
+async def reload_scoring_weights() -> dict:
+    """
+    API to load changed scoring weights from SCORING_WEIGHTS_PATH or the scoring_weights table
+    """
+    try:
+        get_scoring_engine.cache_clear()
+        engine = await asyncio.to_thread(get_scoring_engine)
+
+        return {"weights": engine.weights.model_dump()}
+    except Exception as e:
+        error_id = str(uuid.uuid4())
+        logging.error(f"[Error_id]: {error_id} {e}")
+        raise HTTPException(status_code=500, detail={"error_id": error_id})
+
+
+@router.post("/candidates")
+async def find_candidates(payload: CandidateQuery) -> dict:
+    """
+    API to find the indexed resumes that best match a JD, without re-reading the resume PDFs
+    """
+    try:
+        jd_content = await aload_document_content(payload.jd_url)
+        candidates = await asyncio.to_thread(get_resume_index().query, jd_content, payload.top_k)
+
+        return {"jd_url": payload.jd_url, "candidates": candidates}
+    except Exception as e:
+        error_id = str(uuid.uuid4())
+        logging.error(f"[Error_id]: {error_id} {e}")
+        raise HTTPException(status_code=500, detail={"error_id": error_id})
+
+
+@router.post("/resume_index")
+async def index_resume(payload: ResumeUrl) -> dict:
+    """
+    API to add or refresh a resume already stored in MinIO in the resume index
+    """
+    try:
+        resume_content = await aload_document_content(payload.resume_url)
+        await asyncio.to_thread(get_resume_index().upsert, payload.resume_url, resume_content)
+
+        return {"message": "Successfully"}
+    except Exception as e:
+        error_id = str(uuid.uuid4())
+        logging.error(f"[Error_id]: {error_id} {e}")
+        raise HTTPException(status_code=500, detail={"error_id": error_id})
+
+
+@router.delete("/resume_index")
+async def delete_indexed_resume(payload: ResumeUrl) -> dict:
+    """
+    API to remove a resume from the resume index
+    """
+    try:
+        await asyncio.to_thread(get_resume_index().delete, payload.resume_url)
 
         return {"message": "Successfully"}
     except Exception as e:
         error_id = str(uuid.uuid4())
         logging.error(f"[Error_id]: {error_id} {e}")
         raise HTTPException(status_code=500, detail={"error_id": error_id})
+
+
+@router.post("/resume_extractions/lookup")
+async def lookup_resume_extractions(payload: ResumeUrl) -> dict:
+    """
+    API to get the stored extractions of a resume, for every prompt version and model
+    """
+    try:
+        resume_content = await aload_document_content(payload.resume_url)
+        graph_registry.get_graph()
+        entries = await asyncio.to_thread(graph_registry.orchestrator.resume_store.lookup, resume_content)
+
+        return {
+            "resume_url": payload.resume_url,
+            "extractions": [
+                {
+                    "content_hash": entry.content_hash,
+                    "prompt_version": entry.prompt_version,
+                    "model_name": entry.model_name,
+                    "resume": entry.value.model_dump(),
+                }
+                for entry in entries
+            ],
+        }
+    except Exception as e:
+        error_id = str(uuid.uuid4())
+        logging.error(f"[Error_id]: {error_id} {e}")
+        raise HTTPException(status_code=500, detail={"error_id": error_id})
+
+
+@router.delete("/resume_extractions")
+async def invalidate_resume_extractions(payload: ResumeUrl) -> dict:
+    """
+    API to remove the stored extractions of a resume, so that its next evaluation extracts it again
+    """
+    try:
+        resume_content = await aload_document_content(payload.resume_url)
+        graph_registry.get_graph()
+        deleted = await asyncio.to_thread(graph_registry.orchestrator.resume_store.invalidate, resume_content)
+
+        return {"message": "Successfully", "deleted": deleted}
+    except Exception as e:
+        error_id = str(uuid.uuid4())
+        logging.error(f"[Error_id]: {error_id} {e}")
+        raise HTTPException(status_code=500, detail={"error_id": error_id})
@@ -0,0 +1,58 @@
+"""
+Evaluate a folder of resumes against one JD, e.g.
+
+    python batch_main.py --jd s3://jds/jd5.pdf --prefix 2025/ --bucket resumes --concurrency 8
+
+Results are checkpointed in Postgres when POSTGRES_HOST is set, else in the SQLite file BATCH_CHECKPOINT_PATH:
+running the same command again after a crash only evaluates the remaining resumes.
+"""
+import argparse
+import asyncio
+from dotenv import load_dotenv
+from core.agents.orchestrator import Orchestrator
+from core.batch_evaluator import create_batch_evaluator, get_batch_checkpoint_store, list_resume_urls, make_batch_id
+
+
+load_dotenv()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Batch resume evaluation against one JD")
+    parser.add_argument("--jd", required=True, help="JD URI or local path")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--prefix", help="MinIO prefix of the resume PDFs")
+    source.add_argument("--resumes", nargs="+", help="Resume URIs or local paths")
+    parser.add_argument("--bucket", help="MinIO bucket of the resumes, MINIO_BUCKET_NAME by default")
+    parser.add_argument("--batch-id", help="Batch to resume, derived from the JD and the resumes by default")
+    parser.add_argument("--concurrency", type=int, help="Resumes evaluated at a time, BATCH_MAX_CONCURRENCY by default")
+    parser.add_argument("--top-k", type=int, default=20, help="Rows of the final ranking")
+    return parser.parse_args()
+
+
+async def main() -> None:
+    args = parse_args()
+    if args.prefix is not None:
+        resume_urls = list_resume_urls(args.prefix, args.bucket)
+        resume_source = f"{args.bucket or ''}/{args.prefix}"
+    else:
+        resume_urls = args.resumes
+        resume_source = "\n".join(sorted(resume_urls))
+    batch_id = args.batch_id or make_batch_id(args.jd, resume_source)
+    print(f"Batch {batch_id}: {len(resume_urls)} resumes")
+
+    orchestrator = Orchestrator()
+    orchestrator.orchestrate()
+    batch_evaluator = create_batch_evaluator(orchestrator, args.concurrency)
+
+    async for result in batch_evaluator.arun(batch_id, args.jd, resume_urls):
+        points = f"{result.matching_points:.4f}" if result.matching_points is not None else result.error
+        print(f"{result.status:<10} {points:<10} {result.resume_url}")
+
+    print(f"\nTop {args.top_k} of batch {batch_id}:")
+    for rank, result in enumerate(get_batch_checkpoint_store().get_ranking(batch_id, args.top_k), start=1):
+        points = f"{result.matching_points:.4f}" if result.matching_points is not None else "-"
+        print(f"{rank:>4} {points:<10} {result.status:<10} {result.resume_url}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+Compare latency, graph super-steps, LLM calls and token counts of the comparison modes ("fan_out" and "batched").
+
+Resume and JD are extracted once, then the comparison subgraph of each mode runs on them
+without the comparison cache. The rate limiter of the orchestrator applies, as in production.
+COMPARISON_SECTIONS and COMPARISON_MAX_CONCURRENCY configure the fan-out as in the service.
+
+Usage: python benchmark_comparison.py [resume_path] [jd_path] [--runs N]
+"""
+import argparse
+import os
+import statistics
+import time
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler, UsageMetadataCallbackHandler
+from core.agents.orchestrator import Orchestrator
+from core.agents.jd_extraction_agent import JDExtractionAgent
+from core.agents.resume_comparison_agent import ResumeComparisonAgent
+from core.agents.resume_extraction_agent import ResumeExtractionAgent
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    def __init__(self):
+        self.calls = 0
+
+    def on_llm_start(self, *args, **kwargs) -> None:
+        self.calls += 1
+
+    def on_chat_model_start(self, *args, **kwargs) -> None:
+        self.calls += 1
+
+
+def benchmark(orchestrator: Orchestrator, mode: str, resume, jd, runs: int) -> dict:
+    orchestrator.comparison_mode = mode
+    agent = ResumeComparisonAgent("resume_comparison_agent", orchestrator.llm, orchestrator.tools)
+    subgraph = orchestrator.build_comparison_subgraph(agent)
+
+    latencies, steps, calls, input_tokens, output_tokens = [], [], [], [], []
+    for _ in range(runs):
+        usage, counter = UsageMetadataCallbackHandler(), LLMCallCounter()
+        config = {**orchestrator.get_comparison_config(), "callbacks": [usage, counter]}
+        start = time.perf_counter()
+        # Debug events carry the super-step of every task
+        task_steps = {
+            event["step"]
+            for event in subgraph.stream({"resume": resume, "jd": jd}, config=config, stream_mode="debug")
+            if event["type"] == "task"
+        }
+        latencies.append(time.perf_counter() - start)
+        steps.append(len(task_steps))
+        calls.append(counter.calls)
+        input_tokens.append(sum(u.get("input_tokens", 0) for u in usage.usage_metadata.values()))
+        output_tokens.append(sum(u.get("output_tokens", 0) for u in usage.usage_metadata.values()))
+
+    return {
+        "mode": mode,
+        "latency_mean_s": statistics.mean(latencies),
+        "latency_max_s": max(latencies),
+        "steps": statistics.mean(steps),
+        "llm_calls": statistics.mean(calls),
+        "input_tokens": statistics.mean(input_tokens),
+        "output_tokens": statistics.mean(output_tokens),
+    }
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    base_dir = os.path.dirname(__file__)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("resume_path", nargs="?", default=os.path.join(base_dir, "test_samples/resumes/cv1.pdf"))
+    parser.add_argument("jd_path", nargs="?", default=os.path.join(base_dir, "test_samples/jds/jd5.pdf"))
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    orchestrator = Orchestrator()
+    state = {"resume_path": args.resume_path, "jd_path": args.jd_path}
+    resume = ResumeExtractionAgent("resume_extraction_agent", orchestrator.llm, orchestrator.tools).extract_resume(state)["resume"]
+    jd = JDExtractionAgent("jd_extraction_agent", orchestrator.llm, orchestrator.tools).extract_jd(state)["jd"]
+
+    print(f"{'mode':<10}{'latency mean (s)':>18}{'latency max (s)':>17}{'steps':>7}{'LLM calls':>11}{'input tokens':>14}{'output tokens':>15}")
+    for mode in ("fan_out", "batched"):
+        result = benchmark(orchestrator, mode, resume, jd, args.runs)
+        print(
+            f"{result['mode']:<10}{result['latency_mean_s']:>18.2f}{result['latency_max_s']:>17.2f}{result['steps']:>7.0f}"
+            f"{result['llm_calls']:>11.1f}{result['input_tokens']:>14.0f}{result['output_tokens']:>15.0f}"
+        )
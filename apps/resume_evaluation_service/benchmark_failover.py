@@ -0,0 +1,106 @@
+"""
+Compare the latency percentiles of a single provider with failover and hedged requests, on local fake chat models.
+
+Each fake provider answers in `--fast` seconds, except for a `--slow-rate` fraction of the calls that take
+`--slow` seconds, or fail with `--error-rate`. No API key is needed.
+
+Usage: python benchmark_failover.py [--requests N] [--hedge-after S] [--timeout S]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from common_modules.factories.failover_llm import FailoverLLM
+
+
+class FakeLatencyChatModel(BaseChatModel):
+    """Local chat model with a bimodal latency and an error rate."""
+
+    name: str = "fake"
+    fast: float = 0.05
+    slow: float = 2.0
+    slow_rate: float = 0.05
+    error_rate: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-latency"
+
+    def _next(self) -> float:
+        if random.random() < self.error_rate:
+            raise RuntimeError(f"{self.name} is throttled")
+        return self.slow if random.random() < self.slow_rate else self.fast
+
+    def _result(self) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.name))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._next())
+        return self._result()
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self._next())
+        return self._result()
+
+
+async def measure(llm, requests: int, concurrency: int = 20) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def call():
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await llm.ainvoke("Hello")
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                failures += 1
+
+    await asyncio.gather(*(call() for _ in range(requests)))
+    latencies.sort()
+    return {
+        "p50_s": statistics.median(latencies),
+        "p99_s": latencies[int(0.99 * (len(latencies) - 1))],
+        "failures": failures,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--fast", type=float, default=0.05)
+    parser.add_argument("--slow", type=float, default=2.0)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--hedge-after", type=float, default=0.2)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    args = parser.parse_args()
+
+    def fake(name: str) -> FakeLatencyChatModel:
+        return FakeLatencyChatModel(
+            name=name, fast=args.fast, slow=args.slow, slow_rate=args.slow_rate, error_rate=args.error_rate
+        )
+
+    setups = {
+        "single": fake("primary"),
+        "failover": FailoverLLM([("primary", fake("primary")), ("backup", fake("backup"))], timeout_seconds=args.timeout),
+        "hedged": FailoverLLM(
+            [("primary", fake("primary")), ("backup", fake("backup"))],
+            timeout_seconds=args.timeout,
+            hedge_after_seconds=args.hedge_after,
+        ),
+    }
+
+    print(f"{'setup':<10}{'p50 (s)':>10}{'p99 (s)':>10}{'failures':>10}")
+    for name, llm in setups.items():
+        result = asyncio.run(measure(llm, args.requests))
+        print(f"{name:<10}{result['p50_s']:>10.3f}{result['p99_s']:>10.3f}{result['failures']:>10}")
+        if isinstance(llm, FailoverLLM):
+            for provider, stats in llm.get_stats().items():
+                print(f"  {provider}: {stats['successes']} ok, {stats['errors']} errors, {stats['hedges']} hedges, p99 <= {stats['latency_p99_seconds']}s")
@@ -0,0 +1,84 @@
+"""
+Compare scoring random (JD, ResumeComparer) pairs one at a time with scoring them in one batch, and re-scoring
+the encoded batch under changed weights. Checks that the batch scores are identical to the one-at-a-time scores.
+
+Usage: python benchmark_scoring.py [--pairs N] [--seed S]
+"""
+import argparse
+import random
+import time
+from typing import List, Tuple
+from common_modules.schemas.backgrounds import Education, Experience
+from common_modules.schemas.jd import JD
+from common_modules.schemas.resume_comparer import ResumeComparer
+from utilities.scoring_engine import ScoringEngine, ScoringWeights
+
+
+def make_pairs(count: int, rng: random.Random) -> List[Tuple[JD, ResumeComparer]]:
+    experience = Experience(job_title="Engineer", company="Company", dates="2020 - 2023", summary="Development")
+    education = Education(degree="BSc", institution="University", field_of_study="Computer Science", summary="Graduated")
+
+    def flags() -> dict:
+        return {f"item_{i}": rng.choice([1, 0, -1]) for i in range(rng.randint(0, 15))}
+
+    return [
+        (
+            JD(
+                job_summary="Job",
+                required_hard_skills=["skill"] * rng.randint(0, 8),
+                optional_hard_skills=["skill"] * rng.randint(0, 5),
+                required_soft_skills=["skill"] * rng.randint(0, 4),
+                optional_soft_skills=["skill"] * rng.randint(0, 3),
+                required_work_experiences=[experience] * rng.randint(0, 3),
+                optional_work_experiences=[experience] * rng.randint(0, 2),
+                required_educations=[education] * rng.randint(0, 2),
+                optional_educations=[education] * rng.randint(0, 2),
+                required_years_of_experience=rng.randint(0, 8),
+            ),
+            ResumeComparer(
+                hard_skills=flags(),
+                soft_skills=flags(),
+                work_experiences=flags(),
+                educations=flags(),
+                years_of_experience=rng.randint(0, 15),
+            ),
+        )
+        for _ in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pairs", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pairs = make_pairs(args.pairs, random.Random(args.seed))
+    engine = ScoringEngine(ScoringWeights())
+
+    start = time.perf_counter()
+    single_scores = [engine.score_one(jd, resume_comparer) for jd, resume_comparer in pairs]
+    single_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoded = engine.encode(pairs)
+    encode_duration = time.perf_counter() - start
+    start = time.perf_counter()
+    batch_scores = engine.score_encoded(encoded)
+    score_duration = time.perf_counter() - start
+
+    reweighted = ScoringEngine(ScoringWeights(required_hard_skills=0.35, required_work_experiences=0.4))
+    start = time.perf_counter()
+    reweighted.score_encoded(encoded)
+    rescore_duration = time.perf_counter() - start
+
+    print(f"pairs:                 {args.pairs}")
+    print(f"one at a time:         {single_duration:.3f}s")
+    print(f"batch encode:          {encode_duration:.3f}s")
+    print(f"batch score:           {score_duration:.3f}s")
+    print(f"re-score (new weights): {rescore_duration:.3f}s")
+    print(f"identical scores:      {single_scores == batch_scores}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
-from typing import Callable
+import asyncio
+from typing import Callable, Optional
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 from common_modules.agents.base_agent import BaseAgent
-from core.agents.states import ResumeEvaluationGraphState
+from core.agents.states import EvaluationGraphInput, ResumeEvaluationGraphState
 from common_modules.schemas.jd import JD
-from tools.document_loader import docx_loader, pdf_loader, minio_pdf_loader
+from tools.document_loader import load_document_content, aload_document_content
+from utilities.extraction_store import ExtractionStore, get_model_name, get_prompt_version
 
 text_prompt = [
     (
@@ -41,10 +43,14 @@ Ignore: "Must be a fast learner" (generic, not a specific skill or qualification
     ),
 ]
 
+PROMPT_VERSION = get_prompt_version(text_prompt, JD)
+
 class JDExtractionAgent(BaseAgent):
-    def __init__(self, name: str, llm: BaseChatModel, tools: list[Callable]):
+    def __init__(self, name: str, llm: BaseChatModel, tools: list[Callable], store: Optional[ExtractionStore[JD]] = None):
         super().__init__(name, llm, tools)
         self.prompt = self.get_jd_extraction_prompt_template()
+        self.store = store
+        self.model_name = get_model_name(llm)
 
     def get_jd_extraction_prompt_template(self) -> ChatPromptTemplate:
         return ChatPromptTemplate(text_prompt)
@@ -73,29 +79,54 @@ class JDExtractionAgent(BaseAgent):
         #     ("human", "Please analyze the following JD: ```{jd_content}```"),
         # ])
 
-    def extract_jd(self, state: ResumeEvaluationGraphState) -> ResumeEvaluationGraphState:
+    def extract_jd(self, state: EvaluationGraphInput) -> ResumeEvaluationGraphState:
         try:
             jd_path = state["jd_path"]
+            if state.get("prefetched_jd") is not None and state.get("prefetched_jd_path") == jd_path:
+                # Extracted once by the caller, e.g. for a batch of resumes evaluated against the same JD
+                return {"jd": state["prefetched_jd"]}
+
+            self.logger.info(f"Processing JD: {jd_path}")
+            jd_content = load_document_content(jd_path)
 
-            # Check if it's an S3 URI
-            if jd_path.startswith("s3://"):
-                if jd_path.endswith(".pdf"):
-                    self.logger.info(f"Processing S3 URI: {jd_path}")
-                    jd_content = minio_pdf_loader.invoke(jd_path)
-            # Check if it's a local file
-            else:
-                if jd_path.endswith(".pdf"):
-                    self.logger.info(f"Processing local PDF: {jd_path}")
-                    jd_content = pdf_loader.invoke(jd_path)
-                elif jd_path.endswith(".docx"):
-                    self.logger.info(f"Processing local DOCX: {jd_path}")
-                    jd_content = docx_loader.invoke(jd_path)
+            jd = self.store.get(jd_content, PROMPT_VERSION, self.model_name) if self.store else None
+            if jd is not None:
+                self.logger.info(f"Reusing stored extraction of JD: {jd_path}")
+                return {"jd": jd}
 
             chain = self.prompt | self.llm.with_structured_output(JD)
             jd = chain.invoke({"jd_content": jd_content})
 
+            if self.store:
+                self.store.put(jd_content, PROMPT_VERSION, self.model_name, jd)
+            return {"jd": jd}
+        except Exception as ex:
+            error_message = f"Error while extracting JD: {ex}"
+            self.logger.error(error_message)
+            raise RuntimeError(error_message) from ex
+
+    async def aextract_jd(self, state: EvaluationGraphInput) -> ResumeEvaluationGraphState:
+        try:
+            jd_path = state["jd_path"]
+            if state.get("prefetched_jd") is not None and state.get("prefetched_jd_path") == jd_path:
+                # Extracted once by the caller, e.g. for a batch of resumes evaluated against the same JD
+                return {"jd": state["prefetched_jd"]}
+
+            self.logger.info(f"Processing JD: {jd_path}")
+            jd_content = await aload_document_content(jd_path)
+
+            jd = await asyncio.to_thread(self.store.get, jd_content, PROMPT_VERSION, self.model_name) if self.store else None
+            if jd is not None:
+                self.logger.info(f"Reusing stored extraction of JD: {jd_path}")
+                return {"jd": jd}
+
+            chain = self.prompt | self.llm.with_structured_output(JD)
+            jd = await chain.ainvoke({"jd_content": jd_content})
+
+            if self.store:
+                await asyncio.to_thread(self.store.put, jd_content, PROMPT_VERSION, self.model_name, jd)
             return {"jd": jd}
         except Exception as ex:
             error_message = f"Error while extracting JD: {ex}"
             self.logger.error(error_message)
-            raise error_message
\ No newline at end of file
+            raise RuntimeError(error_message) from ex
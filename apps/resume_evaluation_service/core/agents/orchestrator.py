@@ -1,76 +1,109 @@
+import json
 import os
 from logging import Logger
 from langgraph.graph.state import CompiledStateGraph, StateGraph, START, END
+from langgraph.types import Send
 from tools.resume_evaluator import resume_evaluator
-from core.agents.resume_comparison_agent import ResumeComparisonAgent
+from core.agents.resume_comparison_agent import SECTION_NAMES, ResumeComparisonAgent
 from core.agents.jd_extraction_agent import JDExtractionAgent
 from core.agents.resume_extraction_agent import ResumeExtractionAgent
-from core.agents.states import ComparerState, ResumeEvaluationGraphState
+from core.agents.states import ComparerState, EvaluationGraphInput, EvaluationGraphState, ResumeEvaluationGraphState
+from common_modules.caches.llm_response_cache import get_llm_response_cache
+from common_modules.factories.failover_llm import FailoverLLM
 from common_modules.factories.llm_factory import LLMFactory
+from common_modules.rate_limiters.llm_rate_limiter import get_rate_limiter
+from common_modules.schemas.jd import JD
+from common_modules.schemas.resume import Resume
 from tools.document_loader import docx_loader, pdf_loader, minio_pdf_loader, minio_pdf_loader_by_key, list_minio_pdfs
 from typing import Any
-from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_core.runnables import RunnableLambda
+from utilities.comparison_cache import SectionComparisonCache
+from utilities.extraction_store import create_extraction_store
+from utilities.pre_matcher import create_pre_matcher
+from utilities.checkpointer import get_checkpointer
 
 
 class Orchestrator:
     def __init__(self):
         LLM_MODEL = os.environ["GEMINI_MODEL"]
         LLM_API_KEY = os.environ["GEMINI_API_KEY"]
-        self.llm = LLMFactory.create_llm(
-            llm_provider=LLMFactory.Provider.GEMINI,
-            config=LLMFactory.Config(
-                model_name=LLM_MODEL,
-                api_key=LLM_API_KEY,
-                temperature=0.0,
-                top_p=1.0,
-                rate_limiter=InMemoryRateLimiter(
-                    requests_per_second=0.25,  # 1 yêu cầu mỗi 4 giây
-                    check_every_n_seconds=0.1,
-                    max_bucket_size=15
-                )
-            )
+        self.llm_cache = get_llm_response_cache()
+        llm_config = self.create_llm_config(
+            LLMFactory.Provider.GEMINI,
+            LLMFactory.Config(model_name=LLM_MODEL, api_key=LLM_API_KEY, temperature=0.0, top_p=1.0)
         )
+        # Providers tried after Gemini, e.g. [{"provider": "openai", "model_name": "gpt-4o-mini", "api_key_env": "OPENAI_API_KEY"}]
+        fallbacks = json.loads(os.getenv("LLM_FALLBACK_PROVIDERS") or "[]")
+        if fallbacks:
+            timeout_seconds = float(os.getenv("LLM_TIMEOUT_SECONDS", 0))
+            hedge_after_seconds = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", 0))
+            self.llm = LLMFactory.create_failover_llm(
+                [(LLMFactory.Provider.GEMINI, llm_config)] + [self.parse_fallback_provider(entry) for entry in fallbacks],
+                timeout_seconds=timeout_seconds or None,
+                hedge_after_seconds=hedge_after_seconds or None,
+            )
+        else:
+            self.llm = LLMFactory.get_llm(llm_provider=LLMFactory.Provider.GEMINI, config=llm_config)
         self.tools = [pdf_loader, docx_loader, minio_pdf_loader, minio_pdf_loader_by_key, list_minio_pdfs, resume_evaluator]
+        self.jd_store = create_extraction_store(JD, "jd_extractions")
+        self.resume_store = create_extraction_store(Resume, "resume_extractions")
+        self.comparison_cache = SectionComparisonCache(max_entries=int(os.getenv("COMPARISON_CACHE_MAX_ENTRIES", 10000)))
+        self.pre_matcher = create_pre_matcher()
+        # "fan_out": one LLM call per section, "batched": all sections in one LLM call
+        self.comparison_mode = os.getenv("COMPARISON_MODE", "fan_out")
+        # Section indices compared in the fan-out mode (see SECTION_NAMES), and how many run at once
+        self.comparison_sections = self.parse_comparison_sections(
+            os.getenv("COMPARISON_SECTIONS", ",".join(map(str, range(len(SECTION_NAMES)))))
+        )
+        self.comparison_max_concurrency = int(os.getenv("COMPARISON_MAX_CONCURRENCY", 0)) or None
+        # Checkpoints of the evaluation graph, so that failed evaluations resume mid-graph
+        self.checkpointer = get_checkpointer()
         self.logger = Logger("orchestrator")
 
+    def create_llm_config(self, provider: LLMFactory.Provider, config: LLMFactory.Config) -> LLMFactory.Config:
+        """Add the shared rate limiter of the provider and model, and the response cache, to a model config."""
+        return LLMFactory.Config(
+            **config,
+            # Shared by every orchestrator of the process and, with LLM_RATE_LIMITER_REDIS_URL, every replica
+            rate_limiter=get_rate_limiter(
+                provider.value,
+                config["model_name"],
+                requests_per_second=0.25,  # 1 yêu cầu mỗi 4 giây
+                max_bucket_size=15
+            ),
+            **({"cache": self.llm_cache} if self.llm_cache is not None else {})
+        )
+
+    def parse_fallback_provider(self, entry: dict) -> tuple[LLMFactory.Provider, LLMFactory.Config]:
+        """Provider and config of a LLM_FALLBACK_PROVIDERS entry. Keys ending in "_env" name the variables holding secrets."""
+        entry = dict(entry)
+        provider = LLMFactory.Provider(entry.pop("provider"))
+        for key in [key for key in entry if key.endswith("_env")]:
+            entry[key[:-len("_env")]] = os.environ[entry.pop(key)]
+        entry.setdefault("temperature", 0.0)
+        return provider, self.create_llm_config(provider, LLMFactory.Config(**entry))
+
+    def get_llm_stats(self) -> dict | None:
+        """Per-provider latency histograms and outcomes, when failover is configured."""
+        return self.llm.get_stats() if isinstance(self.llm, FailoverLLM) else None
+
+    @staticmethod
+    def parse_comparison_sections(value: str) -> list[int]:
+        sections = sorted({int(section_idx) for section_idx in value.split(",") if section_idx.strip()})
+        invalid = [section_idx for section_idx in sections if not 0 <= section_idx < len(SECTION_NAMES)]
+        if invalid:
+            raise ValueError(f"Unsupported comparison sections: {invalid}")
+        return sections
+
     def orchestrate(self) -> CompiledStateGraph[Any, Any, Any, Any]:
         try:
-            resume_extraction_agent = ResumeExtractionAgent("resume_extraction_agent", self.llm, self.tools)
-            jd_extraction_agent = JDExtractionAgent("jd_extraction_agent", self.llm, self.tools)
-            resume_comparison_agent = ResumeComparisonAgent("resume_comparison_agent", self.llm, self.tools)
-
-            # Subgraph
-            subgraph_builder = StateGraph(ComparerState)
-            subgraph_builder.add_node("increment_1", resume_comparison_agent.increase_section_idx)
-            subgraph_builder.add_node("increment_2", resume_comparison_agent.increase_section_idx)
-            subgraph_builder.add_node("increment_3", resume_comparison_agent.increase_section_idx)
-
-            subgraph_builder.add_node("section_comparison_1", resume_comparison_agent.compare_section)
-            subgraph_builder.add_node("section_comparison_2", resume_comparison_agent.compare_section)
-            subgraph_builder.add_node("section_comparison_3", resume_comparison_agent.compare_section)
-            subgraph_builder.add_node("section_comparison_4", resume_comparison_agent.compare_section)
-            subgraph_builder.add_node("resume_comparison", resume_comparison_agent.compare_resume)
-
-            subgraph_builder.add_edge(START, "section_comparison_1")
-            subgraph_builder.add_edge(START, "increment_1")
-            subgraph_builder.add_edge("increment_1", "increment_2")
-            subgraph_builder.add_edge("increment_2", "increment_3")
-            subgraph_builder.add_edge("increment_1", "section_comparison_2")
-            subgraph_builder.add_edge("increment_2", "section_comparison_3")
-            subgraph_builder.add_edge("increment_3", "section_comparison_4")
-            subgraph_builder.add_edge("section_comparison_1", "resume_comparison")
-            subgraph_builder.add_edge("section_comparison_2", "resume_comparison")
-            subgraph_builder.add_edge("section_comparison_3", "resume_comparison")
-            subgraph_builder.add_edge("section_comparison_4", "resume_comparison")
-            subgraph_builder.add_edge("resume_comparison", END)
-
-            subgraph = subgraph_builder.compile()
-
-            subgraph_node = lambda state: {
-                "resume_comparer": subgraph.invoke({
-                    "resume": state["resume"], "jd": state["jd"]
-                })["resume_comparer"]
-            }
+            resume_extraction_agent = ResumeExtractionAgent("resume_extraction_agent", self.llm, self.tools, store=self.resume_store)
+            jd_extraction_agent = JDExtractionAgent("jd_extraction_agent", self.llm, self.tools, store=self.jd_store)
+            # Kept to extract a JD once for batch evaluations
+            self.jd_extraction_agent = jd_extraction_agent
+            resume_comparison_agent = ResumeComparisonAgent(
+                "resume_comparison_agent", self.llm, self.tools, cache=self.comparison_cache, pre_matcher=self.pre_matcher
+            )
 
             resume_evaluator_node = lambda state: {
                 "matching_points": resume_evaluator.invoke({
@@ -78,27 +111,99 @@ class Orchestrator:
                 })
             }
 
-            # Main graph
-            maingraph_builder = StateGraph(ResumeEvaluationGraphState)
-            maingraph_builder.add_node("resume_extraction", resume_extraction_agent.extract_resume)
-            maingraph_builder.add_node("jd_extraction", jd_extraction_agent.extract_jd)
-            maingraph_builder.add_node("resume_comparison", subgraph_node)
+            # Main graph. The comparison nodes are mounted in it rather than run as a subgraph, so that resuming
+            # a failed evaluation keeps the section comparisons that completed (pending writes of the failed step)
+            maingraph_builder = StateGraph(
+                EvaluationGraphState, input_schema=EvaluationGraphInput, output_schema=ResumeEvaluationGraphState
+            )
+            maingraph_builder.add_node(
+                "resume_extraction",
+                RunnableLambda(resume_extraction_agent.extract_resume, afunc=resume_extraction_agent.aextract_resume)
+            )
+            maingraph_builder.add_node(
+                "jd_extraction",
+                RunnableLambda(jd_extraction_agent.extract_jd, afunc=jd_extraction_agent.aextract_jd)
+            )
+            self.add_comparison_nodes(maingraph_builder, resume_comparison_agent, ["resume_extraction", "jd_extraction"])
             maingraph_builder.add_node("resume_evaluation", resume_evaluator_node)
 
             maingraph_builder.add_edge(START, "resume_extraction")
             maingraph_builder.add_edge(START, "jd_extraction")
-            maingraph_builder.add_edge("resume_extraction", "resume_comparison")
-            maingraph_builder.add_edge("jd_extraction", "resume_comparison")
             maingraph_builder.add_edge("resume_comparison", "resume_evaluation")
             maingraph_builder.add_edge("resume_evaluation", END)
 
-            self.graph = maingraph_builder.compile()
+            self.graph = maingraph_builder.compile(checkpointer=self.checkpointer)
+            if self.comparison_max_concurrency:
+                # Bounds the parallel tasks of every step: the section comparisons, and the two extractions below 2
+                self.graph = self.graph.with_config(max_concurrency=self.comparison_max_concurrency)
 
             return self.graph
         except Exception as ex:
             self.logger.error(f"Error while building graph: {ex}")
             return None
 
+    def add_comparison_nodes(
+        self, builder: StateGraph, resume_comparison_agent: ResumeComparisonAgent, after: str | list[str]
+    ) -> None:
+        """Add the section comparison nodes, run after the node(s) `after`, ending with the "resume_comparison" node."""
+        if self.comparison_mode == "batched":
+            builder.add_node(
+                "section_comparison",
+                RunnableLambda(resume_comparison_agent.compare_sections, afunc=resume_comparison_agent.acompare_sections)
+            )
+            builder.add_node("resume_comparison", resume_comparison_agent.compare_resume)
+            builder.add_edge(after, "section_comparison")
+            builder.add_edge("section_comparison", "resume_comparison")
+            return
+
+        if self.comparison_mode != "fan_out":
+            raise ValueError(f"Unsupported comparison mode: {self.comparison_mode}")
+
+        # Nodes run the sync agent methods on graph.invoke and the async ones on graph.ainvoke
+        builder.add_node(
+            "section_comparison",
+            RunnableLambda(resume_comparison_agent.compare_section, afunc=resume_comparison_agent.acompare_section)
+        )
+        builder.add_node("resume_comparison", resume_comparison_agent.compare_resume)
+
+        # One section comparison per configured section, all dispatched in the same super-step;
+        # their results are merged by the `sections` reducer
+        def dispatch_sections(state: ComparerState) -> list[Send] | str:
+            if not self.comparison_sections:
+                return "resume_comparison"
+            return [
+                Send("section_comparison", {"resume": state["resume"], "jd": state["jd"], "current_section_idx": section_idx})
+                for section_idx in self.comparison_sections
+            ]
+
+        if after != START:
+            # Sends are dispatched from a single node, once all of `after` completed
+            builder.add_node("section_dispatch", lambda state: {})
+            builder.add_edge(after, "section_dispatch")
+            after = "section_dispatch"
+        builder.add_conditional_edges(after, dispatch_sections, ["section_comparison", "resume_comparison"])
+        builder.add_edge("section_comparison", "resume_comparison")
+
+    def build_comparison_subgraph(self, resume_comparison_agent: ResumeComparisonAgent) -> CompiledStateGraph[Any, Any, Any, Any]:
+        """The comparison nodes alone, e.g. to benchmark the comparison modes."""
+        subgraph_builder = StateGraph(ComparerState)
+        self.add_comparison_nodes(subgraph_builder, resume_comparison_agent, START)
+        subgraph_builder.add_edge("resume_comparison", END)
+        return subgraph_builder.compile()
+
+    def get_comparison_config(self) -> dict:
+        """Run config of build_comparison_subgraph, limiting the parallel section comparisons when configured."""
+        return {"max_concurrency": self.comparison_max_concurrency} if self.comparison_max_concurrency else {}
+
+    def get_cache_stats(self) -> dict:
+        return {
+            "jd_extraction": self.jd_store.get_stats(),
+            "resume_extraction": self.resume_store.get_stats(),
+            "section_comparison": self.comparison_cache.get_stats(),
+            "pre_matcher": self.pre_matcher.get_stats() if self.pre_matcher is not None else None,
+            "llm_response": self.llm_cache.get_stats() if self.llm_cache is not None else None,
+        }
+
     def export_graph(self, path: str) -> None:
         try:
             with open(path, "wb") as f:
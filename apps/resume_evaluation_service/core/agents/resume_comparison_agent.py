@@ -1,11 +1,15 @@
+import asyncio
 import json
 import re
-from typing import Callable
+from typing import Callable, Optional
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 from common_modules.agents.base_agent import BaseAgent
 from core.agents.states import ComparerState
-from common_modules.schemas.resume_comparer import ResumeComparer, SectionComparer
+from common_modules.schemas.resume_comparer import BatchedSectionComparer, ResumeComparer, SectionComparer
+from utilities.comparison_cache import SectionComparisonCache
+from utilities.extraction_store import get_model_name, get_prompt_version
+from utilities.pre_matcher import PreMatchResult, SkillPreMatcher
 
 text_prompt = [
     (
@@ -63,10 +67,68 @@ JD Optional: {jd_optional_section}
     ),
 ]
 
+# Section index -> BatchedSectionComparer field, in the order of get_section_items
+SECTION_NAMES = ["hard_skills", "soft_skills", "work_experiences", "educations", "certifications"]
+
+batched_text_prompt = [
+    (
+        "system",
+        """
+You are a Resume Evaluation Assistant tasked with analyzing the similarity between the sections of a resume and a job description (JD).
+The sections are hard skills, soft skills, work experiences, educations and certifications. Evaluate every section on its own, following these steps:
+
+1. Compare the resume section to the required and optional sections in the JD.
+2. For each item in the resume section:
+   - If it matches a required JD item, assign the value 1.
+   - If it matches an optional JD item, assign the value 0.
+   - If it is not in the JD but is semantically related to a required or optional JD item, assign the value 0.
+   - If it is unrelated to any JD item, do NOT include it in the output.
+3. For each required or optional JD item not present in the resume section, include it with the value -1.
+4. Correct typos in the resume section (e.g., "Pytoch" → "Pytorch") and match items based on corrected terms or semantic similarity.
+5. Include all work experience dates as given (format: <[DATE]>: YYYY - YYYY).
+6. Return the result of each section as a JSON object mapping each item name to its assigned value, in the field of that section.
+   Return `{{}}` for a section without items.
+
+Example for one section:
+Resume section: ["Java", "Python", "Go", "Spring Boot", "Pytoch", "C#"]
+JD required: ["Java", "Python", "Rust"]
+JD optional: ["C#"]
+Expected output:
+{{"Java": 1, "Python": 1, "Spring Boot": 0, "Pytorch": 0, "C#": 0, "Rust": -1}}
+"""
+    ),
+    (
+        "human",
+        "Please evaluate the following sections:\n" + "".join(
+            f"""
+{name.replace("_", " ").capitalize()}:
+Resume Section: {{{name}_resume_section}}
+JD Required: {{{name}_jd_required_section}}
+JD Optional: {{{name}_jd_optional_section}}
+"""
+            for name in SECTION_NAMES
+        )
+    ),
+]
+
+PROMPT_VERSION = get_prompt_version(text_prompt, SectionComparer)
+BATCHED_PROMPT_VERSION = get_prompt_version(batched_text_prompt, BatchedSectionComparer)
+
 class ResumeComparisonAgent(BaseAgent):
-    def __init__(self, name: str, llm: BaseChatModel, tools: list[Callable]):
+    def __init__(
+        self,
+        name: str,
+        llm: BaseChatModel,
+        tools: list[Callable],
+        cache: Optional[SectionComparisonCache] = None,
+        pre_matcher: Optional[SkillPreMatcher] = None
+    ):
         super().__init__(name, llm, tools)
         self.prompt = self.get_section_comparison_prompt_template()
+        self.batched_prompt = ChatPromptTemplate(batched_text_prompt)
+        self.cache = cache
+        self.pre_matcher = pre_matcher
+        self.model_name = get_model_name(llm)
 
     def get_section_comparison_prompt_template(self) -> ChatPromptTemplate:
         return ChatPromptTemplate(text_prompt)
@@ -116,44 +178,186 @@ class ResumeComparisonAgent(BaseAgent):
         #     ),
         # ])
 
-    def compare_section(self, state: ComparerState) -> ComparerState:
-        try:
-            resume_section = state["resume"].hard_skills
+    def get_section_items(self, state: ComparerState) -> tuple[list, list, list]:
+        resume_section = state["resume"].hard_skills
+        jd_required_section = state["jd"].required_hard_skills
+        jd_optional_section = state["jd"].optional_hard_skills
+        if state["current_section_idx"] == 1:
+            resume_section = state["resume"].soft_skills
+            jd_required_section = state["jd"].required_soft_skills
+            jd_optional_section = state["jd"].optional_soft_skills
+        elif state["current_section_idx"] == 2:
+            resume_section = [item.summary for item in state["resume"].work_experiences]
+            jd_required_section = [item.summary for item in state["jd"].required_work_experiences]
+            jd_optional_section = [item.summary for item in state["jd"].optional_work_experiences]
+        elif state["current_section_idx"] == 3:
+            resume_section = [item.summary for item in state["resume"].educations]
+            jd_required_section = [item.summary for item in state["jd"].required_educations]
+            jd_optional_section = [item.summary for item in state["jd"].optional_educations]
+        elif state["current_section_idx"] == 4:
+            resume_section = state["resume"].certifications
             jd_required_section = state["jd"].required_hard_skills
             jd_optional_section = state["jd"].optional_hard_skills
-            if state["current_section_idx"] == 1:
-                resume_section = state["resume"].soft_skills
-                jd_required_section = state["jd"].required_soft_skills
-                jd_optional_section = state["jd"].optional_soft_skills
-            elif state["current_section_idx"] == 2:
-                resume_section = [item.summary for item in state["resume"].work_experiences]
-                jd_required_section = [item.summary for item in state["jd"].required_work_experiences]
-                jd_optional_section = [item.summary for item in state["jd"].optional_work_experiences]
-            elif state["current_section_idx"] == 3:
-                resume_section = [item.summary for item in state["resume"].educations]
-                jd_required_section = [item.summary for item in state["jd"].required_educations]
-                jd_optional_section = [item.summary for item in state["jd"].optional_educations]
-            elif state["current_section_idx"] == 4:
-                resume_section = state["resume"].certifications
-                jd_required_section = state["jd"].required_hard_skills
-                jd_optional_section = state["jd"].optional_hard_skills
-
-            chain = self.prompt | self.llm.with_structured_output(SectionComparer)
-            output = chain.invoke({
-                "resume_section": json.dumps(resume_section, ensure_ascii=False),
-                "jd_required_section": json.dumps(jd_required_section, ensure_ascii=False),
-                "jd_optional_section": json.dumps(jd_optional_section, ensure_ascii=False)
-            })
-            section_items = output.section_items
-
-            return {"sections": {state["current_section_idx"]: json.loads(section_items or "{}")}}
+
+        return resume_section, jd_required_section, jd_optional_section
+
+    def get_section_prompt_input(self, state: ComparerState) -> dict:
+        resume_section, jd_required_section, jd_optional_section = self.get_section_items(state)
+        return {
+            "resume_section": json.dumps(resume_section, ensure_ascii=False),
+            "jd_required_section": json.dumps(jd_required_section, ensure_ascii=False),
+            "jd_optional_section": json.dumps(jd_optional_section, ensure_ascii=False)
+        }
+
+    def get_cache_key(self, state: ComparerState) -> str:
+        return SectionComparisonCache.make_key(
+            state["current_section_idx"], PROMPT_VERSION, self.model_name, *self.get_section_items(state)
+        )
+
+    def pre_match_section(self, state: ComparerState) -> Optional[PreMatchResult]:
+        """Resolve the section items locally when the pre-matcher handles the section, None otherwise."""
+        if self.pre_matcher is None or state["current_section_idx"] not in self.pre_matcher.sections:
+            return None
+        return self.pre_matcher.match(*self.get_section_items(state))
+
+    def get_residual_prompt_input(self, state: ComparerState, pre_match: PreMatchResult) -> dict:
+        # Only the ambiguous resume items go to the LLM, against the whole JD sections
+        # so that they can still be related to JD items matched locally
+        _, jd_required_section, jd_optional_section = self.get_section_items(state)
+        return {
+            "resume_section": json.dumps(pre_match.ambiguous, ensure_ascii=False),
+            "jd_required_section": json.dumps(jd_required_section, ensure_ascii=False),
+            "jd_optional_section": json.dumps(jd_optional_section, ensure_ascii=False)
+        }
+
+    def compare_section(self, state: ComparerState) -> ComparerState:
+        try:
+            section_idx = state["current_section_idx"]
+            cache_key = self.get_cache_key(state) if self.cache else None
+            section_items = self.cache.get(section_idx, cache_key) if self.cache else None
+            if section_items is not None:
+                return {"sections": {section_idx: section_items}}
+
+            pre_match = self.pre_match_section(state)
+            if pre_match is not None and pre_match.is_resolved:
+                section_items = pre_match.section_items
+            else:
+                prompt_input = (
+                    self.get_residual_prompt_input(state, pre_match) if pre_match is not None
+                    else self.get_section_prompt_input(state)
+                )
+                chain = self.prompt | self.llm.with_structured_output(SectionComparer)
+                output = chain.invoke(prompt_input)
+                section_items = json.loads(output.section_items or "{}")
+                if pre_match is not None:
+                    section_items = pre_match.merge(section_items)
+
+            if self.cache:
+                self.cache.set(cache_key, section_items)
+            return {"sections": {section_idx: section_items}}
+        except Exception as ex:
+            error_message = f"Error while comparing resume: {ex}"
+            self.logger.error(error_message)
+            raise RuntimeError(error_message) from ex
+
+    async def acompare_section(self, state: ComparerState) -> ComparerState:
+        try:
+            section_idx = state["current_section_idx"]
+            cache_key = self.get_cache_key(state) if self.cache else None
+            section_items = self.cache.get(section_idx, cache_key) if self.cache else None
+            if section_items is not None:
+                return {"sections": {section_idx: section_items}}
+
+            # Embedding lookups block, keep them off the event loop
+            pre_match = await asyncio.to_thread(self.pre_match_section, state)
+            if pre_match is not None and pre_match.is_resolved:
+                section_items = pre_match.section_items
+            else:
+                prompt_input = (
+                    self.get_residual_prompt_input(state, pre_match) if pre_match is not None
+                    else self.get_section_prompt_input(state)
+                )
+                chain = self.prompt | self.llm.with_structured_output(SectionComparer)
+                output = await chain.ainvoke(prompt_input)
+                section_items = json.loads(output.section_items or "{}")
+                if pre_match is not None:
+                    section_items = pre_match.merge(section_items)
+
+            if self.cache:
+                self.cache.set(cache_key, section_items)
+            return {"sections": {section_idx: section_items}}
+        except Exception as ex:
+            error_message = f"Error while comparing resume: {ex}"
+            self.logger.error(error_message)
+            raise RuntimeError(error_message) from ex
+
+    def get_batched_prompt_input(self, state: ComparerState) -> dict:
+        prompt_input = {}
+        for section_idx, name in enumerate(SECTION_NAMES):
+            section_input = self.get_section_prompt_input({**state, "current_section_idx": section_idx})
+            prompt_input.update({f"{name}_{key}": value for key, value in section_input.items()})
+        return prompt_input
+
+    def get_cached_sections(self, state: ComparerState) -> tuple[dict, dict]:
+        """Return the cached sections and the cache keys of all sections."""
+        cache_keys = {
+            section_idx: SectionComparisonCache.make_key(
+                section_idx, BATCHED_PROMPT_VERSION, self.model_name,
+                *self.get_section_items({**state, "current_section_idx": section_idx})
+            )
+            for section_idx in range(len(SECTION_NAMES))
+        }
+        sections = {}
+        for section_idx, cache_key in cache_keys.items():
+            section_items = self.cache.get(section_idx, cache_key)
+            if section_items is not None:
+                sections[section_idx] = section_items
+        return sections, cache_keys
+
+    def split_batched_output(self, output: BatchedSectionComparer, cache_keys: dict) -> ComparerState:
+        sections = {
+            section_idx: json.loads(getattr(output, name) or "{}")
+            for section_idx, name in enumerate(SECTION_NAMES)
+        }
+        if self.cache:
+            for section_idx, section_items in sections.items():
+                self.cache.set(cache_keys[section_idx], section_items)
+        return {"sections": sections}
+
+    def compare_sections(self, state: ComparerState) -> ComparerState:
+        """Compare all sections with one LLM call (batched comparison mode)."""
+        try:
+            cache_keys = {}
+            if self.cache:
+                sections, cache_keys = self.get_cached_sections(state)
+                if len(sections) == len(SECTION_NAMES):
+                    return {"sections": sections}
+
+            chain = self.batched_prompt | self.llm.with_structured_output(BatchedSectionComparer)
+            output = chain.invoke(self.get_batched_prompt_input(state))
+
+            return self.split_batched_output(output, cache_keys)
         except Exception as ex:
             error_message = f"Error while comparing resume: {ex}"
             self.logger.error(error_message)
-            raise error_message
+            raise RuntimeError(error_message) from ex
+
+    async def acompare_sections(self, state: ComparerState) -> ComparerState:
+        try:
+            cache_keys = {}
+            if self.cache:
+                sections, cache_keys = self.get_cached_sections(state)
+                if len(sections) == len(SECTION_NAMES):
+                    return {"sections": sections}
+
+            chain = self.batched_prompt | self.llm.with_structured_output(BatchedSectionComparer)
+            output = await chain.ainvoke(self.get_batched_prompt_input(state))
 
-    def increase_section_idx(self, state: ComparerState) -> ComparerState:
-        return {"current_section_idx": 1}
+            return self.split_batched_output(output, cache_keys)
+        except Exception as ex:
+            error_message = f"Error while comparing resume: {ex}"
+            self.logger.error(error_message)
+            raise RuntimeError(error_message) from ex
 
     def compare_resume(self, state: ComparerState) -> ComparerState:
         def total_year(input_list: list):
@@ -198,17 +402,18 @@ class ResumeComparisonAgent(BaseAgent):
 
             return result
 
-        relevant_experiences = [exp for exp, flag in state["sections"].get(2, {}).items() if flag in (0, 1)]
+        sections = state.get("sections", {})
+        relevant_experiences = [exp for exp, flag in sections.get(2, {}).items() if flag in (0, 1)]
         years_of_experience = total_year(relevant_experiences)
 
         resume_comparer = ResumeComparer(
             profile_summary=state["resume"].profile_summary,
-            hard_skills=state["sections"].get(0, {}),
-            soft_skills=state["sections"].get(1, {}),
-            work_experiences=state["sections"].get(2, {}),
+            hard_skills=sections.get(0, {}),
+            soft_skills=sections.get(1, {}),
+            work_experiences=sections.get(2, {}),
             years_of_experience=years_of_experience,
-            educations=state["sections"].get(3, {}),
-            certifications=state["sections"].get(4, {}),
+            educations=sections.get(3, {}),
+            certifications=sections.get(4, {}),
             projects=state["resume"].projects,
         )
 
@@ -1,10 +1,12 @@
-from typing import Callable
+import asyncio
+from typing import Callable, Optional
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 from common_modules.agents.base_agent import BaseAgent
 from core.agents.states import ResumeEvaluationGraphState
 from common_modules.schemas.resume import Resume
-from tools.document_loader import docx_loader, pdf_loader, minio_pdf_loader, minio_pdf_loader_by_key
+from tools.document_loader import load_document_content, aload_document_content
+from utilities.extraction_store import ExtractionStore, get_model_name, get_prompt_version
 
 text_prompt = [
     ("system", """
@@ -40,10 +42,15 @@ Instructions:
 ]
 
 
+PROMPT_VERSION = get_prompt_version(text_prompt, Resume)
+
+
 class ResumeExtractionAgent(BaseAgent):
-    def __init__(self, name: str, llm: BaseChatModel, tools: list[Callable]):
+    def __init__(self, name: str, llm: BaseChatModel, tools: list[Callable], store: Optional[ExtractionStore[Resume]] = None):
         super().__init__(name, llm, tools)
         self.prompt = self.get_resume_extraction_prompt_template()
+        self.store = store
+        self.model_name = get_model_name(llm)
 
     def get_resume_extraction_prompt_template(self) -> ChatPromptTemplate:
         return ChatPromptTemplate(text_prompt)   
@@ -66,29 +73,51 @@ class ResumeExtractionAgent(BaseAgent):
     def extract_resume(self, state: ResumeEvaluationGraphState) -> ResumeEvaluationGraphState:
         try:
             resume_path = state["resume_path"]
+            self.logger.info(f"Processing resume: {resume_path}")
+            resume_content = load_document_content(resume_path)
 
-            # Check if it's an S3 URI
-            if resume_path.startswith("s3://"):
-                if resume_path.endswith(".pdf"):
-                    self.logger.info(f"Processing S3 URI: {resume_path}")
-                    resume_content = minio_pdf_loader.invoke(resume_path)
-            # Check if it's a local file
-            else:
-                if resume_path.endswith(".pdf"):
-                    self.logger.info(f"Processing local PDF: {resume_path}")
-                    resume_content = pdf_loader.invoke(resume_path)
-                elif resume_path.endswith(".docx"):
-                    self.logger.info(f"Processing local DOCX: {resume_path}")
-                    resume_content = docx_loader.invoke(resume_path)
+            # Stored resumes are already augmented
+            resume = self.store.get(resume_content, PROMPT_VERSION, self.model_name) if self.store else None
+            if resume is not None:
+                self.logger.info(f"Reusing stored extraction of resume: {resume_path}")
+                return {"resume": resume}
 
             chain = self.prompt | self.llm.with_structured_output(Resume)
-            resume = chain.invoke({"resume_content": resume_content})
+            resume = self.augment_resume(chain.invoke({"resume_content": resume_content}))
+
+            if self.store:
+                self.store.put(resume_content, PROMPT_VERSION, self.model_name, resume)
+            return {"resume": resume}
+        except Exception as ex:
+            error_message = f"Error while extracting resume: {ex}"
+            self.logger.error(error_message)
+            raise RuntimeError(error_message) from ex
 
-            for work_experience in resume.work_experiences:
-                work_experience.summary += f" <[DATE]>:{work_experience.dates}"
+    async def aextract_resume(self, state: ResumeEvaluationGraphState) -> ResumeEvaluationGraphState:
+        try:
+            resume_path = state["resume_path"]
+            self.logger.info(f"Processing resume: {resume_path}")
+            resume_content = await aload_document_content(resume_path)
 
+            # Stored resumes are already augmented
+            resume = await asyncio.to_thread(self.store.get, resume_content, PROMPT_VERSION, self.model_name) if self.store else None
+            if resume is not None:
+                self.logger.info(f"Reusing stored extraction of resume: {resume_path}")
+                return {"resume": resume}
+
+            chain = self.prompt | self.llm.with_structured_output(Resume)
+            resume = self.augment_resume(await chain.ainvoke({"resume_content": resume_content}))
+
+            if self.store:
+                await asyncio.to_thread(self.store.put, resume_content, PROMPT_VERSION, self.model_name, resume)
             return {"resume": resume}
         except Exception as ex:
             error_message = f"Error while extracting resume: {ex}"
             self.logger.error(error_message)
-            raise error_message
\ No newline at end of file
+            raise RuntimeError(error_message) from ex
+
+    def augment_resume(self, resume: Resume) -> Resume:
+        for work_experience in resume.work_experiences:
+            work_experience.summary += f" <[DATE]>:{work_experience.dates}"
+
+        return resume
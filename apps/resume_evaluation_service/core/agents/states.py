@@ -2,7 +2,10 @@ from typing import Annotated, Dict, TypedDict
 from common_modules.schemas.jd import JD
 from common_modules.schemas.resume import Resume
 from common_modules.schemas.resume_comparer import ResumeComparer
-import operator
+
+
+def merge_dict(existing: Dict, new: Dict) -> Dict:
+    return {**existing, **new}
 
 
 class ResumeEvaluationGraphState(TypedDict):
@@ -15,11 +18,20 @@ class ResumeEvaluationGraphState(TypedDict):
 
 
 class ComparerState(TypedDict):
-    def merge_dict(existing: Dict, new: Dict) -> Dict:
-        return {**existing, **new}
-
     resume: Resume
     jd: JD
-    current_section_idx: Annotated[int, operator.add]
+    current_section_idx: int
     sections: Annotated[Dict[int, Dict[str, int]], merge_dict]
     resume_comparer: ResumeComparer
+
+
+class EvaluationGraphInput(ResumeEvaluationGraphState):
+    """Input of the evaluation graph. prefetched_jd is the JD extracted from prefetched_jd_path, reused when that is jd_path."""
+    prefetched_jd: JD
+    prefetched_jd_path: str
+
+
+class EvaluationGraphState(EvaluationGraphInput):
+    """Channels of the evaluation graph: its input and output, and the section comparisons of its comparison nodes."""
+    current_section_idx: int
+    sections: Annotated[Dict[int, Dict[str, int]], merge_dict]
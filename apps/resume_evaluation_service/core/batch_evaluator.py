@@ -0,0 +1,276 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from logging import Logger
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Union
+from pydantic import BaseModel
+from common_modules.schemas.jd import JD
+from core.agents.orchestrator import Orchestrator
+from utilities.checkpointer import ainvoke_graph
+from utilities.minio_pdf_helper import MinIOPDFLoader
+from utilities.postgres import connect_postgres, get_postgres_conninfo
+
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class BatchResult(BaseModel):
+    resume_url: str
+    status: str
+    matching_points: Optional[float] = None
+    error: Optional[str] = None
+
+
+def make_batch_id(jd_url: str, resume_source: str) -> str:
+    """Batch id of a JD and a resume source (MinIO prefix or resume list), so that rerunning a batch resumes it."""
+    return hashlib.sha256(f"{jd_url}\0{resume_source}".encode("utf-8")).hexdigest()[:16]
+
+
+def list_resume_urls(prefix: str, bucket_name: Optional[str] = None) -> List[str]:
+    """S3 URIs of the resume PDFs under a MinIO prefix."""
+    loader = MinIOPDFLoader(bucket_name=bucket_name) if bucket_name else MinIOPDFLoader()
+    return [f"s3://{loader.bucket_name}/{key}" for key in loader.list_pdfs(prefix)]
+
+
+class SQLiteBatchCheckpointStore:
+    """
+    Checkpoints of batch evaluations in a local SQLite file: the extracted JD and the result of every evaluated resume.
+    Used by the batch CLI without Postgres.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS batches (batch_id TEXT PRIMARY KEY, jd_url TEXT NOT NULL, jd TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS batch_results (
+                batch_id TEXT NOT NULL,
+                resume_url TEXT NOT NULL,
+                status TEXT NOT NULL,
+                matching_points REAL,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (batch_id, resume_url)
+            )
+        """)
+        self.connection.commit()
+        self._lock = threading.Lock()
+
+    def get_jd(self, batch_id: str) -> Optional[JD]:
+        with self._lock:
+            row = self.connection.execute("SELECT jd FROM batches WHERE batch_id = ?", (batch_id,)).fetchone()
+        return JD.model_validate_json(row[0]) if row is not None else None
+
+    def put_jd(self, batch_id: str, jd_url: str, jd: JD) -> None:
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO batches (batch_id, jd_url, jd, created_at) VALUES (?, ?, ?, ?)",
+                (batch_id, jd_url, jd.model_dump_json(), time.time()),
+            )
+            self.connection.commit()
+
+    def get_succeeded(self, batch_id: str) -> Set[str]:
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT resume_url FROM batch_results WHERE batch_id = ? AND status = ?", (batch_id, SUCCEEDED)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def put_result(self, batch_id: str, result: BatchResult) -> None:
+        with self._lock:
+            self.connection.execute(
+                """
+                INSERT OR REPLACE INTO batch_results (batch_id, resume_url, status, matching_points, error, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (batch_id, result.resume_url, result.status, result.matching_points, result.error, time.time()),
+            )
+            self.connection.commit()
+
+    def get_ranking(self, batch_id: str, top_k: Optional[int] = None) -> List[BatchResult]:
+        """Results of a batch, best matching points first and failed resumes last."""
+        with self._lock:
+            rows = self.connection.execute(
+                """
+                SELECT resume_url, status, matching_points, error FROM batch_results WHERE batch_id = ?
+                ORDER BY status = ? DESC, matching_points DESC, resume_url
+                LIMIT ?
+                """,
+                (batch_id, SUCCEEDED, top_k if top_k is not None else -1),
+            ).fetchall()
+        return [
+            BatchResult(resume_url=resume_url, status=status, matching_points=matching_points, error=error)
+            for resume_url, status, matching_points, error in rows
+        ]
+
+
+class PostgresBatchCheckpointStore:
+    """Checkpoints of batch evaluations in Postgres tables, shared by every replica and kept across container restarts."""
+
+    def __init__(self, conninfo: Dict[str, Any]):
+        self.conninfo = conninfo
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _execute(self, query: str, params: tuple = ()):
+        """Execute a query, returning the fetched rows or, for statements without result, the row count."""
+        with self._lock:
+            try:
+                if self._connection is None or self._connection.closed:
+                    self._connection = connect_postgres(self.conninfo)
+                    self._create_tables(self._connection)
+                with self._connection.cursor() as cursor:
+                    cursor.execute(query, params)
+                    return cursor.fetchall() if cursor.description else cursor.rowcount
+            except Exception:
+                # Reconnect on the next call
+                self._connection = None
+                raise
+
+    def _create_tables(self, connection) -> None:
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS batches (
+                batch_id TEXT PRIMARY KEY,
+                jd_url TEXT NOT NULL,
+                jd JSONB NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS batch_results (
+                batch_id TEXT NOT NULL,
+                resume_url TEXT NOT NULL,
+                status TEXT NOT NULL,
+                matching_points DOUBLE PRECISION,
+                error TEXT,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                PRIMARY KEY (batch_id, resume_url)
+            )
+        """)
+
+    def get_jd(self, batch_id: str) -> Optional[JD]:
+        rows = self._execute("SELECT jd::text FROM batches WHERE batch_id = %s", (batch_id,))
+        return JD.model_validate_json(rows[0][0]) if rows else None
+
+    def put_jd(self, batch_id: str, jd_url: str, jd: JD) -> None:
+        self._execute(
+            """
+            INSERT INTO batches (batch_id, jd_url, jd) VALUES (%s, %s, %s::jsonb)
+            ON CONFLICT (batch_id) DO UPDATE SET jd_url = EXCLUDED.jd_url, jd = EXCLUDED.jd, created_at = now()
+            """,
+            (batch_id, jd_url, jd.model_dump_json()),
+        )
+
+    def get_succeeded(self, batch_id: str) -> Set[str]:
+        rows = self._execute("SELECT resume_url FROM batch_results WHERE batch_id = %s AND status = %s", (batch_id, SUCCEEDED))
+        return {row[0] for row in rows}
+
+    def put_result(self, batch_id: str, result: BatchResult) -> None:
+        self._execute(
+            """
+            INSERT INTO batch_results (batch_id, resume_url, status, matching_points, error) VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (batch_id, resume_url) DO UPDATE SET status = EXCLUDED.status,
+                matching_points = EXCLUDED.matching_points, error = EXCLUDED.error, updated_at = now()
+            """,
+            (batch_id, result.resume_url, result.status, result.matching_points, result.error),
+        )
+
+    def get_ranking(self, batch_id: str, top_k: Optional[int] = None) -> List[BatchResult]:
+        """Results of a batch, best matching points first and failed resumes last."""
+        rows = self._execute(
+            """
+            SELECT resume_url, status, matching_points, error FROM batch_results WHERE batch_id = %s
+            ORDER BY status = %s DESC, matching_points DESC NULLS LAST, resume_url
+            LIMIT %s
+            """,
+            (batch_id, SUCCEEDED, top_k),
+        )
+        return [
+            BatchResult(resume_url=resume_url, status=status, matching_points=matching_points, error=error)
+            for resume_url, status, matching_points, error in rows
+        ]
+
+
+BatchCheckpointStore = Union[SQLiteBatchCheckpointStore, PostgresBatchCheckpointStore]
+
+
+class BatchEvaluator:
+    """
+    Evaluates many resumes against one JD. The JD is extracted once and handed to every graph run, at most
+    `max_concurrency` resumes are evaluated at a time (all of them sharing the LLM rate limiter of the graph),
+    and each result is checkpointed as it completes, so that running a batch again skips the evaluated resumes.
+    """
+
+    def __init__(self, orchestrator: Orchestrator, store: BatchCheckpointStore, max_concurrency: int = 4):
+        self.orchestrator = orchestrator
+        self.store = store
+        self.max_concurrency = max_concurrency
+        self.logger = Logger("batch_evaluator")
+
+    async def aget_jd(self, batch_id: str, jd_url: str) -> JD:
+        jd = await asyncio.to_thread(self.store.get_jd, batch_id)
+        if jd is None:
+            jd = (await self.orchestrator.jd_extraction_agent.aextract_jd({"jd_path": jd_url}))["jd"]
+            await asyncio.to_thread(self.store.put_jd, batch_id, jd_url, jd)
+        return jd
+
+    async def aevaluate(self, batch_id: str, jd_url: str, jd: JD, resume_url: str) -> BatchResult:
+        # One evaluation thread per resume of the batch, so that running a batch again resumes failed evaluations mid-graph
+        thread_id = f"batch-{batch_id}-{hashlib.sha256(resume_url.encode('utf-8')).hexdigest()[:16]}"
+        try:
+            output = await ainvoke_graph(
+                self.orchestrator.graph,
+                {"resume_path": resume_url, "jd_path": jd_url, "prefetched_jd": jd, "prefetched_jd_path": jd_url},
+                thread_id=thread_id,
+            )
+            return BatchResult(resume_url=resume_url, status=SUCCEEDED, matching_points=output["matching_points"])
+        except Exception as ex:
+            self.logger.error(f"Error while evaluating {resume_url}: {ex}")
+            return BatchResult(resume_url=resume_url, status=FAILED, error=str(ex))
+
+    async def arun(self, batch_id: str, jd_url: str, resume_urls: List[str]) -> AsyncIterator[BatchResult]:
+        """Yield the results of the resumes not evaluated yet in the batch, as they complete."""
+        jd = await self.aget_jd(batch_id, jd_url)
+        succeeded = await asyncio.to_thread(self.store.get_succeeded, batch_id)
+        pending = [resume_url for resume_url in dict.fromkeys(resume_urls) if resume_url not in succeeded]
+        self.logger.info(f"Batch {batch_id}: {len(succeeded)} resumes already evaluated, {len(pending)} pending")
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def evaluate(resume_url: str) -> BatchResult:
+            async with semaphore:
+                result = await self.aevaluate(batch_id, jd_url, jd, resume_url)
+            await asyncio.to_thread(self.store.put_result, batch_id, result)
+            return result
+
+        tasks = [asyncio.create_task(evaluate(resume_url)) for resume_url in pending]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+@lru_cache(maxsize=1)
+def get_batch_checkpoint_store() -> BatchCheckpointStore:
+    """Batch checkpoints in Postgres when POSTGRES_HOST is set, else in the SQLite file BATCH_CHECKPOINT_PATH."""
+    conninfo = get_postgres_conninfo()
+    if conninfo is not None:
+        return PostgresBatchCheckpointStore(conninfo)
+    return SQLiteBatchCheckpointStore(os.getenv("BATCH_CHECKPOINT_PATH", "checkpoints/batches.sqlite"))
+
+
+def create_batch_evaluator(orchestrator: Orchestrator, max_concurrency: Optional[int] = None) -> BatchEvaluator:
+    """Batch evaluator over the graph of an orchestrator, configured via environment variables."""
+    return BatchEvaluator(
+        orchestrator,
+        get_batch_checkpoint_store(),
+        max_concurrency=max_concurrency or int(os.getenv("BATCH_MAX_CONCURRENCY", 4)),
+    )
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import threading
+import time
+from logging import Logger
+from typing import Any, Dict, List, Optional
+from langgraph.graph.state import CompiledStateGraph
+from common_modules.factories.llm_factory import LLMFactory
+from common_modules.rate_limiters.llm_rate_limiter import get_rate_limiter_stats
+from core.agents.orchestrator import Orchestrator
+
+
+# Environment variables that affect how the graph is built. A change in any of them triggers a rebuild.
+GRAPH_CONFIG_ENV_VARS = [
+    "GEMINI_MODEL", "GEMINI_API_KEY",
+    "LLM_FALLBACK_PROVIDERS", "LLM_TIMEOUT_SECONDS", "LLM_HEDGE_AFTER_SECONDS",
+    "COMPARISON_MODE", "COMPARISON_SECTIONS", "COMPARISON_MAX_CONCURRENCY", "PRE_MATCHER_SECTIONS",
+]
+
+
+class GraphRegistry:
+    """
+    Process-wide registry of the compiled resume evaluation graph.
+
+    The graph (together with its LLM client, rate limiter and agents) is built once and shared
+    across requests. It is rebuilt on demand when the graph configuration changes or on explicit reload.
+    """
+
+    def __init__(self, config_env_vars: Optional[List[str]] = None):
+        self.config_env_vars = config_env_vars or GRAPH_CONFIG_ENV_VARS
+        self.orchestrator: Optional[Orchestrator] = None
+        self.graph: Optional[CompiledStateGraph[Any, Any, Any, Any]] = None
+        self.config_fingerprint: Optional[str] = None
+        self.build_duration: Optional[float] = None
+        self.built_at: Optional[float] = None
+        self.build_count = 0
+        self.logger = Logger("graph_registry")
+        self._lock = threading.Lock()
+
+    def _get_config_fingerprint(self) -> str:
+        config = "\n".join(f"{name}={os.getenv(name, '')}" for name in self.config_env_vars)
+        return hashlib.sha256(config.encode("utf-8")).hexdigest()
+
+    def build(self) -> CompiledStateGraph[Any, Any, Any, Any]:
+        """Build (or rebuild) the graph and swap it in once it is ready."""
+        with self._lock:
+            return self._build()
+
+    def _build(self) -> CompiledStateGraph[Any, Any, Any, Any]:
+        fingerprint = self._get_config_fingerprint()
+
+        start = time.perf_counter()
+        orchestrator = Orchestrator()
+        graph = orchestrator.orchestrate()
+        build_duration = time.perf_counter() - start
+
+        if graph is None:
+            raise RuntimeError("Failed to build resume evaluation graph")
+
+        self.orchestrator = orchestrator
+        self.graph = graph
+        self.config_fingerprint = fingerprint
+        self.build_duration = build_duration
+        self.built_at = time.time()
+        self.build_count += 1
+        self.logger.info(f"Graph built in {build_duration:.3f}s (build #{self.build_count})")
+
+        return graph
+
+    def get_graph(self) -> CompiledStateGraph[Any, Any, Any, Any]:
+        """Return the shared graph, rebuilding it first if the configuration has changed."""
+        graph = self.graph
+        if graph is not None and self.config_fingerprint == self._get_config_fingerprint():
+            return graph
+
+        with self._lock:
+            if self.graph is None or self.config_fingerprint != self._get_config_fingerprint():
+                if self.graph is not None:
+                    self.logger.info("Graph configuration changed, rebuilding graph")
+                return self._build()
+            return self.graph
+
+    def reload(self) -> CompiledStateGraph[Any, Any, Any, Any]:
+        """Force a rebuild of the graph regardless of the configuration fingerprint."""
+        return self.build()
+
+    def get_info(self) -> Dict[str, Any]:
+        return {
+            "is_built": self.graph is not None,
+            "build_duration_seconds": self.build_duration,
+            "built_at": self.built_at,
+            "build_count": self.build_count,
+            "config_fingerprint": self.config_fingerprint,
+            "caches": self.orchestrator.get_cache_stats() if self.orchestrator is not None else None,
+            "rate_limiters": get_rate_limiter_stats(),
+            "llm_clients": LLMFactory.get_pool_stats(),
+            "llm_providers": self.orchestrator.get_llm_stats() if self.orchestrator is not None else None,
+            "checkpointer": (
+                type(self.orchestrator.checkpointer).__name__
+                if self.orchestrator is not None and self.orchestrator.checkpointer is not None else None
+            ),
+        }
+
+
+graph_registry = GraphRegistry()
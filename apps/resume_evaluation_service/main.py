@@ -0,0 +1,66 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+import uvicorn
+from dotenv import load_dotenv
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from apis.routers import get_job_queue, router
+from common_modules.factories.llm_factory import LLMFactory
+from core.graph_registry import graph_registry
+from utilities.checkpointer import arun_checkpoint_retention, get_checkpointer
+
+
+load_dotenv()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the graph once at startup so requests share the same compiled graph and rate limiter
+    graph_registry.build()
+    await get_job_queue().start()
+    checkpointer = get_checkpointer()
+    retention_task = None
+    if checkpointer is not None:
+        retention_task = asyncio.create_task(arun_checkpoint_retention(
+            checkpointer,
+            retention_seconds=float(os.getenv("CHECKPOINT_RETENTION_SECONDS", 7 * 24 * 3600)),
+            interval_seconds=float(os.getenv("CHECKPOINT_PRUNE_INTERVAL_SECONDS", 3600)),
+        ))
+    yield
+    if retention_task is not None:
+        retention_task.cancel()
+    await get_job_queue().stop()
+    await LLMFactory.aclose()
+
+
+app = FastAPI(
+    title="Resume Evaluator",
+    description="To evaluate resume - JD matching",
+    version="1.0.0-beta",
+    lifespan=lifespan,
+)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+app.include_router(router)
+
+
+@app.get("/health")
+async def health_check():
+    """Health check endpoint."""
+    return {"status": "healthy", "service": "Resume Evaluator", "graph": graph_registry.get_info()}
+
+
+if __name__ == "__main__":
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", 8000)),
+        log_level="debug",
+        access_log=True,
+    )
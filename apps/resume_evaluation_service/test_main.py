@@ -1,5 +1,6 @@
 import os
 from core.agents.orchestrator import Orchestrator
+from utilities.checkpointer import invoke_graph
 from dotenv import load_dotenv
 
 
@@ -14,7 +15,7 @@ orchestrator.export_graph(image_path)
 
 resume_path = os.path.join(base_dir, "test_samples/resumes/cv1.pdf")
 jd_path = os.path.join(base_dir, "test_samples/jds/jd5.pdf")
-content = graph.invoke(input={"resume_path": resume_path, "jd_path": jd_path})
+content = invoke_graph(graph, {"resume_path": resume_path, "jd_path": jd_path})
 resume_comparer = content["resume_comparer"]
 resume = content["resume"]
 jd = content["jd"]
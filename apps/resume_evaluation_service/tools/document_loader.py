@@ -1,16 +1,21 @@
-from langchain_community.document_loaders import Docx2txtLoader, PyPDFLoader
+import asyncio
 from langchain_core.tools import tool
+from utilities.parsing_executor import get_parsing_executor
 from utilities.minio_pdf_helper import MinIOPDFLoader
 
 
 @tool("docx_loader", description="Load a DOCX resume and return its text content.")
 def docx_loader(resume_path: str) -> str:
-    return "\n".join([page.page_content for page in Docx2txtLoader(resume_path).load()])
+    with open(resume_path, "rb") as f:
+        documents = get_parsing_executor().parse_docx(f.read(), resume_path)
+    return "\n".join([page.page_content for page in documents])
 
 
 @tool("pdf_loader", description="Load a PDF resume and return its text content.")
 def pdf_loader(resume_path: str) -> str:
-    return "\n".join([page.page_content for page in PyPDFLoader(resume_path).load()])
+    with open(resume_path, "rb") as f:
+        documents = get_parsing_executor().parse_pdf(f.read(), resume_path)
+    return "\n".join([page.page_content for page in documents])
 
 
 @tool(
@@ -56,3 +61,36 @@ def list_minio_pdfs(prefix: str = "") -> str:
             return "No PDF files found in the bucket."
     except Exception as e:
         return f"Error listing PDFs from MinIO: {str(e)}"
+
+
+def load_document_content(document_path: str) -> str:
+    """Load the text content of a document given as S3 URI or local PDF/DOCX path, raising on loading errors"""
+    # Check if it's an S3 URI
+    if document_path.startswith("s3://"):
+        if document_path.endswith(".pdf"):
+            # Not the minio_pdf_loader tool, which returns its errors as text for the LLM
+            loader = MinIOPDFLoader()
+            return loader.get_text_content(document_path)
+    # Check if it's a local file
+    else:
+        if document_path.endswith(".pdf"):
+            return pdf_loader.invoke(document_path)
+        elif document_path.endswith(".docx"):
+            return docx_loader.invoke(document_path)
+
+    raise ValueError(f"Unsupported document: {document_path}")
+
+
+async def aload_document_content(document_path: str) -> str:
+    """Async version of load_document_content, S3 objects are downloaded with an async client"""
+    if document_path.startswith("s3://"):
+        if document_path.endswith(".pdf"):
+            loader = MinIOPDFLoader()
+            return await loader.aget_text_content(document_path)
+    else:
+        if document_path.endswith(".pdf"):
+            return await asyncio.to_thread(pdf_loader.invoke, document_path)
+        elif document_path.endswith(".docx"):
+            return await asyncio.to_thread(docx_loader.invoke, document_path)
+
+    raise ValueError(f"Unsupported document: {document_path}")
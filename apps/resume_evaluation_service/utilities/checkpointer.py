@@ -0,0 +1,239 @@
+import asyncio
+import os
+import sqlite3
+import uuid
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from logging import Logger
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.memory import InMemorySaver
+from utilities.postgres import get_postgres_conninfo
+
+logger = Logger("checkpointer")
+
+
+class ThreadedCheckpointSaver(BaseCheckpointSaver):
+    """
+    Serves the async checkpointer API of a sync saver (Postgres, SQLite) from worker threads,
+    so that the graph compiled with it runs with invoke and ainvoke alike.
+    """
+
+    def __init__(self, saver: BaseCheckpointSaver, pool: Any = None):
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        # Connection pool of the Postgres saver, used to find the threads to prune
+        self.pool = pool
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.saver.get_tuple(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[CheckpointTuple]:
+        return self.saver.list(config, filter=filter, before=before, limit=limit)
+
+    def put(
+        self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        return self.saver.put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        self.saver.put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.saver.delete_thread(thread_id)
+
+    def get_next_version(self, current: Any, channel: None) -> Any:
+        return self.saver.get_next_version(current, channel)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+        self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def _create_postgres_saver(conninfo: Dict[str, Any]) -> ThreadedCheckpointSaver:
+    from langgraph.checkpoint.postgres import PostgresSaver
+    from psycopg.rows import dict_row
+    from psycopg_pool import ConnectionPool
+
+    pool = ConnectionPool(
+        conninfo="",
+        kwargs={**conninfo, "autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+        max_size=int(os.getenv("CHECKPOINTER_POOL_SIZE", 10)),
+        open=True,
+    )
+    saver = PostgresSaver(pool)
+    saver.setup()
+    return ThreadedCheckpointSaver(saver, pool=pool)
+
+
+def _create_sqlite_saver(path: str) -> ThreadedCheckpointSaver:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    saver = SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+    saver.setup()
+    return ThreadedCheckpointSaver(saver)
+
+
+def create_checkpointer() -> Optional[BaseCheckpointSaver]:
+    """
+    Checkpointer of the evaluation graph selected by CHECKPOINTER: "postgres" (the langgraph_db database),
+    "sqlite" (CHECKPOINTER_PATH), "memory" or "none". Defaults to "postgres" when POSTGRES_HOST is set, "none" otherwise.
+    """
+    conninfo = get_postgres_conninfo()
+    kind = os.getenv("CHECKPOINTER", "postgres" if conninfo is not None else "none").lower()
+
+    if kind == "postgres":
+        if conninfo is None:
+            raise ValueError("The postgres checkpointer requires POSTGRES_HOST")
+        return _create_postgres_saver(conninfo)
+    if kind == "sqlite":
+        return _create_sqlite_saver(os.getenv("CHECKPOINTER_PATH", "checkpoints/graph.sqlite"))
+    if kind == "memory":
+        return InMemorySaver()
+    if kind == "none":
+        return None
+    raise ValueError(f"Unsupported checkpointer: {kind}")
+
+
+@lru_cache(maxsize=1)
+def get_checkpointer() -> Optional[BaseCheckpointSaver]:
+    """Process-wide checkpointer, shared by the graphs built by successive orchestrators."""
+    return create_checkpointer()
+
+
+def get_run_config(thread_id: Optional[str] = None) -> RunnableConfig:
+    return {"configurable": {"thread_id": thread_id or str(uuid.uuid4())}}
+
+
+class ThreadConflictError(ValueError):
+    """An evaluation thread reused for other documents than those it was created for."""
+
+
+def _prepare_run(
+    graph: Any, snapshot: Any, input: Dict[str, Any], config: RunnableConfig
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    (input to run the thread with, None when resuming it) or, when the thread already completed, its output.
+    New input is never written onto a thread holding other documents, whose channels would carry into the run.
+    """
+    if not snapshot.values:
+        return input, None
+    if any(snapshot.values.get(key) != value for key, value in input.items()):
+        raise ThreadConflictError(f"Thread {config['configurable']['thread_id']} evaluated other documents")
+    if snapshot.next:
+        # Stopped before END, e.g. on an error
+        logger.info(f"Resuming evaluation thread {config['configurable']['thread_id']}")
+        return None, None
+    return None, {key: value for key, value in snapshot.values.items() if key in graph.output_channels}
+
+
+def prepare_run(
+    graph: Any, input: Dict[str, Any], thread_id: Optional[str] = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[RunnableConfig], Optional[Dict[str, Any]]]:
+    """
+    How to run the evaluation graph as the thread `thread_id` (a new thread by default): the run input (None to
+    resume a failed run) and config, or the output of the thread when it already completed. Raises
+    ThreadConflictError when the thread evaluated other documents.
+    """
+    if graph.checkpointer is None:
+        return input, None, None
+    config = get_run_config(thread_id)
+    if thread_id is None:
+        return input, config, None
+    run_input, output = _prepare_run(graph, graph.get_state(config), input, config)
+    return run_input, config, output
+
+
+async def aprepare_run(
+    graph: Any, input: Dict[str, Any], thread_id: Optional[str] = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[RunnableConfig], Optional[Dict[str, Any]]]:
+    """Async version of prepare_run."""
+    if graph.checkpointer is None:
+        return input, None, None
+    config = get_run_config(thread_id)
+    if thread_id is None:
+        return input, config, None
+    run_input, output = _prepare_run(graph, await graph.aget_state(config), input, config)
+    return run_input, config, output
+
+
+def invoke_graph(graph: Any, input: Dict[str, Any], thread_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run the evaluation graph as the thread `thread_id` (a new thread by default). When the graph has a checkpointer,
+    a failed run of the thread resumes from the last completed node and a completed one returns its output.
+    """
+    run_input, config, output = prepare_run(graph, input, thread_id)
+    return output if output is not None else graph.invoke(run_input, config)
+
+
+async def ainvoke_graph(graph: Any, input: Dict[str, Any], thread_id: Optional[str] = None) -> Dict[str, Any]:
+    run_input, config, output = await aprepare_run(graph, input, thread_id)
+    return output if output is not None else await graph.ainvoke(run_input, config)
+
+
+def _get_idle_threads(checkpointer: BaseCheckpointSaver, cutoff: datetime) -> List[str]:
+    if isinstance(checkpointer, ThreadedCheckpointSaver) and checkpointer.pool is not None:
+        with checkpointer.pool.connection() as connection:
+            rows = connection.execute(
+                "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING max((checkpoint->>'ts')::timestamptz) < %s",
+                (cutoff,),
+            ).fetchall()
+        return [row["thread_id"] for row in rows]
+
+    last_checkpoints: Dict[str, datetime] = {}
+    for item in checkpointer.list(None):
+        thread_id = item.config["configurable"]["thread_id"]
+        created_at = datetime.fromisoformat(item.checkpoint["ts"])
+        last_checkpoints[thread_id] = max(created_at, last_checkpoints.get(thread_id, created_at))
+    return [thread_id for thread_id, created_at in last_checkpoints.items() if created_at < cutoff]
+
+
+def prune_checkpoints(checkpointer: BaseCheckpointSaver, retention_seconds: float) -> int:
+    """Delete the threads without checkpoint in the last `retention_seconds`. Returns the number of deleted threads."""
+    thread_ids = _get_idle_threads(checkpointer, datetime.now(timezone.utc) - timedelta(seconds=retention_seconds))
+    for thread_id in thread_ids:
+        checkpointer.delete_thread(thread_id)
+    return len(thread_ids)
+
+
+async def arun_checkpoint_retention(checkpointer: BaseCheckpointSaver, retention_seconds: float, interval_seconds: float) -> None:
+    """Prune the checkpoints every `interval_seconds`, until cancelled."""
+    while True:
+        try:
+            pruned = await asyncio.to_thread(prune_checkpoints, checkpointer, retention_seconds)
+            if pruned:
+                logger.info(f"Pruned the checkpoints of {pruned} evaluation threads")
+        except Exception as ex:
+            logger.error(f"Error while pruning checkpoints: {ex}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,88 @@
+import copy
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional
+
+
+def canonicalize_items(items: List[Any]) -> List[str]:
+    """Sorted, case-folded, whitespace-normalized and de-duplicated section items."""
+    return sorted({
+        re.sub(r"\s+", " ", unicodedata.normalize("NFKC", str(item))).strip().casefold()
+        for item in items
+    })
+
+
+class SectionComparisonCache:
+    """
+    In-process LRU of section comparison results.
+
+    Entries are keyed by the canonicalized resume section, JD required and JD optional lists together with
+    the section index, prompt version and model name, so candidates sharing the same skill lists against the
+    same JD reuse one LLM answer. Hits and misses are counted per section.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits: Dict[int, int] = defaultdict(int)
+        self.misses: Dict[int, int] = defaultdict(int)
+
+    @staticmethod
+    def make_key(
+        section_idx: int,
+        prompt_version: str,
+        model_name: str,
+        resume_section: List[Any],
+        jd_required_section: List[Any],
+        jd_optional_section: List[Any]
+    ) -> str:
+        content = json.dumps([
+            section_idx,
+            prompt_version,
+            model_name,
+            canonicalize_items(resume_section),
+            canonicalize_items(jd_required_section),
+            canonicalize_items(jd_optional_section),
+        ], ensure_ascii=False)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, section_idx: int, key: str) -> Optional[Dict[str, int]]:
+        with self._lock:
+            section_items = self._memory.get(key)
+            if section_items is None:
+                self.misses[section_idx] += 1
+                return None
+            self._memory.move_to_end(key)
+            self.hits[section_idx] += 1
+            return copy.deepcopy(section_items)
+
+    def set(self, key: str, section_items: Dict[str, int]) -> None:
+        with self._lock:
+            self._memory[key] = copy.deepcopy(section_items)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = sum(self.hits.values())
+            misses = sum(self.misses.values())
+            return {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "entries": len(self._memory),
+                "sections": {
+                    section_idx: {
+                        "hits": self.hits[section_idx],
+                        "misses": self.misses[section_idx],
+                        "hit_rate": self.hits[section_idx] / (self.hits[section_idx] + self.misses[section_idx]),
+                    }
+                    for section_idx in sorted(set(self.hits) | set(self.misses))
+                },
+            }
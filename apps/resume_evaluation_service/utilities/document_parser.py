@@ -0,0 +1,45 @@
+import io
+from typing import BinaryIO, List, Optional, Union
+import docx2txt
+from langchain_community.document_loaders.parsers.pdf import PyPDFParser
+from langchain_core.documents import Document
+from langchain_core.documents.base import Blob
+
+
+DocumentData = Union[bytes, bytearray, memoryview, BinaryIO]
+
+
+def _to_bytes(data: DocumentData) -> bytes:
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, (bytearray, memoryview)):
+        return bytes(data)
+    return data.read()
+
+
+def parse_pdf(data: DocumentData, source: Optional[str] = None, max_pages: Optional[int] = None) -> List[Document]:
+    """
+    Parse a PDF held in memory into one document per page, same as PyPDFLoader does for files.
+    Raises ValueError when the PDF has more than `max_pages` pages.
+    """
+    blob = Blob.from_data(_to_bytes(data), path=source, mime_type="application/pdf")
+    documents = []
+    for document in PyPDFParser().lazy_parse(blob):
+        if max_pages is not None and len(documents) >= max_pages:
+            raise ValueError(f"PDF {source or '<bytes>'} has more than {max_pages} pages")
+        documents.append(document)
+    return documents
+
+
+def parse_docx(data: DocumentData, source: Optional[str] = None) -> List[Document]:
+    """Parse a DOCX held in memory into a single document, same as Docx2txtLoader does for files."""
+    content = docx2txt.process(io.BytesIO(_to_bytes(data)))
+    return [Document(page_content=content, metadata={"source": source})]
+
+
+def extract_pdf_text(data: DocumentData, max_pages: Optional[int] = None) -> str:
+    return "\n".join(doc.page_content for doc in parse_pdf(data, max_pages=max_pages))
+
+
+def extract_docx_text(data: DocumentData) -> str:
+    return "\n".join(doc.page_content for doc in parse_docx(data))
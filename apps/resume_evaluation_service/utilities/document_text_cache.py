@@ -0,0 +1,119 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from logging import Logger
+from typing import Any, Dict, Optional
+from common_modules.caches.blob_store import create_blob_store
+
+
+def content_key(content: bytes) -> str:
+    """Cache key of uploaded bytes: their SHA-256."""
+    return "sha256:" + hashlib.sha256(content).hexdigest()
+
+
+def s3_object_key(bucket: str, key: str, etag: str) -> str:
+    """Cache key of an S3 object version: bucket, key and ETag."""
+    etag = etag.strip('"')
+    return f"s3:{bucket}/{key}@{etag}"
+
+
+class DocumentTextCache:
+    """
+    Extracted document text, keyed by content hash (uploads) or bucket/key/ETag (S3 objects).
+
+    An in-process LRU holds at most `max_bytes` of text, in front of the persistent tier of `create_blob_store`
+    that replicas sharing the Redis server read too. Store errors are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        redis_url: Optional[str] = None,
+        disk_path: Optional[str] = None,
+        ttl_seconds: Optional[int] = None
+    ):
+        self.max_bytes = max_bytes
+        self.logger = Logger(self.__class__.__name__)
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.store = create_blob_store(
+            redis_url, disk_path, prefix="document_text:", table="document_text_blobs", ttl_seconds=ttl_seconds, logger=self.logger
+        )
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached text, or None when it is not cached."""
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return text
+
+        if self.store is not None:
+            try:
+                value = self.store.get(key)
+                text = value.decode("utf-8") if value is not None else None
+            except Exception as ex:
+                self.logger.error(f"Error while reading document text cache: {ex}")
+                text = None
+            if text is not None:
+                self.persistent_hits += 1
+                self._remember(key, text)
+                return text
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, text: str) -> None:
+        self._remember(key, text)
+
+        if self.store is not None:
+            try:
+                self.store.set(key, text.encode("utf-8"))
+            except Exception as ex:
+                self.logger.error(f"Error while writing document text cache: {ex}")
+
+    def _remember(self, key: str, text: str) -> None:
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous.encode("utf-8"))
+            self._memory[key] = text
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted.encode("utf-8"))
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "persistent_store": type(self.store).__name__ if self.store is not None else None,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_document_text_cache() -> DocumentTextCache:
+    """Process-wide document text cache configured via environment variables."""
+    ttl_seconds = int(os.getenv("DOCUMENT_TEXT_CACHE_TTL_SECONDS", 0))
+    return DocumentTextCache(
+        max_bytes=int(os.getenv("DOCUMENT_TEXT_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+        redis_url=os.getenv("DOCUMENT_TEXT_CACHE_REDIS_URL"),
+        disk_path=os.getenv("DOCUMENT_TEXT_CACHE_PATH"),
+        ttl_seconds=ttl_seconds or None,
+    )
@@ -0,0 +1,247 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from logging import Logger
+from typing import Any, Dict, Generic, List, NamedTuple, Optional, Type, TypeVar
+from langchain_core.language_models.chat_models import BaseChatModel
+from pydantic import BaseModel
+from utilities.postgres import connect_postgres, get_postgres_conninfo
+
+T = TypeVar("T", bound=BaseModel)
+
+
+def get_prompt_version(prompt_messages: Any, output_schema: Type[BaseModel]) -> str:
+    """Version of an extraction prompt: a hash of its messages and output schema, so editing either invalidates entries."""
+    content = json.dumps([repr(prompt_messages), output_schema.model_json_schema()], sort_keys=True)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+def get_model_name(llm: BaseChatModel) -> str:
+    for attribute in ("model", "model_name", "model_id"):
+        value = getattr(llm, attribute, None)
+        if isinstance(value, str) and value:
+            return value
+    return type(llm).__name__
+
+
+class PostgresExtractionTable:
+    """Persistent tier: one row per extraction, the model stored as JSONB."""
+
+    def __init__(self, conninfo: Dict[str, Any], table: str):
+        self.conninfo = conninfo
+        self.table = table
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _execute(self, query: str, params: tuple = ()):
+        """Execute a query, returning the fetched rows or, for statements without result, the row count."""
+        with self._lock:
+            try:
+                if self._connection is None or self._connection.closed:
+                    self._connection = connect_postgres(self.conninfo)
+                    self._create_table(self._connection)
+                with self._connection.cursor() as cursor:
+                    cursor.execute(query, params)
+                    return cursor.fetchall() if cursor.description else cursor.rowcount
+            except Exception:
+                # Reconnect on the next call
+                self._connection = None
+                raise
+
+    def _create_table(self, connection) -> None:
+        connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                cache_key TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                model_name TEXT NOT NULL,
+                payload JSONB NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+
+    def get(self, cache_key: str) -> Optional[str]:
+        rows = self._execute(f"SELECT payload::text FROM {self.table} WHERE cache_key = %s", (cache_key,))
+        return rows[0][0] if rows else None
+
+    def find(self, content_hash: str) -> List[tuple]:
+        return self._execute(
+            f"SELECT prompt_version, model_name, payload::text FROM {self.table} WHERE content_hash = %s",
+            (content_hash,),
+        )
+
+    def delete(self, content_hash: str) -> int:
+        return self._execute(f"DELETE FROM {self.table} WHERE content_hash = %s", (content_hash,))
+
+    def set(self, cache_key: str, content_hash: str, prompt_version: str, model_name: str, payload: str) -> None:
+        self._execute(
+            f"""
+            INSERT INTO {self.table} (cache_key, content_hash, prompt_version, model_name, payload)
+            VALUES (%s, %s, %s, %s, %s::jsonb)
+            ON CONFLICT (cache_key) DO UPDATE SET payload = EXCLUDED.payload, created_at = now()
+            """,
+            (cache_key, content_hash, prompt_version, model_name, payload),
+        )
+
+
+class StoredExtraction(NamedTuple, Generic[T]):
+    content_hash: str
+    prompt_version: str
+    model_name: str
+    value: T
+
+
+class ExtractionStore(Generic[T]):
+    """
+    Structured extraction results keyed by document content hash, prompt version and model name.
+
+    Results are kept in an in-process LRU of `max_entries` models and, when configured,
+    in a Postgres table. Store errors are logged and treated as misses.
+
+    With a table, entries of the LRU are read again from the table after `memory_ttl_seconds`,
+    so that an invalidation on another replica is seen by this one within that delay.
+    """
+
+    def __init__(
+        self,
+        model_type: Type[T],
+        table: Optional[PostgresExtractionTable] = None,
+        max_entries: int = 1000,
+        memory_ttl_seconds: Optional[float] = 300
+    ):
+        self.model_type = model_type
+        self.table = table
+        self.max_entries = max_entries
+        self.memory_ttl_seconds = memory_ttl_seconds
+        self.logger = Logger(f"{model_type.__name__}ExtractionStore")
+        self._memory: "OrderedDict[str, StoredExtraction[T]]" = OrderedDict()
+        self._remembered_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_content_hash(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_key(content_hash: str, prompt_version: str, model_name: str) -> str:
+        return hashlib.sha256(f"{content_hash}\0{prompt_version}\0{model_name}".encode("utf-8")).hexdigest()
+
+    def get(self, content: str, prompt_version: str, model_name: str) -> Optional[T]:
+        """Return the stored extraction of the content, or None."""
+        content_hash = self.get_content_hash(content)
+        key = self.make_key(content_hash, prompt_version, model_name)
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self._is_expired(key):
+                # Possibly invalidated by another replica, read it again from the table
+                self._forget(key)
+                entry = None
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry.value.model_copy(deep=True)
+
+        if self.table is not None:
+            try:
+                payload = self.table.get(key)
+            except Exception as ex:
+                self.logger.error(f"Error while reading {self.table.table}: {ex}")
+                payload = None
+            if payload is not None:
+                value = self.model_type.model_validate_json(payload)
+                self.persistent_hits += 1
+                self._remember(key, StoredExtraction(content_hash, prompt_version, model_name, value))
+                return value.model_copy(deep=True)
+
+        self.misses += 1
+        return None
+
+    def put(self, content: str, prompt_version: str, model_name: str, value: T) -> None:
+        content_hash = self.get_content_hash(content)
+        key = self.make_key(content_hash, prompt_version, model_name)
+        self._remember(key, StoredExtraction(content_hash, prompt_version, model_name, value.model_copy(deep=True)))
+
+        if self.table is not None:
+            try:
+                self.table.set(key, content_hash, prompt_version, model_name, value.model_dump_json())
+            except Exception as ex:
+                self.logger.error(f"Error while writing {self.table.table}: {ex}")
+
+    def lookup(self, content: str) -> List[StoredExtraction[T]]:
+        """Return the stored extractions of the content for every prompt version and model."""
+        content_hash = self.get_content_hash(content)
+
+        if self.table is not None:
+            rows = self.table.find(content_hash)
+            return [
+                StoredExtraction(content_hash, prompt_version, model_name, self.model_type.model_validate_json(payload))
+                for prompt_version, model_name, payload in rows
+            ]
+
+        with self._lock:
+            return [
+                entry._replace(value=entry.value.model_copy(deep=True))
+                for entry in self._memory.values()
+                if entry.content_hash == content_hash
+            ]
+
+    def invalidate(self, content: str) -> int:
+        """Remove the stored extractions of the content. Returns the number of removed entries."""
+        content_hash = self.get_content_hash(content)
+
+        with self._lock:
+            keys = [key for key, entry in self._memory.items() if entry.content_hash == content_hash]
+            for key in keys:
+                self._forget(key)
+
+        if self.table is not None:
+            return self.table.delete(content_hash)
+        return len(keys)
+
+    def _is_expired(self, key: str) -> bool:
+        if self.table is None or self.memory_ttl_seconds is None:
+            # Without table, the LRU is the only copy
+            return False
+        return time.monotonic() - self._remembered_at[key] > self.memory_ttl_seconds
+
+    def _forget(self, key: str) -> None:
+        del self._memory[key]
+        del self._remembered_at[key]
+
+    def _remember(self, key: str, entry: StoredExtraction[T]) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            self._remembered_at[key] = time.monotonic()
+            while len(self._memory) > self.max_entries:
+                evicted, _ = self._memory.popitem(last=False)
+                del self._remembered_at[evicted]
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "persistent_store": self.table.table if self.table is not None else None,
+        }
+
+
+def create_extraction_store(model_type: Type[T], table_name: str, max_entries: int = 1000) -> ExtractionStore[T]:
+    """
+    Create an extraction store backed by the Postgres table when POSTGRES_HOST is set, in memory otherwise.
+    EXTRACTION_MEMORY_TTL_SECONDS (300 by default) bounds how long replicas serve invalidated entries, 0 keeps them until evicted.
+    """
+    conninfo = get_postgres_conninfo()
+    table = PostgresExtractionTable(conninfo, table_name) if conninfo is not None else None
+    memory_ttl_seconds = float(os.getenv("EXTRACTION_MEMORY_TTL_SECONDS", 300))
+    return ExtractionStore(model_type, table=table, max_entries=max_entries, memory_ttl_seconds=memory_ttl_seconds or None)
@@ -0,0 +1,437 @@
+import asyncio
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from logging import Logger
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from pydantic import BaseModel
+from utilities.postgres import connect_postgres, get_postgres_conninfo
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobQueueFullError(RuntimeError):
+    pass
+
+
+class Job(BaseModel):
+    job_id: str
+    kind: str
+    payload: Dict[str, Any]
+    status: str = QUEUED
+    attempts: int = 0
+    max_attempts: int = 1
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class MemoryJobStore:
+    """Jobs of this process only, lost on restart."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._available_at: Dict[str, datetime] = {}
+        self._locked_until: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: Job) -> None:
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._available_at[job.job_id] = job.created_at
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.model_copy() if job is not None else None
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            return sum(job.status == status for job in self._jobs.values())
+
+    def claim(self, lease_seconds: float) -> Optional[Job]:
+        now = _now()
+        with self._lock:
+            candidates = [
+                job for job in self._jobs.values()
+                if (job.status == QUEUED and self._available_at[job.job_id] <= now)
+                or (job.status == RUNNING and self._locked_until[job.job_id] < now)
+            ]
+            if not candidates:
+                return None
+            job = min(candidates, key=lambda job: job.created_at)
+            job.status, job.attempts, job.updated_at = RUNNING, job.attempts + 1, now
+            self._locked_until[job.job_id] = now + timedelta(seconds=lease_seconds)
+            return job.model_copy()
+
+    def heartbeat(self, job_id: str, lease_seconds: float) -> bool:
+        with self._lock:
+            job = self._jobs[job_id]
+            if job.status != RUNNING:
+                return False
+            self._locked_until[job_id] = _now() + timedelta(seconds=lease_seconds)
+            return True
+
+    def finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            if job.status == RUNNING:
+                job.status, job.result, job.error, job.updated_at = status, result, error, _now()
+
+    def retry_later(self, job_id: str, error: str, delay_seconds: float) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            if job.status == RUNNING:
+                job.status, job.error, job.updated_at = QUEUED, error, _now()
+                self._available_at[job_id] = job.updated_at + timedelta(seconds=delay_seconds)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status in (QUEUED, RUNNING):
+                job.status, job.updated_at = CANCELLED, _now()
+            return job.model_copy() if job is not None else None
+
+    def requeue(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status in (FAILED, CANCELLED):
+                job.status, job.attempts, job.result, job.error, job.updated_at = QUEUED, 0, None, None, _now()
+                self._available_at[job_id] = job.updated_at
+            return job.model_copy() if job is not None else None
+
+
+class PostgresJobStore:
+    """Jobs in a Postgres table, shared by every replica. Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED."""
+
+    COLUMNS = "job_id, kind, payload::text, status, attempts, max_attempts, result::text, error, created_at, updated_at"
+
+    def __init__(self, conninfo: Dict[str, Any], table: str = "evaluation_jobs"):
+        self.conninfo = conninfo
+        self.table = table
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _execute(self, query: str, params: tuple = ()):
+        """Execute a query, returning the fetched rows or, for statements without result, the row count."""
+        with self._lock:
+            try:
+                if self._connection is None or self._connection.closed:
+                    self._connection = connect_postgres(self.conninfo)
+                    self._create_table(self._connection)
+                with self._connection.cursor() as cursor:
+                    cursor.execute(query, params)
+                    return cursor.fetchall() if cursor.description else cursor.rowcount
+            except Exception:
+                # Reconnect on the next call
+                self._connection = None
+                raise
+
+    def _create_table(self, connection) -> None:
+        connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload JSONB NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                result JSONB,
+                error TEXT,
+                available_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                locked_until TIMESTAMPTZ,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_status_idx ON {self.table} (status, available_at)")
+
+    @staticmethod
+    def _to_job(row: tuple) -> Job:
+        job_id, kind, payload, status, attempts, max_attempts, result, error, created_at, updated_at = row
+        return Job(
+            job_id=job_id,
+            kind=kind,
+            payload=json.loads(payload),
+            status=status,
+            attempts=attempts,
+            max_attempts=max_attempts,
+            result=json.loads(result) if result is not None else None,
+            error=error,
+            created_at=created_at,
+            updated_at=updated_at,
+        )
+
+    def create(self, job: Job) -> None:
+        self._execute(
+            f"""
+            INSERT INTO {self.table} (job_id, kind, payload, status, attempts, max_attempts, created_at, updated_at)
+            VALUES (%s, %s, %s::jsonb, %s, %s, %s, %s, %s)
+            """,
+            (job.job_id, job.kind, json.dumps(job.payload), job.status, job.attempts, job.max_attempts, job.created_at, job.updated_at),
+        )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        rows = self._execute(f"SELECT {self.COLUMNS} FROM {self.table} WHERE job_id = %s", (job_id,))
+        return self._to_job(rows[0]) if rows else None
+
+    def count(self, status: str) -> int:
+        return self._execute(f"SELECT count(*) FROM {self.table} WHERE status = %s", (status,))[0][0]
+
+    def claim(self, lease_seconds: float) -> Optional[Job]:
+        # Running jobs whose lease expired belong to a worker that died, they are claimed again
+        rows = self._execute(
+            f"""
+            UPDATE {self.table}
+            SET status = %s, attempts = attempts + 1, locked_until = now() + %s * interval '1 second', updated_at = now()
+            WHERE job_id = (
+                SELECT job_id FROM {self.table}
+                WHERE (status = %s AND available_at <= now()) OR (status = %s AND locked_until < now())
+                ORDER BY created_at
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING {self.COLUMNS}
+            """,
+            (RUNNING, lease_seconds, QUEUED, RUNNING),
+        )
+        return self._to_job(rows[0]) if rows else None
+
+    def heartbeat(self, job_id: str, lease_seconds: float) -> bool:
+        return bool(self._execute(
+            f"""
+            UPDATE {self.table} SET locked_until = now() + %s * interval '1 second'
+            WHERE job_id = %s AND status = %s
+            """,
+            (lease_seconds, job_id, RUNNING),
+        ))
+
+    def finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        self._execute(
+            f"""
+            UPDATE {self.table} SET status = %s, result = %s::jsonb, error = %s, locked_until = NULL, updated_at = now()
+            WHERE job_id = %s AND status = %s
+            """,
+            (status, json.dumps(result) if result is not None else None, error, job_id, RUNNING),
+        )
+
+    def retry_later(self, job_id: str, error: str, delay_seconds: float) -> None:
+        self._execute(
+            f"""
+            UPDATE {self.table}
+            SET status = %s, error = %s, available_at = now() + %s * interval '1 second', locked_until = NULL, updated_at = now()
+            WHERE job_id = %s AND status = %s
+            """,
+            (QUEUED, error, delay_seconds, job_id, RUNNING),
+        )
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        self._execute(
+            f"UPDATE {self.table} SET status = %s, updated_at = now() WHERE job_id = %s AND status IN (%s, %s)",
+            (CANCELLED, job_id, QUEUED, RUNNING),
+        )
+        return self.get(job_id)
+
+    def requeue(self, job_id: str) -> Optional[Job]:
+        self._execute(
+            f"""
+            UPDATE {self.table}
+            SET status = %s, attempts = 0, result = NULL, error = NULL, available_at = now(), updated_at = now()
+            WHERE job_id = %s AND status IN (%s, %s)
+            """,
+            (QUEUED, job_id, FAILED, CANCELLED),
+        )
+        return self.get(job_id)
+
+
+class JobQueue:
+    """
+    Bounded pool of asyncio workers running submitted jobs with their registered handler.
+
+    Workers claim jobs from the store under a lease that they renew while the handler runs, so that the jobs of a
+    dead worker are claimed again once the lease expires. A failed job is retried up to its `max_attempts` with a
+    linear backoff. Cancelling a job stops its handler, also when another replica runs it (seen on the next heartbeat).
+    At most `max_queued` jobs wait at a time.
+    """
+
+    def __init__(
+        self,
+        store,
+        workers: int = 2,
+        max_attempts: int = 3,
+        retry_backoff_seconds: float = 10.0,
+        lease_seconds: float = 60.0,
+        poll_seconds: float = 1.0,
+        max_queued: Optional[int] = None
+    ):
+        self.store = store
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.max_queued = max_queued
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {}
+        self.logger = Logger("job_queue")
+        self._worker_tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self.cancelled = 0
+
+    def register(self, kind: str, handler: Callable[[Dict[str, Any]], Awaitable[Any]]) -> None:
+        """Register the coroutine running the jobs of a kind. It gets the job payload and returns a JSON-serializable result."""
+        self.handlers[kind] = handler
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._worker_tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    async def submit(self, kind: str, payload: Dict[str, Any], max_attempts: Optional[int] = None) -> Job:
+        if kind not in self.handlers:
+            raise ValueError(f"Unsupported job kind: {kind}")
+        if self.max_queued is not None and await asyncio.to_thread(self.store.count, QUEUED) >= self.max_queued:
+            raise JobQueueFullError(f"Too many queued jobs (max {self.max_queued})")
+
+        now = _now()
+        job = Job(
+            job_id=str(uuid.uuid4()),
+            kind=kind,
+            payload=payload,
+            max_attempts=max_attempts or self.max_attempts,
+            created_at=now,
+            updated_at=now,
+        )
+        await asyncio.to_thread(self.store.create, job)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        job = await asyncio.to_thread(self.store.cancel, job_id)
+        task = self._running.get(job_id)
+        if job is not None and job.status == CANCELLED and task is not None:
+            task.cancel()
+        return job
+
+    async def retry(self, job_id: str) -> Optional[Job]:
+        """Queue a failed or cancelled job again, with fresh attempts."""
+        job = await asyncio.to_thread(self.store.requeue, job_id)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim, self.lease_seconds)
+            except Exception as ex:
+                self.logger.error(f"Error while claiming a job: {ex}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._run(job)
+            except Exception as ex:
+                # The job is claimed again once its lease expires
+                self.logger.error(f"Error while running job {job.job_id}: {ex}")
+
+    async def _heartbeat(self, job_id: str) -> Optional[bool]:
+        # None when the store is unreachable: the lease is unknown, so the job keeps running and the heartbeat is retried
+        try:
+            return await asyncio.to_thread(self.store.heartbeat, job_id, self.lease_seconds)
+        except Exception as ex:
+            self.logger.error(f"Error while extending the lease of job {job_id}: {ex}")
+            return None
+
+    async def _run(self, job: Job) -> None:
+        if job.attempts > job.max_attempts:
+            # Claimed again after its worker died on the last attempt
+            await asyncio.to_thread(self.store.finish, job.job_id, FAILED, None, "Worker lost while running the job")
+            self.failed += 1
+            return
+
+        task = asyncio.create_task(self.handlers[job.kind](job.payload))
+        self._running[job.job_id] = task
+        try:
+            while not task.done():
+                await asyncio.wait({task}, timeout=self.lease_seconds / 3)
+                if not task.done() and await self._heartbeat(job.job_id) is False:
+                    # Cancelled, possibly from another replica
+                    task.cancel()
+                    await asyncio.wait({task})
+
+            if task.cancelled():
+                self.cancelled += 1
+            elif task.exception() is None:
+                await asyncio.to_thread(self.store.finish, job.job_id, SUCCEEDED, task.result())
+                self.succeeded += 1
+            elif job.attempts < job.max_attempts:
+                self.logger.error(f"Error while running job {job.job_id} (attempt {job.attempts}): {task.exception()}")
+                await asyncio.to_thread(
+                    self.store.retry_later, job.job_id, str(task.exception()), self.retry_backoff_seconds * job.attempts
+                )
+                self.retried += 1
+            else:
+                self.logger.error(f"Error while running job {job.job_id}, giving up: {task.exception()}")
+                await asyncio.to_thread(self.store.finish, job.job_id, FAILED, None, str(task.exception()))
+                self.failed += 1
+        finally:
+            # Worker stopped or store error: the job is claimed again once its lease expires
+            if not task.done():
+                task.cancel()
+            self._running.pop(job.job_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "store": type(self.store).__name__,
+            "workers": self.workers,
+            "running": len(self._running),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retried": self.retried,
+            "cancelled": self.cancelled,
+        }
+
+
+def create_job_queue() -> JobQueue:
+    """Create the job queue configured via environment variables, backed by Postgres when POSTGRES_HOST is set."""
+    conninfo = get_postgres_conninfo()
+    max_queued = int(os.getenv("JOB_MAX_QUEUED", 0))
+    return JobQueue(
+        store=PostgresJobStore(conninfo) if conninfo is not None else MemoryJobStore(),
+        workers=int(os.getenv("JOB_WORKERS", 2)),
+        max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", 3)),
+        retry_backoff_seconds=float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", 10)),
+        lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", 60)),
+        max_queued=max_queued or None,
+    )
@@ -1,10 +1,16 @@
+import io
 import os
-import tempfile
 from typing import Dict, Any, List, Optional
+import asyncio
 import boto3
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
 from botocore.client import Config
-from langchain_community.document_loaders import PyPDFLoader
+from fastapi import BackgroundTasks
 from langchain_core.documents import Document
+from utilities.document_text_cache import content_key, get_document_text_cache, s3_object_key
+from utilities.parsing_executor import get_parsing_executor
+from utilities.resume_index import ResumeIndex
 
 
 class MinIOPDFLoader:
@@ -46,6 +52,22 @@ class MinIOPDFLoader:
             verify=False  # NOTE: Set to True in production with proper SSL certificates
         )
 
+    def _create_async_s3_client(self):
+        """Create an async S3 client for MinIO. Use it as an async context manager."""
+        return get_session().create_client(
+            's3',
+            endpoint_url=self.config['endpoint_url'],
+            aws_access_key_id=self.config['access_key'],
+            aws_secret_access_key=self.config['secret_key'],
+            region_name=self.config.get('region_name', 'us-east-1'),
+            config=AioConfig(
+                signature_version='s3v4',
+                s3={'addressing_style': 'path'}
+            ),
+            use_ssl=self.config.get('use_ssl', True),
+            verify=False  # NOTE: Set to True in production with proper SSL certificates
+        )
+
     def _load_config(self, base_config: Dict[str, Any], **kwargs) -> Dict[str, Any]:
         """
         Load configuration from provided dictionary, kwargs, and environment variables.
@@ -80,7 +102,7 @@ class MinIOPDFLoader:
 
         return config
 
-    def load_pdf_from_s3_uri(self, s3_uri: str) -> List[Document]:
+    def _parse_s3_uri(self, s3_uri: str) -> str:
         if not s3_uri.startswith('s3://'):
             raise ValueError("URI must start with 's3://'")
 
@@ -91,46 +113,90 @@ class MinIOPDFLoader:
         if bucket != self.bucket_name:
             raise ValueError(f"Bucket in URI ({bucket}) doesn't match configured bucket ({self.bucket_name})")
 
+        return key
+
+    def load_pdf_from_s3_uri(self, s3_uri: str) -> List[Document]:
+        key = self._parse_s3_uri(s3_uri)
         return self._load_pdf_by_key(key, s3_uri)
 
+    async def aload_pdf_from_s3_uri(self, s3_uri: str) -> List[Document]:
+        key = self._parse_s3_uri(s3_uri)
+        return await self._aload_pdf_by_key(key, s3_uri)
+
     def load_pdf_by_key(self, object_key: str) -> List[Document]:
         s3_uri = f"s3://{self.bucket_name}/{object_key}"
         return self._load_pdf_by_key(object_key, s3_uri)
 
     def _load_pdf_by_key(self, object_key: str, s3_uri: str) -> List[Document]:
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-            try:
-                self.s3_client.download_file(self.bucket_name, object_key, temp_file.name)
-                loader = PyPDFLoader(temp_file.name)
-                documents = loader.load()
-
-                for doc in documents:
-                    doc.metadata.update({
-                        's3_uri': s3_uri,
-                        'bucket': self.bucket_name,
-                        'key': object_key,
-                        'source_type': 'minio_s3',
-                        'loader_type': 'minio_pdf_loader'
-                    })
-                return documents
-            finally:
-                if os.path.exists(temp_file.name):
-                    os.unlink(temp_file.name)
+        response = self.s3_client.get_object(Bucket=self.bucket_name, Key=object_key)
+        content = response['Body'].read()
+        documents = get_parsing_executor().parse_pdf(content, s3_uri)
+        return self._add_metadata(documents, object_key, s3_uri)
+
+    async def _aload_pdf_by_key(self, object_key: str, s3_uri: str) -> List[Document]:
+        async with self._create_async_s3_client() as s3_client:
+            response = await s3_client.get_object(Bucket=self.bucket_name, Key=object_key)
+            async with response['Body'] as stream:
+                content = await stream.read()
+
+        documents = await get_parsing_executor().aparse_pdf(content, s3_uri)
+        return self._add_metadata(documents, object_key, s3_uri)
+
+    def _add_metadata(self, documents: List[Document], object_key: str, s3_uri: str) -> List[Document]:
+        for doc in documents:
+            doc.metadata.update({
+                's3_uri': s3_uri,
+                'bucket': self.bucket_name,
+                'key': object_key,
+                'source_type': 'minio_s3',
+                'loader_type': 'minio_pdf_loader'
+            })
+        return documents
 
     def get_text_content(self, s3_uri: str) -> str:
-        documents = self.load_pdf_from_s3_uri(s3_uri)
-        return "\n".join(doc.page_content for doc in documents)
+        key = self._parse_s3_uri(s3_uri)
+        return self._get_text_content(key, s3_uri)
+
+    async def aget_text_content(self, s3_uri: str) -> str:
+        key = self._parse_s3_uri(s3_uri)
+        text_cache = get_document_text_cache()
+
+        async with self._create_async_s3_client() as s3_client:
+            response = await s3_client.head_object(Bucket=self.bucket_name, Key=key)
+        cache_key = s3_object_key(self.bucket_name, key, response['ETag'])
+
+        text = await asyncio.to_thread(text_cache.get, cache_key)
+        if text is None:
+            documents = await self._aload_pdf_by_key(key, s3_uri)
+            text = "\n".join(doc.page_content for doc in documents)
+            await asyncio.to_thread(text_cache.set, cache_key, text)
+        return text
 
     def get_text_content_by_key(self, object_key: str) -> str:
-        documents = self.load_pdf_by_key(object_key)
-        return "\n".join(doc.page_content for doc in documents)
+        s3_uri = f"s3://{self.bucket_name}/{object_key}"
+        return self._get_text_content(object_key, s3_uri)
+
+    def _get_text_content(self, object_key: str, s3_uri: str) -> str:
+        # Cached by object version, so an unchanged object is neither downloaded nor parsed again
+        text_cache = get_document_text_cache()
+        response = self.s3_client.head_object(Bucket=self.bucket_name, Key=object_key)
+        cache_key = s3_object_key(self.bucket_name, object_key, response['ETag'])
+
+        text = text_cache.get(cache_key)
+        if text is None:
+            documents = self._load_pdf_by_key(object_key, s3_uri)
+            text = "\n".join(doc.page_content for doc in documents)
+            text_cache.set(cache_key, text)
+        return text
 
     def list_pdfs(self, prefix: str = "") -> List[str]:
         try:
-            response = self.s3_client.list_objects_v2(Bucket=self.bucket_name, Prefix=prefix)
+            # list_objects_v2 returns at most 1000 keys per page
+            paginator = self.s3_client.get_paginator('list_objects_v2')
             pdf_keys = [
                 obj['Key']
-                for obj in response.get('Contents', [])
+                for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix)
+                for obj in page.get('Contents', [])
                 if obj['Key'].lower().endswith('.pdf')
             ]
             return pdf_keys
@@ -159,7 +225,8 @@ class MinIOPDFUploader:
         region_name: str = None,
         access_key: str = None,
         secret_key: str = None,
-        use_ssl: bool = None
+        use_ssl: bool = None,
+        resume_index: Optional[ResumeIndex] = None
     ):
         """
         Initialize MinIO PDF Uploader with either provided values or environment variables.
@@ -171,6 +238,7 @@ class MinIOPDFUploader:
             access_key: MinIO access key
             secret_key: MinIO secret key
             use_ssl: Whether to use SSL (default: True if env MINIO_USE_SSL is "true")
+            resume_index: Optional index to which uploaded resumes are added
         """
         self.endpoint_url = endpoint_url or os.getenv("MINIO_ENDPOINT_URL")
         self.bucket_name = bucket_name or os.getenv("MINIO_BUCKET_NAME")
@@ -184,6 +252,8 @@ class MinIOPDFUploader:
         else:
             self.use_ssl = use_ssl
 
+        self.resume_index = resume_index
+
         # Create S3 client
         self.s3_client = boto3.client(
             "s3",
@@ -196,6 +266,19 @@ class MinIOPDFUploader:
             verify=False  # Change to True if you have valid SSL certs
         )
 
+    def _create_async_s3_client(self):
+        """Create an async S3 client for MinIO. Use it as an async context manager."""
+        return get_session().create_client(
+            "s3",
+            endpoint_url=self.endpoint_url,
+            aws_access_key_id=self.access_key,
+            aws_secret_access_key=self.secret_key,
+            region_name=self.region_name,
+            config=AioConfig(signature_version="s3v4", s3={"addressing_style": "path"}),
+            use_ssl=self.use_ssl,
+            verify=False  # Change to True if you have valid SSL certs
+        )
+
     def upload_file(self, file_path: str, object_name: str = None) -> str:
         """Upload a local file to MinIO and return its S3 URI."""
         if not object_name:
@@ -203,18 +286,93 @@ class MinIOPDFUploader:
 
         try:
             self.s3_client.upload_file(file_path, self.bucket_name, object_name)
-            return f"s3://{self.bucket_name}/{object_name}"
+            s3_uri = f"s3://{self.bucket_name}/{object_name}"
         except Exception as e:
             raise RuntimeError(f"Failed to upload {file_path} to MinIO: {e}")
 
+        if self.resume_index is not None:
+            with open(file_path, "rb") as f:
+                self._index_pdf(f.read(), object_name)
+        return s3_uri
+
+    def upload_fileobj(self, fileobj, object_name: str) -> str:
+        """Stream a binary file-like object to MinIO and return its S3 URI."""
+        try:
+            if self.resume_index is None:
+                self.s3_client.upload_fileobj(fileobj, self.bucket_name, object_name)
+                return f"s3://{self.bucket_name}/{object_name}"
+
+            # The content is also needed for indexing, so read it once
+            content = fileobj.read()
+            self.s3_client.upload_fileobj(io.BytesIO(content), self.bucket_name, object_name)
+            s3_uri = f"s3://{self.bucket_name}/{object_name}"
+        except Exception as e:
+            raise RuntimeError(f"Failed to upload {object_name} to MinIO: {e}")
+
+        self._index_pdf(content, object_name)
+        return s3_uri
+
     def upload_fastapi_file(self, upload_file, object_name: str = None) -> str:
         """Upload a FastAPI UploadFile directly to MinIO."""
         if not object_name:
             object_name = upload_file.filename
 
-        with tempfile.NamedTemporaryFile(delete=False) as tmp:
-            tmp.write(upload_file.file.read())
-            tmp.flush()
-            return self.upload_file(tmp.name, object_name)
+        return self.upload_fileobj(upload_file.file, object_name)
 
+    async def aupload_fastapi_file(
+        self, upload_file, object_name: str = None, background_tasks: Optional[BackgroundTasks] = None
+    ) -> str:
+        """
+        Upload a FastAPI UploadFile to MinIO without blocking the event loop. With `background_tasks`,
+        the resume is indexed after the response is sent instead of before returning.
+        """
+        if not object_name:
+            object_name = upload_file.filename
+
+        try:
+            content = await upload_file.read()
+            async with self._create_async_s3_client() as s3_client:
+                response = await s3_client.put_object(Bucket=self.bucket_name, Key=object_name, Body=content)
+            s3_uri = f"s3://{self.bucket_name}/{object_name}"
+        except Exception as e:
+            raise RuntimeError(f"Failed to upload {upload_file.filename} to MinIO: {e}")
+
+        if self.resume_index is not None:
+            if background_tasks is not None:
+                background_tasks.add_task(self._index_pdf, content, object_name, response.get('ETag'))
+            else:
+                await asyncio.to_thread(self._index_pdf, content, object_name, response.get('ETag'))
+        return s3_uri
 
+    def delete_object(self, object_name: str) -> None:
+        """Delete an object from MinIO and from the resume index."""
+        try:
+            self.s3_client.delete_object(Bucket=self.bucket_name, Key=object_name)
+        except Exception as e:
+            raise RuntimeError(f"Failed to delete {object_name} from MinIO: {e}")
+
+        if self.resume_index is not None:
+            self.resume_index.delete(f"s3://{self.bucket_name}/{object_name}")
+
+    def _index_pdf(self, content: bytes, object_name: str, etag: Optional[str] = None) -> None:
+        s3_uri = f"s3://{self.bucket_name}/{object_name}"
+        try:
+            text = self._extract_text(content, s3_uri)
+            if etag:
+                # Lets the loader reuse the text of the object that was just uploaded
+                get_document_text_cache().set(s3_object_key(self.bucket_name, object_name, etag), text)
+            self.resume_index.upsert(s3_uri, text, {"bucket": self.bucket_name})
+        except Exception as e:
+            # Indexing is best effort, the upload itself succeeded
+            print(f"Failed to index {s3_uri}: {e}")
+
+    def _extract_text(self, content: bytes, s3_uri: str) -> str:
+        text_cache = get_document_text_cache()
+        cache_key = content_key(content)
+
+        text = text_cache.get(cache_key)
+        if text is None:
+            documents = get_parsing_executor().parse_pdf(content, s3_uri)
+            text = "\n".join(doc.page_content for doc in documents)
+            text_cache.set(cache_key, text)
+        return text
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, partial
+from logging import Logger
+from typing import Any, Callable, List, Optional, Tuple
+from langchain_core.documents import Document
+from utilities.document_parser import parse_docx, parse_pdf
+
+
+class ParserBusyError(RuntimeError):
+    """Raised when the parsing queue is full."""
+
+
+class DocumentParsingExecutor:
+    """
+    Runs CPU-bound document parsing in a pool of worker processes, so parsing neither
+    blocks the event loop nor is limited to one core by the GIL.
+
+    At most `max_workers + max_pending` documents are accepted at once, further submissions
+    fail with ParserBusyError. Each document must be parsed within `timeout_seconds`, past which
+    the pool is recycled to stop its worker.
+    PDFs with more than `max_pages` pages are rejected with ValueError.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: int = 32,
+        timeout_seconds: float = 30.0,
+        max_pages: Optional[int] = 50
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self.max_pages = max_pages
+        self.logger = Logger(self.__class__.__name__)
+        self._slots = threading.BoundedSemaphore(self.max_workers + max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def _reset_executor(self, executor: ProcessPoolExecutor, terminate: bool = False) -> None:
+        # A worker died (e.g. killed for memory), the pool cannot be used anymore
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        if terminate:
+            # A running task cannot be cancelled, its worker is stopped instead. The other tasks running
+            # in the pool fail with BrokenProcessPool
+            for process in list((executor._processes or {}).values()):
+                process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn: Callable, *args: Any, **kwargs: Any) -> Future:
+        """Submit a picklable function to the pool. The queue slot is freed when it completes."""
+        return self._submit(fn, *args, **kwargs)[0]
+
+    def _submit(self, fn: Callable, *args: Any, **kwargs: Any) -> Tuple[Future, ProcessPoolExecutor]:
+        if not self._slots.acquire(blocking=False):
+            raise ParserBusyError("Document parsing queue is full, try again later")
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._reset_executor(executor)
+            raise
+        except Exception:
+            self._slots.release()
+            raise
+
+        def on_done(done: Future) -> None:
+            self._slots.release()
+            if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool):
+                self._reset_executor(executor)
+
+        future.add_done_callback(on_done)
+        return future, executor
+
+    def _cancel(self, future: Future, executor: ProcessPoolExecutor) -> None:
+        """Cancel a timed-out task, recycling the pool when it is already running so its worker and slot are freed."""
+        if not future.cancel():
+            self.logger.error(f"Document parsing timed out after {self.timeout_seconds}s, recycling the worker pool")
+            self._reset_executor(executor, terminate=True)
+
+    def run(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run fn in the pool and wait for its result, raising TimeoutError after `timeout_seconds`."""
+        future, executor = self._submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except TimeoutError:
+            self._cancel(future, executor)
+            raise TimeoutError(f"Document parsing timed out after {self.timeout_seconds}s")
+
+    async def arun(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Async version of run()."""
+        future, executor = self._submit(fn, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self._cancel(future, executor)
+            raise TimeoutError(f"Document parsing timed out after {self.timeout_seconds}s")
+
+    def parse_pdf(self, data: bytes, source: Optional[str] = None) -> List[Document]:
+        return self.run(partial(parse_pdf, max_pages=self.max_pages), data, source)
+
+    async def aparse_pdf(self, data: bytes, source: Optional[str] = None) -> List[Document]:
+        return await self.arun(partial(parse_pdf, max_pages=self.max_pages), data, source)
+
+    def parse_docx(self, data: bytes, source: Optional[str] = None) -> List[Document]:
+        return self.run(parse_docx, data, source)
+
+    async def aparse_docx(self, data: bytes, source: Optional[str] = None) -> List[Document]:
+        return await self.arun(parse_docx, data, source)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache(maxsize=1)
+def get_parsing_executor() -> DocumentParsingExecutor:
+    """Process-wide parsing executor configured via environment variables."""
+    max_pages = int(os.getenv("DOCUMENT_PARSER_MAX_PAGES", 50))
+    return DocumentParsingExecutor(
+        max_workers=int(os.getenv("DOCUMENT_PARSER_WORKERS", 0)) or None,
+        max_pending=int(os.getenv("DOCUMENT_PARSER_MAX_PENDING", 32)),
+        timeout_seconds=float(os.getenv("DOCUMENT_PARSER_TIMEOUT_SECONDS", 30)),
+        max_pages=max_pages or None,
+    )
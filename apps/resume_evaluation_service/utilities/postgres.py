@@ -0,0 +1,36 @@
+import os
+from typing import Any, Dict, Optional
+
+
+def _read_secret(file_env: str, value_env: str) -> Optional[str]:
+    path = os.getenv(file_env)
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return f.read().strip()
+    return os.getenv(value_env)
+
+
+def get_postgres_conninfo() -> Optional[Dict[str, Any]]:
+    """
+    Connection parameters of the LangGraph database, or None when POSTGRES_HOST is not set.
+    User and password are read from the SECRET_USER_FILE / SECRET_PASSWORD_FILE docker secrets,
+    falling back to POSTGRES_USER / POSTGRES_PASSWORD.
+    """
+    host = os.getenv("POSTGRES_HOST")
+    if not host:
+        return None
+
+    return {
+        "host": host,
+        "port": int(os.getenv("POSTGRES_PORT", 5432)),
+        "dbname": os.getenv("POSTGRES_DB", "langgraph_db"),
+        "user": _read_secret("SECRET_USER_FILE", "POSTGRES_USER"),
+        "password": _read_secret("SECRET_PASSWORD_FILE", "POSTGRES_PASSWORD"),
+    }
+
+
+def connect_postgres(conninfo: Dict[str, Any]):
+    """Open an autocommit psycopg connection."""
+    import psycopg
+
+    return psycopg.connect(**conninfo, autocommit=True)
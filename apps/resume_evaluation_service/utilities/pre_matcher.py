@@ -0,0 +1,182 @@
+import difflib
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from logging import Logger
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from utilities.resume_index import create_embeddings
+
+
+def normalize_item(item: str) -> str:
+    """Case-folded item without whitespace and separators, e.g. "Node.js" and "node js" both become "nodejs"."""
+    return re.sub(r"[\s\-_./,;:()]+", "", unicodedata.normalize("NFKC", str(item))).casefold()
+
+
+class PreMatchResult(NamedTuple):
+    # Flags of the items resolved locally, JD item names as keys
+    section_items: Dict[str, int]
+    # Resume items left to the LLM, with the JD items they may still match
+    ambiguous: List[str]
+    unmatched_required: List[str]
+    unmatched_optional: List[str]
+
+    @property
+    def is_resolved(self) -> bool:
+        return not self.ambiguous
+
+    def merge(self, llm_section_items: Dict[str, int]) -> Dict[str, int]:
+        return {**llm_section_items, **self.section_items}
+
+
+class SkillPreMatcher:
+    """
+    Deterministic matching of skill-like section items before the LLM.
+
+    A resume item matching a JD item after normalization, with a fuzzy ratio of at least `fuzzy_threshold`
+    (typos), or with an embedding cosine similarity of at least `embedding_threshold` gets the flag of
+    that JD item (1 required, 0 optional). With `unrelated_threshold`, an item less similar than that to every
+    JD item is dropped as unrelated. When every resume item is resolved, the JD items nobody matched get -1
+    and the section needs no LLM call. Otherwise only the ambiguous resume items go to the LLM.
+    """
+
+    def __init__(
+        self,
+        sections: Set[int],
+        fuzzy_threshold: float = 0.9,
+        embedding_threshold: float = 0.9,
+        unrelated_threshold: Optional[float] = None,
+        embeddings: Optional[Embeddings] = None,
+        max_cached_embeddings: int = 10000
+    ):
+        self.sections = sections
+        self.fuzzy_threshold = fuzzy_threshold
+        self.embedding_threshold = embedding_threshold
+        self.unrelated_threshold = unrelated_threshold
+        self.embeddings = embeddings
+        self.max_cached_embeddings = max_cached_embeddings
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.logger = Logger("pre_matcher")
+        self.sections_total = 0
+        self.sections_resolved = 0
+        self.items_total = 0
+        self.items_resolved = 0
+
+    def _fuzzy_match(self, item: str, candidates: Dict[str, str]) -> Optional[str]:
+        # Short items ("Go", "C#", "R") are too close to each other for a string distance to mean anything
+        if len(item) < 4:
+            return None
+        best_name, best_ratio = None, 0.0
+        for normalized, name in candidates.items():
+            if len(normalized) < 4:
+                continue
+            ratio = difflib.SequenceMatcher(None, item, normalized).ratio()
+            if ratio > best_ratio:
+                best_name, best_ratio = name, ratio
+        return best_name if best_ratio >= self.fuzzy_threshold else None
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Normalized embeddings of the texts, cached in an in-process LRU."""
+        keys = [text.casefold() for text in texts]
+        with self._lock:
+            vectors = {key: self._vectors[key] for key in keys if key in self._vectors}
+
+        missing = list(dict.fromkeys(key for key in keys if key not in vectors))
+        if missing:
+            for key, vector in zip(missing, self.embeddings.embed_documents(missing)):
+                vector = np.asarray(vector, dtype=np.float32)
+                vectors[key] = vector / (np.linalg.norm(vector) or 1.0)
+            with self._lock:
+                for key in missing:
+                    self._vectors[key] = vectors[key]
+                while len(self._vectors) > self.max_cached_embeddings:
+                    self._vectors.popitem(last=False)
+
+        return np.stack([vectors[key] for key in keys])
+
+    def match(self, resume_section: List[Any], jd_required_section: List[Any], jd_optional_section: List[Any]) -> PreMatchResult:
+        jd_flags: Dict[str, int] = {}
+        for name in jd_optional_section:
+            jd_flags[str(name)] = 0
+        for name in jd_required_section:
+            jd_flags[str(name)] = 1
+        candidates = {normalize_item(name): name for name in jd_flags}
+
+        section_items: Dict[str, int] = {}
+        matched: Set[str] = set()
+        pending: List[str] = []
+        for item in map(str, resume_section):
+            normalized = normalize_item(item)
+            name = candidates.get(normalized) or self._fuzzy_match(normalized, candidates)
+            if name is not None:
+                section_items[name] = jd_flags[name]
+                matched.add(name)
+            elif jd_flags:
+                pending.append(item)
+
+        ambiguous: List[str] = []
+        if pending and self.embeddings is not None:
+            jd_names = list(jd_flags)
+            try:
+                vectors = self._embed(pending + jd_names)
+                similarities = vectors[:len(pending)] @ vectors[len(pending):].T
+                for item, row in zip(pending, similarities):
+                    best = int(np.argmax(row))
+                    if row[best] >= self.embedding_threshold:
+                        section_items[jd_names[best]] = jd_flags[jd_names[best]]
+                        matched.add(jd_names[best])
+                    elif self.unrelated_threshold is None or row[best] >= self.unrelated_threshold:
+                        ambiguous.append(item)
+            except Exception as ex:
+                self.logger.error(f"Error while embedding section items: {ex}")
+                ambiguous = pending
+        else:
+            ambiguous = pending
+
+        unmatched_required = [name for name, flag in jd_flags.items() if flag == 1 and name not in matched]
+        unmatched_optional = [name for name, flag in jd_flags.items() if flag == 0 and name not in matched]
+        if not ambiguous:
+            section_items.update({name: -1 for name in unmatched_required + unmatched_optional})
+
+        with self._lock:
+            self.sections_total += 1
+            self.sections_resolved += not ambiguous
+            self.items_total += len(resume_section)
+            self.items_resolved += len(resume_section) - len(ambiguous)
+
+        return PreMatchResult(section_items, ambiguous, unmatched_required, unmatched_optional)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "sections": sorted(self.sections),
+            "sections_total": self.sections_total,
+            "sections_resolved_locally": self.sections_resolved,
+            "items_total": self.items_total,
+            "items_resolved_locally": self.items_resolved,
+            "local_fraction": self.items_resolved / self.items_total if self.items_total else 0.0,
+            "cached_embeddings": len(self._vectors),
+        }
+
+
+def create_pre_matcher() -> Optional[SkillPreMatcher]:
+    """
+    Create the pre-matcher configured via environment variables, or None when PRE_MATCHER_SECTIONS is empty.
+    Sections are the comparison section indices, hard skills (0) and certifications (4) by default.
+    """
+    sections = {int(idx) for idx in os.getenv("PRE_MATCHER_SECTIONS", "0,4").split(",") if idx.strip()}
+    if not sections:
+        return None
+
+    unrelated_threshold = os.getenv("PRE_MATCHER_UNRELATED_THRESHOLD")
+    use_embeddings = os.getenv("PRE_MATCHER_USE_EMBEDDINGS", "false").lower() in ("true", "1", "yes", "on")
+    return SkillPreMatcher(
+        sections=sections,
+        fuzzy_threshold=float(os.getenv("PRE_MATCHER_FUZZY_THRESHOLD", 0.9)),
+        embedding_threshold=float(os.getenv("PRE_MATCHER_EMBEDDING_THRESHOLD", 0.9)),
+        unrelated_threshold=float(unrelated_threshold) if unrelated_threshold else None,
+        embeddings=create_embeddings() if use_embeddings else None,
+    )
@@ -0,0 +1,170 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from logging import Logger
+from typing import Any, Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from common_modules.factories.llm_factory import LLMFactory
+
+
+class ResumeIndex(ABC):
+    """
+    Vector index of resume embeddings keyed by the resume S3 URI.
+    """
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+        self.logger = Logger(self.__class__.__name__)
+
+    def upsert(self, s3_uri: str, text: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Embed the resume text and insert or replace its entry."""
+        vector = self.embeddings.embed_documents([text])[0]
+        self.upsert_vector(s3_uri, vector, metadata)
+
+    def query(self, text: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        """Return the top-k resumes most similar to the text (e.g. a JD), best first."""
+        vector = self.embeddings.embed_query(text)
+        return self.query_vector(vector, top_k)
+
+    @abstractmethod
+    def upsert_vector(self, s3_uri: str, vector: List[float], metadata: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    @abstractmethod
+    def query_vector(self, vector: List[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def delete(self, s3_uri: str) -> None:
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        pass
+
+
+class ChromaResumeIndex(ResumeIndex):
+    """
+    Resume index stored in a Chroma collection using cosine distance.
+    """
+
+    def __init__(self, embeddings: Embeddings, host: str, port: int = 8000, collection_name: str = "resumes"):
+        super().__init__(embeddings)
+        import chromadb
+
+        self.client = chromadb.HttpClient(host=host, port=port)
+        self.collection = self.client.get_or_create_collection(
+            name=collection_name,
+            metadata={"hnsw:space": "cosine"},
+        )
+
+    def upsert_vector(self, s3_uri: str, vector: List[float], metadata: Optional[Dict[str, Any]] = None) -> None:
+        self.collection.upsert(
+            ids=[s3_uri],
+            embeddings=[vector],
+            metadatas=[{"s3_uri": s3_uri, **(metadata or {})}],
+        )
+
+    def query_vector(self, vector: List[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        result = self.collection.query(query_embeddings=[vector], n_results=top_k, include=["metadatas", "distances"])
+        return [
+            {"s3_uri": s3_uri, "score": 1 - distance, "metadata": metadata}
+            for s3_uri, distance, metadata in zip(result["ids"][0], result["distances"][0], result["metadatas"][0])
+        ]
+
+    def delete(self, s3_uri: str) -> None:
+        self.collection.delete(ids=[s3_uri])
+
+    def count(self) -> int:
+        return self.collection.count()
+
+
+class NumpyResumeIndex(ResumeIndex):
+    """
+    In-process resume index for local development and tests.
+    Similarities are computed with one matrix product over all stored vectors.
+    """
+
+    def __init__(self, embeddings: Embeddings):
+        super().__init__(embeddings)
+        self.ids: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def upsert_vector(self, s3_uri: str, vector: List[float], metadata: Optional[Dict[str, Any]] = None) -> None:
+        vector = np.asarray(vector, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        metadata = {"s3_uri": s3_uri, **(metadata or {})}
+
+        with self._lock:
+            if s3_uri in self.ids:
+                i = self.ids.index(s3_uri)
+                self.vectors[i] = vector
+                self.metadatas[i] = metadata
+            else:
+                self.ids.append(s3_uri)
+                self.metadatas.append(metadata)
+                self.vectors = np.vstack([self.vectors.reshape(-1, len(vector)), vector])
+
+    def query_vector(self, vector: List[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        with self._lock:
+            if not self.ids:
+                return []
+            vector = np.asarray(vector, dtype=np.float32)
+            scores = self.vectors @ (vector / (np.linalg.norm(vector) or 1.0))
+            top_indices = np.argsort(-scores, kind="stable")[:top_k]
+            return [
+                {"s3_uri": self.ids[i], "score": float(scores[i]), "metadata": self.metadatas[i]}
+                for i in top_indices
+            ]
+
+    def delete(self, s3_uri: str) -> None:
+        with self._lock:
+            if s3_uri in self.ids:
+                i = self.ids.index(s3_uri)
+                self.ids.pop(i)
+                self.metadatas.pop(i)
+                self.vectors = np.delete(self.vectors, i, axis=0)
+
+    def count(self) -> int:
+        return len(self.ids)
+
+
+def create_embeddings() -> Embeddings:
+    """Create the Bedrock embeddings client configured via environment variables."""
+    return LLMFactory.get_llm(
+        llm_provider=LLMFactory.Provider.BEDROCK_EMBEDDINGS,
+        config=LLMFactory.Config(
+            model_name=os.getenv("BEDROCK_EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v2:0"),
+            provider_key=os.getenv("AWS_ACCESS_KEY_ID"),
+            api_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+            model_region=os.getenv("BEDROCK_MODEL_REGION", os.getenv("AWS_DEFAULT_REGION", "us-west-2")),
+        )
+    )
+
+
+def create_resume_index(embeddings: Optional[Embeddings] = None) -> ResumeIndex:
+    """
+    Create the resume index configured via environment variables.
+    Uses Chroma when CHROMA_HOST is set and reachable, otherwise an in-process NumPy index.
+    """
+    logger = Logger("resume_index")
+
+    if embeddings is None:
+        embeddings = create_embeddings()
+
+    chroma_host = os.getenv("CHROMA_HOST")
+    if chroma_host:
+        try:
+            return ChromaResumeIndex(
+                embeddings,
+                host=chroma_host,
+                port=int(os.getenv("CHROMA_PORT", 8000)),
+                collection_name=os.getenv("RESUME_INDEX_COLLECTION", "resumes"),
+            )
+        except Exception as ex:
+            logger.error(f"Error while connecting to Chroma, falling back to in-process index: {ex}")
+
+    return NumpyResumeIndex(embeddings)
@@ -0,0 +1,163 @@
+import os
+from functools import lru_cache
+from itertools import chain
+from operator import attrgetter
+from logging import Logger
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from pydantic import BaseModel
+from common_modules.schemas.jd import JD
+from common_modules.schemas.resume_comparer import ResumeComparer
+from utilities.postgres import connect_postgres, get_postgres_conninfo
+
+logger = Logger("scoring_engine")
+
+# Scored sections of a ResumeComparer, with the JD lists their flags are matched against
+SCORED_SECTIONS = ["hard_skills", "soft_skills", "work_experiences", "educations"]
+
+
+class ScoringWeights(BaseModel):
+    """Base weights of the matching points, split between the items of each JD list."""
+    required_hard_skills: float = 0.3
+    required_soft_skills: float = 0.1
+    required_work_experiences: float = 0.45
+    required_educations: float = 0.1
+    required_years_of_experience: float = 0.05
+    optional_hard_skills: float = 0.06
+    optional_soft_skills: float = 0.02
+    optional_work_experiences: float = 0.1
+    optional_educations: float = 0.02
+
+
+def _read_weights_table(table: str = "scoring_weights") -> Optional[ScoringWeights]:
+    conninfo = get_postgres_conninfo()
+    if conninfo is None:
+        return None
+    with connect_postgres(conninfo) as connection:
+        row = connection.execute(f"SELECT weights::text FROM {table} ORDER BY created_at DESC LIMIT 1").fetchone()
+    return ScoringWeights.model_validate_json(row[0]) if row is not None else None
+
+
+def load_scoring_weights() -> ScoringWeights:
+    """
+    Weights from the JSON file SCORING_WEIGHTS_PATH, else the latest row of the scoring_weights table,
+    else the defaults. Weights missing from the file or row keep their default.
+    """
+    path = os.getenv("SCORING_WEIGHTS_PATH")
+    if path:
+        with open(path) as f:
+            return ScoringWeights.model_validate_json(f.read())
+
+    try:
+        weights = _read_weights_table()
+        if weights is not None:
+            return weights
+    except Exception as ex:
+        logger.error(f"Error while reading scoring weights, using the defaults: {ex}")
+    return ScoringWeights()
+
+
+class EncodedPairs(NamedTuple):
+    """(JD, ResumeComparer) pairs as arrays, one row per pair, to score them again under other weights."""
+    # JD list lengths, keyed by "required_<section>" / "optional_<section>"
+    counts: Dict[str, np.ndarray]
+    # Section flags, padded with 2 (neither required nor optional) to the longest section of all
+    flags: Dict[str, np.ndarray]
+    required_years_of_experience: np.ndarray
+    years_of_experience: np.ndarray
+
+
+class ScoringEngine:
+    """
+    Computes the matching points of many (JD, ResumeComparer) pairs at once.
+
+    Pairs are encoded once into arrays (`encode`), which are then scored in a few NumPy operations per section
+    (`score_encoded`), so that re-scoring under changed weights does not touch the pairs again. Points are summed
+    column by column, i.e. in item order as `resume_evaluator` always did, so that a pair scores bit-identically
+    alone or in a batch; final scores are rounded with Python's `round`, whose decimal rounding `np.round` does not match.
+    """
+
+    def __init__(self, weights: ScoringWeights):
+        self.weights = weights
+
+    @staticmethod
+    def encode(pairs: Sequence[Tuple[JD, ResumeComparer]]) -> EncodedPairs:
+        # Fields are streamed into the arrays without keeping per-pair Python objects alive
+        count_names = [f"{kind}_{section}" for section in SCORED_SECTIONS for kind in ("required", "optional")]
+        jds = [jd for jd, _ in pairs]
+        comparers = [comparer for _, comparer in pairs]
+        get_jd_lists = attrgetter(*count_names)
+        get_sections = attrgetter(*SCORED_SECTIONS)
+
+        counts = np.fromiter(
+            map(len, chain.from_iterable(map(get_jd_lists, jds))), dtype=np.int64, count=len(jds) * len(count_names)
+        ).reshape(len(jds), len(count_names))
+        lengths = np.fromiter(
+            map(len, chain.from_iterable(map(get_sections, comparers))), dtype=np.int64, count=len(comparers) * len(SCORED_SECTIONS)
+        ).reshape(len(comparers), len(SCORED_SECTIONS))
+        values = np.fromiter(
+            chain.from_iterable(map(dict.values, chain.from_iterable(map(get_sections, comparers)))),
+            dtype=np.int64,
+            count=int(lengths.sum()),
+        )
+        # Pairs x sections x items, in the row-major order of the values
+        flags = np.full((*lengths.shape, int(lengths.max(initial=0))), 2, dtype=np.int64)
+        flags[np.arange(flags.shape[2]) < lengths[:, :, None]] = values
+
+        return EncodedPairs(
+            counts={name: counts[:, column] for column, name in enumerate(count_names)},
+            flags={section: flags[:, index] for index, section in enumerate(SCORED_SECTIONS)},
+            required_years_of_experience=np.fromiter(
+                map(attrgetter("required_years_of_experience"), jds), dtype=np.int64, count=len(jds)
+            ),
+            years_of_experience=np.fromiter(
+                map(attrgetter("years_of_experience"), comparers), dtype=np.float64, count=len(comparers)
+            ),
+        )
+
+    @staticmethod
+    def _item_points(base_weight: float, counts: np.ndarray) -> np.ndarray:
+        # The weight split between the items of a JD list, 0 for empty lists
+        return np.divide(base_weight, counts, out=np.zeros(len(counts)), where=counts != 0)
+
+    def score_sections(self, encoded: EncodedPairs) -> Dict[str, np.ndarray]:
+        """Points of every scored section and of the years of experience, one entry per pair."""
+        points = {}
+        for section in SCORED_SECTIONS:
+            required_points = self._item_points(getattr(self.weights, f"required_{section}"), encoded.counts[f"required_{section}"])
+            optional_points = self._item_points(getattr(self.weights, f"optional_{section}"), encoded.counts[f"optional_{section}"])
+            flags = encoded.flags[section]
+            item_points = np.where(
+                flags == 1, required_points[:, None], np.where(flags == 0, optional_points[:, None], 0.0)
+            )
+            # Column by column, not np.sum, whose pairwise summation changes the rounding
+            section_points = np.zeros(len(flags))
+            for column in item_points.T:
+                section_points += column
+            points[section] = section_points
+
+        required_years = encoded.required_years_of_experience
+        years = encoded.years_of_experience
+        # Juniors applying to jobs without experience requirement get 50% more of their experience
+        multiplier = np.where((required_years < 1) & (years < 1), 0.5 * years + years, years)
+        points["years_of_experience"] = self._item_points(self.weights.required_years_of_experience, required_years) * multiplier
+
+        return points
+
+    def score_encoded(self, encoded: EncodedPairs) -> List[float]:
+        points = self.score_sections(encoded)
+        total = points["hard_skills"] + points["soft_skills"] + points["work_experiences"] + points["educations"]
+        total = total + points["years_of_experience"]
+        return [round(score, 4) for score in total.tolist()]  # Keep score as percentage weight sum
+
+    def score(self, pairs: Sequence[Tuple[JD, ResumeComparer]]) -> List[float]:
+        return self.score_encoded(self.encode(pairs)) if pairs else []
+
+    def score_one(self, jd: JD, resume_comparer: ResumeComparer) -> float:
+        return self.score([(jd, resume_comparer)])[0]
+
+
+@lru_cache(maxsize=1)
+def get_scoring_engine() -> ScoringEngine:
+    """Process-wide scoring engine. Call `get_scoring_engine.cache_clear()` to load changed weights."""
+    return ScoringEngine(load_scoring_weights())
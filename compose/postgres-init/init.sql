@@ -22,6 +22,69 @@ CREATE TABLE IF NOT EXISTS qna_resume (
     livecode JSONB
 );
 
+-- Structured JD extractions, keyed by JD content hash + prompt version + model name
+CREATE TABLE IF NOT EXISTS jd_extractions (
+    cache_key TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Structured (anonymized, date-augmented) resume extractions, keyed by resume content hash + prompt version + model name
+CREATE TABLE IF NOT EXISTS resume_extractions (
+    cache_key TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS resume_extractions_content_hash_idx ON resume_extractions (content_hash);
+
+-- Resume evaluation jobs, claimed by the workers of every graph replica with FOR UPDATE SKIP LOCKED
+CREATE TABLE IF NOT EXISTS evaluation_jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload JSONB NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    result JSONB,
+    error TEXT,
+    available_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    locked_until TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS evaluation_jobs_status_idx ON evaluation_jobs (status, available_at);
+
+-- Batch evaluations of many resumes against one JD: the extracted JD and the result of every evaluated resume
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id TEXT PRIMARY KEY,
+    jd_url TEXT NOT NULL,
+    jd JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS batch_results (
+    batch_id TEXT NOT NULL,
+    resume_url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    matching_points DOUBLE PRECISION,
+    error TEXT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (batch_id, resume_url)
+);
+
+-- Matching points weights, the latest row is used (see ScoringWeights for the keys)
+CREATE TABLE IF NOT EXISTS scoring_weights (
+    version TEXT PRIMARY KEY,
+    weights JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
 -- Grant permissions (optional)
 GRANT ALL PRIVILEGES ON DATABASE appdb TO postgres;
 GRANT ALL PRIVILEGES ON DATABASE langgraph_db TO postgres;